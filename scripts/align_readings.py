@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+単語の読みを漢字ごとの音読み・訓読みに対応付ける（ふりがなアライメント）
+
+入力: data/kanji-details/*.json の on / kun
+出力: 各単語エントリの alignment フィールド、および漢字ごとの「読み別単語」
+
+連濁（か→が）・半濁音化（は→ぱ）・促音化（いち→いっ）を考慮し、
+メモ化した動的計画法で最小コストの分割を求める。
+
+使用方法:
+  python scripts/align_readings.py               # 単体で words-by-kanji.json を整列
+  python scripts/align_readings.py --benchmark   # スループット計測
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from normalize_text import KATAKANA_TO_HIRAGANA
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+KANJI_DETAILS_DIR = DATA_DIR / "kanji-details"
+WORDS_BY_KANJI_PATH = DATA_DIR / "words-by-kanji.json"
+WORDS_BY_READING_PATH = DATA_DIR / "words-by-reading.json"
+
+# 分割コスト（小さいほど優先）
+COST_EXACT = 0
+COST_VARIANT = 1
+COST_JUKUJIKUN = 10
+
+# 繰り返し記号（前の漢字の読みを引き継ぐ）
+ITERATION_MARK = "々"
+
+# 連濁・半濁音化の対応表
+RENDAKU_MAP = {
+    "か": "が", "き": "ぎ", "く": "ぐ", "け": "げ", "こ": "ご",
+    "さ": "ざ", "し": "じ", "す": "ず", "せ": "ぜ", "そ": "ぞ",
+    "た": "だ", "ち": "ぢ", "つ": "づ", "て": "で", "と": "ど",
+    "は": "ば", "ひ": "び", "ふ": "ぶ", "へ": "べ", "ほ": "ぼ",
+}
+HANDAKUTEN_MAP = {"は": "ぱ", "ひ": "ぴ", "ふ": "ぷ", "へ": "ぺ", "ほ": "ぽ"}
+
+# 促音化する語末（いち→いっ、がく→がっ）
+SOKUON_FINALS = set("きくちつ")
+
+
+def is_kanji(char: str) -> bool:
+    """CJK統合漢字（繰り返し記号を含む）か判定"""
+    return "一" <= char <= "鿿" or "㐀" <= char <= "䶿" or char == ITERATION_MARK
+
+
+def katakana_to_hiragana(text: str) -> str:
+    """カタカナをひらがなに変換（fugashi の読みは カタカナ）"""
+    return text.translate(KATAKANA_TO_HIRAGANA)
+
+
+def normalize_reading(reading: str) -> tuple:
+    """KANJIDIC 形式の読みを (語幹, 送り仮名込みの全体) に正規化
+
+    例: "ひと.つ" -> ("ひと", "ひとつ"), "-び" -> ("び", "び")
+    """
+    reading = katakana_to_hiragana(reading.replace("-", ""))
+    stem, _, okurigana = reading.partition(".")
+    return stem, stem + okurigana
+
+
+def reading_variants(base: str, kind: str) -> dict:
+    """1つの読みから 表記 -> (コスト, 種別) の候補を生成"""
+    variants = {base: COST_EXACT}
+    if not base:
+        return {}
+
+    head, tail = base[0], base[1:]
+    if head in RENDAKU_MAP:
+        variants.setdefault(RENDAKU_MAP[head] + tail, COST_VARIANT)
+    if head in HANDAKUTEN_MAP:
+        variants.setdefault(HANDAKUTEN_MAP[head] + tail, COST_VARIANT)
+    if len(base) >= 2 and base[-1] in SOKUON_FINALS:
+        for form in list(variants):
+            variants.setdefault(form[:-1] + "っ", COST_VARIANT)
+
+    return {form: (cost, kind) for form, cost in variants.items()}
+
+
+def load_kanji_readings(details_dir: Path = KANJI_DETAILS_DIR) -> dict:
+    """kanji-details から 漢字 -> {表記: (コスト, 種別, 基本形)} の表を作成"""
+    table = {}
+    for path in sorted(details_dir.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            detail = json.load(f)
+        table[detail["kanji"]] = build_reading_table(detail.get("on", []), detail.get("kun", []))
+    return table
+
+
+def build_reading_table(on_readings: list, kun_readings: list) -> dict:
+    """音訓リストから表記候補の表を作成（同じ表記は低コスト側を採用）"""
+    table = {}
+
+    def add(form: str, cost: int, kind: str, base: str):
+        if form not in table or cost < table[form][0]:
+            table[form] = (cost, kind, base)
+
+    for reading in on_readings:
+        stem, _ = normalize_reading(reading)
+        for form, (cost, kind) in reading_variants(stem, "on").items():
+            add(form, cost, kind, stem)
+
+    for reading in kun_readings:
+        stem, full = normalize_reading(reading)
+        for base in {stem, full}:
+            for form, (cost, kind) in reading_variants(base, "kun").items():
+                add(form, cost, kind, stem)
+
+    return table
+
+
+class ReadingAligner:
+    """単語と読みの組をセグメント列に分割する"""
+
+    def __init__(self, readings: dict, cache_size: int = 1 << 20):
+        self.readings = readings
+        self.align = lru_cache(maxsize=cache_size)(self._align)
+
+    def _candidates(self, word: str, i: int) -> dict:
+        char = word[i]
+        if char == ITERATION_MARK and i > 0:
+            char = word[i - 1]
+        return self.readings.get(char, {})
+
+    def _align(self, word: str, reading: str):
+        """最小コストのアライメントを返す（分割できなければ None）"""
+        reading = katakana_to_hiragana(reading)
+        # 熟字訓はコストが大きいため、音訓だけで分割できない場合のみ探索する
+        return self._search(word, reading, False) or self._search(word, reading, True)
+
+    def _search(self, word: str, reading: str, allow_jukujikun: bool):
+        n, m = len(word), len(reading)
+
+        # best[i][j] = (コスト, 直前の状態, セグメント)
+        best = [dict() for _ in range(n + 1)]
+        best[0][0] = (0, None, None)
+
+        for i in range(n):
+            if not best[i]:
+                continue
+            char = word[i]
+            for j, (cost, _, _) in list(best[i].items()):
+                if not is_kanji(char):
+                    kana = katakana_to_hiragana(char)
+                    if reading.startswith(kana, j):
+                        self._relax(best[i + 1], j + len(kana), cost, (i, j), (char, kana, "kana", kana))
+                    continue
+
+                for form, (form_cost, kind, base) in self._candidates(word, i).items():
+                    if reading.startswith(form, j):
+                        self._relax(best[i + 1], j + len(form), cost + form_cost, (i, j), (char, form, kind, base))
+
+                if not allow_jukujikun:
+                    continue
+
+                # 熟字訓: 連続する漢字列の全体に任意の読みを一括で割り当てる（最終手段）。
+                # 漢字列の途中から始めたり音訓と混ぜたりすると 明日 -> 明=あ + 日=した の
+                # ような分割ができてしまうので、漢字列の先頭から末尾までを1セグメントにする
+                if i > 0 and is_kanji(word[i - 1]):
+                    continue
+                k = i
+                while k < n and is_kanji(word[k]):
+                    k += 1
+                for end in range(j + 1, m + 1):
+                    segment = reading[j:end]
+                    self._relax(
+                        best[k], end, cost + COST_JUKUJIKUN, (i, j),
+                        (word[i:k], segment, "jukujikun", segment),
+                    )
+
+        if m not in best[n]:
+            return None
+
+        segments = []
+        i, j = n, m
+        while best[i][j][1] is not None:
+            _, (pi, pj), segment = best[i][j]
+            segments.append(segment)
+            i, j = pi, pj
+        segments.reverse()
+        return tuple(segments)
+
+    @staticmethod
+    def _relax(states: dict, j: int, cost: int, prev: tuple, segment: tuple):
+        if j not in states or cost < states[j][0]:
+            states[j] = (cost, prev, segment)
+
+    def alignment_for(self, word: str, reading: str) -> list:
+        """JSON 出力用のアライメントを返す"""
+        segments = self.align(word, reading)
+        if segments is None:
+            return []
+        result = []
+        for text, seg_reading, kind, base in segments:
+            entry = {"text": text, "reading": seg_reading, "type": kind}
+            if base != seg_reading:
+                entry["base"] = base
+            result.append(entry)
+        return result
+
+
+def add_alignments(words_by_kanji: dict, aligner: ReadingAligner) -> dict:
+    """各単語エントリに alignment を付与し、漢字ごとの読み別単語を返す"""
+    words_by_reading = {}
+
+    for kanji, words in words_by_kanji.items():
+        groups = {}
+        for entry in words:
+            alignment = aligner.alignment_for(entry["word"], entry["reading"])
+            entry["alignment"] = alignment
+
+            # この漢字が担う読み（基本形）でグループ化
+            for segment in alignment:
+                if segment["type"] in ("on", "kun") and segment["text"] == kanji:
+                    base = segment.get("base", segment["reading"])
+                    group = groups.setdefault(base, [])
+                    if entry["word"] not in group:
+                        group.append(entry["word"])
+        if groups:
+            words_by_reading[kanji] = groups
+
+    return words_by_reading
+
+
+def run_benchmark(readings: dict, pairs: int, seed: int = 0):
+    """合成 (単語, 読み) ペアでスループットを計測"""
+    rng = random.Random(seed)
+    kanji_pool = [k for k, table in readings.items() if table]
+
+    def synth_pair():
+        word, reading = "", ""
+        for _ in range(rng.choice((1, 2, 2, 3))):
+            kanji = rng.choice(kanji_pool)
+            form = rng.choice(list(readings[kanji]))
+            word += kanji
+            reading += form
+        if rng.random() < 0.3:
+            word += "る"
+            reading += "る"
+        return word, reading
+
+    # 実コーパスと同様に語彙の出現頻度を Zipf 分布に従わせる
+    vocabulary = [synth_pair() for _ in range(max(1, pairs // 10))]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    data = rng.choices(vocabulary, weights=weights, k=pairs)
+    unique = len(set(data))
+
+    for label, cache_size in (("no cache", 0), ("memoized", 1 << 20)):
+        aligner = ReadingAligner(readings, cache_size=cache_size)
+        start = time.perf_counter()
+        failed = sum(1 for word, reading in data if aligner.align(word, reading) is None)
+        elapsed = time.perf_counter() - start
+        print(f"    {label:>9}: {pairs / elapsed:,.0f} pairs/sec ({elapsed:.2f}s, failed={failed})")
+
+    print(f"    Unique pairs: {unique:,} / {pairs:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Align word readings to per-kanji readings")
+    parser.add_argument("--benchmark", action="store_true", help="measure alignment throughput")
+    parser.add_argument("--pairs", type=int, default=200_000, help="number of synthetic pairs for --benchmark")
+    args = parser.parse_args()
+
+    print(f"[*] Loading: {KANJI_DETAILS_DIR}")
+    readings = load_kanji_readings()
+    print(f"    Loaded readings for {len(readings)} kanji")
+
+    if args.benchmark:
+        print(f"\n[*] Benchmark ({args.pairs:,} synthetic pairs)")
+        run_benchmark(readings, args.pairs)
+        return
+
+    with open(WORDS_BY_KANJI_PATH, "r", encoding="utf-8") as f:
+        words_by_kanji = json.load(f)
+
+    aligner = ReadingAligner(readings)
+    words_by_reading = add_alignments(words_by_kanji, aligner)
+
+    total = sum(len(words) for words in words_by_kanji.values())
+    unaligned = sum(1 for words in words_by_kanji.values() for w in words if not w["alignment"])
+    print(f"\n[*] Aligned {total - unaligned} / {total} word entries")
+
+    print(f"[*] Saving: {WORDS_BY_KANJI_PATH}")
+    with open(WORDS_BY_KANJI_PATH, "w", encoding="utf-8") as f:
+        json.dump(words_by_kanji, f, ensure_ascii=False, indent=2)
+
+    print(f"[*] Saving: {WORDS_BY_READING_PATH}")
+    with open(WORDS_BY_READING_PATH, "w", encoding="utf-8") as f:
+        json.dump(words_by_reading, f, ensure_ascii=False, indent=2)
+
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
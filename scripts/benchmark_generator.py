@@ -0,0 +1,585 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+generate_words_by_kanji.py の各ステージのベンチマーク
+
+入力: data/kanji-joyo.json
+基準値: scripts/benchmarks/generator-baseline.json
+
+kanji-joyo.json の漢字からシード固定の合成単語リストとコーパスを作り、
+10k / 100k / 1M 語の規模で load・extract・tokenize・sort・dump の各ステージの
+処理時間とメモリのピーク（tracemalloc）を計測する。保存済みの基準値と比べて
+許容範囲を超えて遅く（大きく）なったステージがあれば終了コード 1 を返す。
+
+fugashi / unidic がある環境では本番と同じ LemmaTagger で解析し、
+無い環境では文字種で区切るだけの疑似 Tagger を使う。
+基準値は Tagger の種類（fugashi / fake）ごとに分けて保存する。
+
+使用方法:
+  python scripts/benchmark_generator.py
+  python scripts/benchmark_generator.py --sizes 10000 100000 --fake-tagger
+  python scripts/benchmark_generator.py --update-baseline
+  python scripts/benchmark_generator.py --compressed --sizes 100000   圧縮コーパスの読み込み比較
+  python scripts/benchmark_generator.py --lemma --sizes 100000        表層形と辞書形の見出し語の比較
+  python scripts/benchmark_generator.py --lemma-tagger --sizes 100000 fugashi のノードを作る解析と必要な素性だけを受け取る解析の比較
+  python scripts/benchmark_generator.py --mmap --sizes 1000000        1つの大きなコーパスの mmap 分割と読み込み・送信の比較
+"""
+
+import argparse
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import multiprocessing
+import os
+import pickle
+import random
+import re
+import resource
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+
+from corpus_sources import CHUNK_BYTES, OPENERS, corpus_chunks
+from generate_words_by_kanji import (
+    KANJI_JOYO_PATH,
+    SAMPLE_WORDS,
+    LemmaMemo,
+    LemmaTagger,
+    add_tagged_words,
+    add_words_from_corpus,
+    add_words_from_fugashi,
+    create_tagger,
+    extract_words_for_kanji,
+    init_corpus_worker,
+    load_joyo_kanji,
+    sort_words_by_length,
+    tag_corpus_chunk,
+    tag_texts,
+    tag_worker_texts,
+)
+from normalize_text import fold_reading
+
+PROJECT_ROOT = Path(__file__).parent.parent
+BASELINE_PATH = PROJECT_ROOT / "scripts" / "benchmarks" / "generator-baseline.json"
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+STAGES = ("load", "extract", "tokenize", "sort", "dump")
+
+# 基準値に対する許容倍率（時間は揺れが大きいので緩め）
+DEFAULT_TIME_TOLERANCE = 0.5
+DEFAULT_MEMORY_TOLERANCE = 0.2
+# これより短いステージは計測誤差が大きいので時間の比較をしない
+MIN_COMPARED_SECONDS = 0.05
+
+HIRAGANA = [chr(c) for c in range(ord("あ"), ord("ん") + 1)]
+PARTICLES = ["は", "が", "を", "に", "で", "と", "の", "から", "まで"]
+ENDINGS = ["です。", "ます。", "した。", "ません。"]
+WORDS_PER_SENTENCE = 8
+# --lemma 用: 同じ語の活用形（辞書形にまとめると1語になる）
+CONJUGATED = [
+    "行きます", "行った", "行かない", "行けば", "見ました", "見て", "見ない", "買いました", "買った", "買わない",
+    "書きます", "書いた", "書かない", "読みました", "読んだ", "読まない", "話します", "話した", "話さない",
+    "使います", "使った", "使わない", "始まります", "始まった", "遊びました", "遊んだ", "待ちます", "待った",
+    "走ります", "走った", "美しかった", "美しく", "新しかった", "新しく",
+]
+
+# --mmap 用: 表層形が同じで文脈により辞書形が変わる文（行っ → 行く / 行う など）
+HOMOGRAPH_SENTENCES = [
+    "学校に行った。", "会議を行った。", "駅まで行って帰った。", "調査を行って報告した。",
+]
+
+FakeFeature = namedtuple("FakeFeature", "kana")
+FakeWord = namedtuple("FakeWord", "surface feature feature_raw")
+
+
+class FakeTagger:
+    """漢字・ひらがな・カタカナの連続で区切るだけの Tagger の代用品"""
+
+    TOKEN_RE = re.compile(r"[一-龯々]+|[ぁ-ん]+|[ァ-ヶー]+|.")
+
+    def __call__(self, text: str) -> list:
+        words = []
+        for surface in self.TOKEN_RE.findall(text):
+            # 読みは文字数分のカタカナ（内容は問わない）
+            kana = "".join(chr((ord(c) % 80) + ord("ァ")) for c in surface)
+            words.append(FakeWord(surface, FakeFeature(kana), kana))
+        return words
+
+
+def synthetic_words(kanji: list, size: int, seed: int = 0) -> list:
+    """Zipf 分布で漢字を選んだ (単語, 読み, 意味) のリスト"""
+    rng = random.Random(seed)
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(kanji)):
+        total += 1 / (rank + 1)
+        cum_weights.append(total)
+
+    words = []
+    for i in range(size):
+        length = rng.choice((1, 2, 2, 2, 3, 4))
+        word = "".join(rng.choices(kanji, cum_weights=cum_weights, k=length))
+        reading = "".join(rng.choices(HIRAGANA, k=length * 2))
+        words.append((word, reading, f"meaning {i}"))
+    return words
+
+
+def synthetic_corpus(words: list, seed: int = 0) -> list:
+    """合成単語を助詞でつないだ文のリスト（単語数は words と同じ）"""
+    rng = random.Random(seed)
+    lines = []
+    for start in range(0, len(words), WORDS_PER_SENTENCE):
+        parts = []
+        for word, _, _ in words[start:start + WORDS_PER_SENTENCE]:
+            parts.append(word + rng.choice(PARTICLES))
+        lines.append("".join(parts) + rng.choice(ENDINGS))
+    return lines
+
+
+def get_tagger(fake: bool):
+    """fugashi が使えれば本番と同じ LemmaTagger、なければ疑似 Tagger"""
+    if not fake:
+        try:
+            import fugashi  # noqa: F401
+            return "fugashi", LemmaTagger()
+        except (ImportError, RuntimeError):
+            pass
+    return "fake", FakeTagger()
+
+
+def run_stages(paths: dict, tagger, measure_memory: bool) -> dict:
+    """1回分のパイプラインを実行し、ステージごとの (秒, ピークバイト) を返す"""
+    results = {}
+
+    def stage(name, func):
+        if measure_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - base if measure_memory else None
+        results[name] = (elapsed, peak)
+        return value
+
+    def load():
+        kanji_list = load_joyo_kanji(paths["joyo"])
+        with open(paths["words"], "r", encoding="utf-8") as f:
+            word_list = [tuple(entry) for entry in json.load(f)]
+        with open(paths["corpus"], "r", encoding="utf-8") as f:
+            texts = f.read().splitlines()
+        return kanji_list, word_list, texts
+
+    kanji_list, word_list, texts = stage("load", load)
+    kanji_set = {k["kanji"] for k in kanji_list}
+    words_by_kanji = stage("extract", lambda: extract_words_for_kanji(kanji_list, word_list))
+    stage("tokenize", lambda: add_words_from_fugashi(words_by_kanji, kanji_set, texts=texts, tagger=tagger))
+    stage("sort", lambda: sort_words_by_length(words_by_kanji))
+
+    def dump():
+        with open(paths["output"], "w", encoding="utf-8") as f:
+            json.dump(words_by_kanji, f, ensure_ascii=False, indent=2)
+
+    stage("dump", dump)
+    return results
+
+
+def benchmark_size(kanji: list, size: int, seed: int, tagger, workdir: Path) -> dict:
+    """1つの規模について時間（メモリ計測なし）とメモリ（2回目の実行）を計測"""
+    words = synthetic_words(kanji, size, seed)
+    paths = {
+        "joyo": KANJI_JOYO_PATH,
+        "words": workdir / f"words-{size}.json",
+        "corpus": workdir / f"corpus-{size}.txt",
+        "output": workdir / f"words-by-kanji-{size}.json",
+    }
+    with open(paths["words"], "w", encoding="utf-8") as f:
+        json.dump(words, f, ensure_ascii=False)
+    with open(paths["corpus"], "w", encoding="utf-8") as f:
+        f.write("\n".join(synthetic_corpus(words, seed)))
+
+    timings = run_stages(paths, tagger, measure_memory=False)
+    tracemalloc.start()
+    try:
+        memory = run_stages(paths, tagger, measure_memory=True)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        name: {"seconds": round(timings[name][0], 4), "peakBytes": memory[name][1]}
+        for name in STAGES
+    }
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float) -> list:
+    """基準値より許容範囲を超えて悪化した (規模, ステージ, 指標, 基準, 今回) のリスト"""
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous:
+                continue
+            if (previous["seconds"] >= MIN_COMPARED_SECONDS
+                    and current["seconds"] > previous["seconds"] * (1 + time_tolerance)):
+                regressions.append((size, name, "seconds", previous["seconds"], current["seconds"]))
+            if current["peakBytes"] > previous["peakBytes"] * (1 + memory_tolerance):
+                regressions.append((size, name, "peakBytes", previous["peakBytes"], current["peakBytes"]))
+    return regressions
+
+
+def load_baselines(path: Path = BASELINE_PATH) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(baselines: dict, path: Path = BASELINE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, ensure_ascii=False, indent=2)
+
+
+def write_corpus_files(lines: list, workdir: Path, files: int) -> dict:
+    """同じコーパスを平文・.gz・.bz2・.xz・tar.gz で files 個に分けて書き出す"""
+    plain = []
+    step = -(-len(lines) // files)
+    for i in range(files):
+        path = workdir / f"corpus-{i:02d}.txt"
+        path.write_text("\n".join(lines[i * step:(i + 1) * step]), encoding="utf-8")
+        plain.append(path)
+
+    formats = {"plain": plain}
+    for suffix, opener in (("gz", gzip.open), ("bz2", bz2.open), ("xz", lzma.open)):
+        formats[suffix] = []
+        for path in plain:
+            compressed = path.with_name(f"{path.name}.{suffix}")
+            with open(path, "rb") as src, opener(compressed, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            formats[suffix].append(compressed)
+
+    archive = workdir / "corpus.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        for path in plain:
+            tar.add(path, arcname=path.name)
+    formats["tar.gz"] = [archive]
+    return formats
+
+
+def decompress_to_disk(paths: list, workdir: Path) -> list:
+    """事前展開の比較用: 親プロセスで平文に展開してから渡す"""
+    outputs = []
+    for path in paths:
+        if str(path).endswith(".tar.gz"):
+            with tarfile.open(path, "r:gz") as tar:
+                members = [m for m in tar.getmembers() if m.isfile()]
+                tar.extractall(workdir, members=members, filter="data")
+            outputs.extend(workdir / m.name for m in members)
+            continue
+        output = workdir / path.stem
+        with OPENERS[path.suffix](path, "rb") as src, open(output, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        outputs.append(output)
+    return outputs
+
+
+def run_compressed_benchmark(kanji: list, sizes: list, seed: int, tagger_factory, files: int, workers: int):
+    """圧縮コーパスをワーカー内で展開する場合と、事前に展開する場合の合計時間を比較"""
+    kanji_set = set(kanji)
+
+    def tokenize(paths):
+        start = time.perf_counter()
+        add_words_from_corpus({}, kanji_set, paths, workers=workers, tagger_factory=tagger_factory)
+        return time.perf_counter() - start
+
+    for size in sizes:
+        lines = synthetic_corpus(synthetic_words(kanji, size, seed), seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            formats = write_corpus_files(lines, Path(tmp), files)
+            plain_time = tokenize(formats["plain"])
+            print(f"    {size:>9,} words, {files} files, {workers or os.cpu_count()} workers:")
+            print(f"        {'format':<7} {'MiB':>7} {'in-worker':>10} {'decompress first':>17}")
+            for name, paths in formats.items():
+                mib = sum(p.stat().st_size for p in paths) / 2**20
+                if name == "plain":
+                    print(f"        {name:<7} {mib:>7.1f} {plain_time:>9.2f}s")
+                    continue
+                in_worker = tokenize(paths)
+                extract_dir = Path(tmp) / f"extracted-{name}"
+                extract_dir.mkdir()
+                start = time.perf_counter()
+                extracted = decompress_to_disk(paths, extract_dir)
+                first = time.perf_counter() - start + tokenize(extracted)
+                print(f"        {name:<7} {mib:>7.1f} {in_worker:>9.2f}s {first:>16.2f}s")
+
+
+def peak_rss() -> int:
+    """このプロセスの最大 RSS（バイト）
+
+    ru_maxrss は exec の前（fork した親の複製）の値を引き継ぐので、Linux では
+    プロセスごとのメモリ空間の値である /proc/self/status の VmHWM を使う。
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def tag_corpus_in_pool(mode: str, path: Path, kanji_set: set, tagger_factory, workers: int,
+                       chunk_bytes: int, results):
+    """--mmap 用（新しいプロセスで実行）: 1つのコーパスを解析し、
+    (秒, 送信前の親の最大 RSS, 親の最大 RSS, 送ったバイト数, 単語数, 出力のハッシュ) を返す
+
+    read-send は親がファイル全体を読んで行に分け、行のリストをワーカーに送る方式。
+    mmap は親が区切り位置だけを求め、ワーカーに (path, start, end) を送る方式。
+    """
+    start = time.perf_counter()
+    words_by_kanji = {}
+    chunks = corpus_chunks([path], chunk_bytes)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=init_corpus_worker, initargs=(kanji_set, tagger_factory)) as pool:
+        if mode == "read-send":
+            lines = [line.strip() for line in path.read_text(encoding="utf-8").split("\n") if line.strip()]
+            step = -(-len(lines) // len(chunks))
+            tasks, worker = [lines[i:i + step] for i in range(0, len(lines), step)], tag_worker_texts
+        else:
+            tasks, worker = chunks, tag_corpus_chunk
+        # ワーカーに送る前の親の最大 RSS と、送るデータの大きさ
+        input_peak = peak_rss()
+        sent = sum(len(pickle.dumps(task)) for task in tasks)
+        tagged = chain.from_iterable(pool.map(worker, tasks))
+        add_tagged_words(words_by_kanji, kanji_set, tagged)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss()
+    entries = sum(len(words) for words in words_by_kanji.values())
+    digest = hashlib.blake2b(json.dumps(words_by_kanji, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+    results.put((elapsed, input_peak, peak, sent, entries, digest))
+
+
+def run_mmap_benchmark(kanji: list, sizes: list, seed: int, tagger_factory, workers: int,
+                       chunk_bytes: int = CHUNK_BYTES):
+    """1つの大きな平文コーパスを、読み込んで送る方式と mmap の範囲を送る方式で比較
+
+    親プロセスの最大 RSS を比べるため、方式ごとに spawn した新しいプロセスで計測する。
+    """
+    context = multiprocessing.get_context("spawn")
+    kanji_set = set(kanji)
+    for size in sizes:
+        lines = synthetic_corpus(synthetic_words(kanji, size, seed), seed)
+        # 同じ表層形で辞書形が文脈により変わる文を混ぜ、範囲やワーカーの分け方で出力が変わらないことも確かめる
+        mixed = []
+        for i, line in enumerate(lines):
+            if i % 100 == 0:
+                mixed.append(HOMOGRAPH_SENTENCES[i // 100 % len(HOMOGRAPH_SENTENCES)])
+            mixed.append(line)
+        lines = mixed
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "corpus.txt"
+            path.write_text("\n".join(lines), encoding="utf-8")
+            mib = path.stat().st_size / 2**20
+            chunks = len(corpus_chunks([path], chunk_bytes))
+            print(f"    {size:>9,} words ({mib:.1f} MiB, {len(lines):,} lines, {chunks} chunks, "
+                  f"{workers or os.cpu_count()} workers):")
+            print(f"        {'mode':<10} {'seconds':>8} {'MiB/s':>7} {'lines/s':>9} {'sent':>10} "
+                  f"{'RSS at send':>12} {'peak RSS':>9} {'entries':>8}")
+            digests = set()
+            for mode in ("read-send", "mmap"):
+                results = context.Queue()
+                process = context.Process(target=tag_corpus_in_pool, args=(
+                    mode, path, kanji_set, tagger_factory, workers, chunk_bytes, results))
+                process.start()
+                elapsed, input_peak, peak, sent, entries, digest = results.get()
+                process.join()
+                digests.add(digest)
+                print(f"        {mode:<10} {elapsed:>7.2f}s {mib / elapsed:>7.1f} {len(lines) / elapsed:>9,.0f} "
+                      f"{sent / 2**20:>6.2f} MiB {input_peak / 2**20:>8.0f} MiB {peak / 2**20:>5.0f} MiB "
+                      f"{entries:>8,}")
+            if len(digests) > 1:
+                print("        [!] Output differs between modes")
+
+
+def conjugation_corpus(size: int, seed: int = 0) -> list:
+    """サンプル単語と活用形を組み合わせた文のリスト（1文あたり WORDS_PER_SENTENCE 語）"""
+    rng = random.Random(seed)
+    nouns = [word for word, _, _ in SAMPLE_WORDS if len(word) >= 2]
+    lines = []
+    for _ in range(max(1, size // WORDS_PER_SENTENCE)):
+        parts = [rng.choice(nouns) + rng.choice(PARTICLES) + rng.choice(CONJUGATED)
+                 for _ in range(WORDS_PER_SENTENCE // 2)]
+        lines.append("、".join(parts) + "。")
+    return lines
+
+
+def surface_words(tagged, kanji_set: set) -> tuple:
+    """比較用: 形態素ごとに素性を読み、表層形をそのまま見出し語にする（辞書形にまとめる前の方式）"""
+    words_by_kanji, seen, accesses = {}, set(), 0
+    for _, words in tagged:
+        for word in words:
+            accesses += 1
+            reading = fold_reading(word.feature.kana or "")
+            surface = word.surface
+            if len(surface) < 2 or not reading:
+                continue
+            for char in surface:
+                if char in kanji_set and (char, surface) not in seen:
+                    seen.add((char, surface))
+                    words_by_kanji.setdefault(char, []).append({"word": surface, "reading": reading, "meaning": ""})
+    return words_by_kanji, accesses
+
+
+def run_lemma_benchmark(kanji: list, sizes: list, seed: int, tagger):
+    """表層形ごとに素性を読む方式と、辞書形にまとめて素性をメモする方式の比較"""
+    kanji_set = set(kanji)
+    for size in sizes:
+        lines = conjugation_corpus(size, seed)
+        print(f"    {size:>9,} words ({len(lines):,} lines):")
+        print(f"        {'key':<8} {'seconds':>8} {'feature reads':>14} {'entries':>8} {'JSON bytes':>11}")
+
+        start = time.perf_counter()
+        by_surface, accesses = surface_words(tag_texts(lines, tagger), kanji_set)
+        elapsed = time.perf_counter() - start
+        results = [("surface", elapsed, accesses, by_surface)]
+
+        memo = LemmaMemo()
+        by_lemma = {}
+        start = time.perf_counter()
+        add_tagged_words(by_lemma, kanji_set, tag_texts(lines, tagger), memo=memo)
+        elapsed = time.perf_counter() - start
+        results.append(("lemma", elapsed, memo.decodes, by_lemma))
+
+        for name, elapsed, reads, words_by_kanji in results:
+            entries = sum(len(words) for words in words_by_kanji.values())
+            size_bytes = len(json.dumps(words_by_kanji, ensure_ascii=False, indent=2).encode("utf-8"))
+            print(f"        {name:<8} {elapsed:>7.2f}s {reads:>14,} {entries:>8,} {size_bytes:>11,}")
+
+
+def run_lemma_tagger_benchmark(kanji: list, sizes: list, seed: int):
+    """文ごとに fugashi のノードを作る方式と、必要な素性だけを parse() で受け取る LemmaTagger の比較"""
+    kanji_set = set(kanji)
+    for size in sizes:
+        corpora = [("synthetic", synthetic_corpus(synthetic_words(kanji, size, seed), seed)),
+                   ("conjugate", conjugation_corpus(size, seed))]
+        for corpus_name, lines in corpora:
+            print(f"    {size:>9,} words, {corpus_name} ({len(lines):,} lines):")
+            print(f"        {'tagger':<8} {'seconds':>8} {'lines/s':>9} {'decodes':>9} {'entries':>8}")
+
+            memo = LemmaMemo()
+            by_node = {}
+            start = time.perf_counter()
+            add_tagged_words(by_node, kanji_set, tag_texts(lines, create_tagger()), memo=memo)
+            elapsed = time.perf_counter() - start
+            results = [("node", elapsed, memo.decodes, by_node)]
+
+            tagger = LemmaTagger()
+            by_format = {}
+            start = time.perf_counter()
+            add_tagged_words(by_format, kanji_set, tag_texts(lines, tagger))
+            elapsed = time.perf_counter() - start
+            results.append(("format", elapsed, tagger.decodes, by_format))
+
+            for name, elapsed, decodes, words_by_kanji in results:
+                entries = sum(len(words) for words in words_by_kanji.values())
+                print(f"        {name:<8} {elapsed:>7.2f}s {len(lines) / elapsed:>9,.0f} {decodes:>9,} {entries:>8,}")
+            if by_format != by_node:
+                print("        [!] Output differs from the node tagger")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_words_by_kanji.py stages")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fake-tagger", action="store_true", help="use the fake tagger even if fugashi is installed")
+    parser.add_argument("--time-tolerance", type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help="allowed slowdown ratio per stage (default: 0.5 = +50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="allowed peak memory growth ratio per stage (default: 0.2 = +20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--compressed", action="store_true",
+                        help="compare compressed corpus input (decompressed in workers) with pre-decompressed files")
+    parser.add_argument("--files", type=int, default=8, help="corpus files for --compressed (default: 8)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --compressed / --mmap")
+    parser.add_argument("--lemma", action="store_true",
+                        help="compare surface-keyed entries with lemma-keyed entries and memoized features")
+    parser.add_argument("--lemma-tagger", action="store_true",
+                        help="compare per-sentence fugashi nodes with LemmaTagger (requires fugashi)")
+    parser.add_argument("--mmap", action="store_true",
+                        help="compare mmap byte-range chunks with reading and sending one large corpus file")
+    parser.add_argument("--chunk-mib", type=float, default=CHUNK_BYTES / 2**20,
+                        help="chunk size for --mmap in MiB (default: %(default)s)")
+    args = parser.parse_args()
+
+    kanji = [k["kanji"] for k in load_joyo_kanji(KANJI_JOYO_PATH)]
+    tagger_name, tagger = get_tagger(args.fake_tagger)
+    print(f"[*] Benchmark (tagger: {tagger_name}, seed: {args.seed})")
+
+    if args.compressed:
+        tagger_factory = FakeTagger if tagger_name == "fake" else LemmaTagger
+        run_compressed_benchmark(kanji, args.sizes, args.seed, tagger_factory, args.files, args.workers)
+        return 0
+
+    if args.mmap:
+        tagger_factory = FakeTagger if tagger_name == "fake" else LemmaTagger
+        run_mmap_benchmark(kanji, args.sizes, args.seed, tagger_factory, args.workers, int(args.chunk_mib * 2**20))
+        return 0
+
+    if args.lemma:
+        # 表層形の方式はノードの素性を読むので、fugashi ではノードを作る Tagger で比べる
+        run_lemma_benchmark(kanji, args.sizes, args.seed, tagger if tagger_name == "fake" else create_tagger())
+        return 0
+
+    if args.lemma_tagger:
+        if tagger_name == "fake":
+            print("[!] --lemma-tagger requires fugashi")
+            return 1
+        run_lemma_tagger_benchmark(kanji, args.sizes, args.seed)
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            stages = benchmark_size(kanji, size, args.seed, tagger, Path(tmp))
+            results[str(size)] = stages
+            print(f"    {size:>9,} words:")
+            for name in STAGES:
+                entry = stages[name]
+                print(f"        {name:<9} {entry['seconds']:>8.3f}s  {entry['peakBytes'] / 2**20:>8.1f} MiB")
+
+    baselines = load_baselines()
+    if args.update_baseline:
+        baselines.setdefault(tagger_name, {}).update(results)
+        save_baselines(baselines)
+        print(f"\n[*] Saving: {BASELINE_PATH}")
+        print("\n[OK] Done!")
+        return 0
+
+    baseline = baselines.get(tagger_name, {})
+    if not baseline:
+        print(f"\n[*] No {tagger_name} baseline in {BASELINE_PATH} (run with --update-baseline)")
+        return 0
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print("\n[!] Regressions:")
+        for size, name, metric, previous, current in regressions:
+            print(f"    {int(size):>9,} {name:<9} {metric}: {previous} -> {current}")
+        return 1
+
+    print("\n[OK] No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
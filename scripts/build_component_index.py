@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KanjiVG の部品ツリーから「部品 → 漢字」の転置インデックスを作成するスクリプト
+
+入力: data/kanji-joyo.json, public/kanjivg/*.svg, data/radicals/*.json, src/lib/radicalList.ts
+出力: data/component-index.json      部品ごとのビットセット（常用漢字の並び順）
+      data/radicals-kanjivg/*.json   data/radicals/*.json と同じ形式の部首別漢字リスト
+      data/radicals-kanjivg-diff.json 手作業の部首ファイルとの差分
+
+kvg:element（および kvg:original）をキーに、各部品を含む漢字の集合を
+常用漢字リストの順番に対応したビットセット（Python の int）で持つ。
+「氵 と 口 を含む漢字」のような複数部品の検索はビット AND で求まる。
+
+部首のスラッグは src/lib/radicalList.ts の getUniqueSlug と同じ規則
+（「・」を「-」に置換し、en が重複する部首には "-{type}" を付ける）で導出し、
+radicalList の全部首について data/radicals の手作業ファイルと比較する。
+
+使用方法:
+  python scripts/build_component_index.py
+  python scripts/build_component_index.py --query 氵 口
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+KANJIVG_DIR = PROJECT_ROOT / "public" / "kanjivg"
+
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+RADICALS_DIR = DATA_DIR / "radicals"
+RADICAL_GLYPH_MAP_PATH = PROJECT_ROOT / "src" / "data" / "radicals" / "radicalGlyphMap.ts"
+RADICAL_LIST_PATH = PROJECT_ROOT / "src" / "lib" / "radicalList.ts"
+
+OUTPUT_PATH = DATA_DIR / "component-index.json"
+RADICALS_OUTPUT_DIR = DATA_DIR / "radicals-kanjivg"
+DIFF_OUTPUT_PATH = DATA_DIR / "radicals-kanjivg-diff.json"
+
+KVG = "{http://kanjivg.tagaini.net}"
+SVG_G = "{http://www.w3.org/2000/svg}g"
+
+# サイト表示用の部首字形と KanjiVG の kvg:element の表記が異なるもの
+GLYPH_ALIASES = {
+    "訁": "言",
+    "釒": "金",
+    "⻗": "雨",
+    "辶": "⻌",
+}
+
+
+def parse_components(svg_path: Path) -> list:
+    """1つの SVG から (element, original, radical, position) のリストを取得（漢字自身は除く）"""
+    root = ET.parse(svg_path).getroot()
+    components = []
+    for group in root.iter(SVG_G):
+        group_id = group.get("id", "")
+        element = group.get(f"{KVG}element")
+        # 最上位のグループ（kvg:xxxxx）は漢字そのもの
+        if not element or re.fullmatch(r"kvg:[0-9a-f]{5}", group_id):
+            continue
+        components.append((
+            element,
+            group.get(f"{KVG}original"),
+            group.get(f"{KVG}radical"),
+            group.get(f"{KVG}position"),
+        ))
+    return components
+
+
+class ComponentIndex:
+    """部品ごとのビットセットによる転置インデックス"""
+
+    def __init__(self, kanji: list):
+        self.kanji = kanji
+        self.position = {k: i for i, k in enumerate(kanji)}
+        self.components = {}
+        self.radicals = {}
+
+    def add(self, kanji: str, components: list):
+        bit = 1 << self.position[kanji]
+        for element, original, radical, _ in components:
+            for key in filter(None, (element, original)):
+                self.components[key] = self.components.get(key, 0) | bit
+                if radical:
+                    self.radicals[key] = self.radicals.get(key, 0) | bit
+
+    def bitset(self, component: str, radical_only: bool = False) -> int:
+        table = self.radicals if radical_only else self.components
+        return table.get(GLYPH_ALIASES.get(component, component), 0)
+
+    def query(self, *components: str, radical_only: bool = False) -> int:
+        """全ての部品を含む漢字のビットセット"""
+        if not components:
+            return 0
+        result = self.bitset(components[0], radical_only)
+        for component in components[1:]:
+            result &= self.bitset(component, radical_only)
+        return result
+
+    def decode(self, bits: int) -> list:
+        """ビットセットを常用漢字の並び順の漢字リストに変換"""
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(self.kanji[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def to_json(self) -> dict:
+        size = (len(self.kanji) + 7) // 8
+
+        def encode(table: dict) -> dict:
+            return {
+                key: base64.b64encode(bits.to_bytes(size, "little")).decode("ascii")
+                for key, bits in sorted(table.items())
+            }
+
+        return {
+            "kanji": "".join(self.kanji),
+            "components": encode(self.components),
+            "radicals": encode(self.radicals),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ComponentIndex":
+        index = cls(list(data["kanji"]))
+
+        def decode(table: dict) -> dict:
+            return {key: int.from_bytes(base64.b64decode(value), "little") for key, value in table.items()}
+
+        index.components = decode(data["components"])
+        index.radicals = decode(data["radicals"])
+        return index
+
+
+def load_radical_glyph_map(path: Path = RADICAL_GLYPH_MAP_PATH) -> dict:
+    """radicalGlyphMap.ts から スラッグ -> 部首字形 を読み取る"""
+    if not path.exists():
+        return {}
+    text = path.read_text(encoding="utf-8")
+    return dict(re.findall(r'"([a-z0-9-]+)":\s*"([^"]+)"', text))
+
+
+def load_radical_list(path: Path = RADICAL_LIST_PATH) -> list:
+    """radicalList.ts の radicalList から (jp, en, root, type) のリストを読み取る"""
+    if not path.exists():
+        return []
+    text = path.read_text(encoding="utf-8")
+    pattern = re.compile(
+        r'\{\s*jp:\s*"([^"]*)",\s*en:\s*"([^"]*)",(?:\s*root:\s*"([^"]*)",)?\s*type:\s*"([^"]*)"'
+    )
+    return [
+        {"jp": jp, "en": en, "root": root or None, "type": type_}
+        for jp, en, root, type_ in pattern.findall(text)
+    ]
+
+
+def unique_slug(radical: dict, counts: Counter) -> str:
+    """radicalList.ts の getUniqueSlug と同じスラッグ（en が重複する部首は "-{type}" 付き）"""
+    slug = radical["en"].replace("・", "-")
+    return f"{slug}-{radical['type']}" if counts[radical["en"]] > 1 else slug
+
+
+def radical_slugs(radicals: list) -> list:
+    """radicalList の並び順で (スラッグ, 部首) のリストを返す"""
+    counts = Counter(r["en"] for r in radicals)
+    return [(unique_slug(r, counts), r) for r in radicals]
+
+
+def curated_radical_path(slug: str, radical: dict, radicals_dir: Path = RADICALS_DIR):
+    """部首ページ (src/app/radical/page.tsx) と同じ順で data/radicals のファイルを探す"""
+    candidates = [slug]
+    if "・" in radical["en"]:
+        # 「・」を含む旧ファイル名（後方互換）
+        candidates += [radical["en"], f"{radical['en']}-{radical['type']}"]
+    for name in candidates:
+        path = radicals_dir / f"{name}.json"
+        if path.exists():
+            return path
+    return None
+
+
+def radical_glyph(slug: str, radical: dict, glyph_map: dict):
+    """KanjiVG と照合する部首字形（radicalGlyphMap にあればその字形、なければ親字）"""
+    return glyph_map.get(slug) or radical["root"]
+
+
+def build_index(joyo: list, workers: int = None) -> ComponentIndex:
+    kanji = [k["kanji"] for k in joyo]
+    svg_paths = [KANJIVG_DIR / f"{k['ucsHex']}.svg" for k in joyo]
+    available = [(k, p) for k, p in zip(kanji, svg_paths) if p.exists()]
+
+    index = ComponentIndex(kanji)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parsed = pool.map(parse_components, [p for _, p in available], chunksize=32)
+        for (k, _), components in zip(available, parsed):
+            index.add(k, components)
+    return index
+
+
+def diff_radicals(index: ComponentIndex, radicals: list, glyph_map: dict) -> dict:
+    """手作業の部首ファイル（radicalList の全部首）と KanjiVG 由来の部首リストを比較"""
+    report = {}
+    for slug, radical in radical_slugs(radicals):
+        path = curated_radical_path(slug, radical)
+        if path is None:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            curated = set(json.load(f))
+        glyph = radical_glyph(slug, radical, glyph_map)
+        generated = set(index.decode(index.bitset(glyph, radical_only=True))) if glyph else set()
+        report[slug] = {
+            "file": path.name,
+            "glyph": glyph,
+            "curated": len(curated),
+            "generated": len(generated),
+            "onlyInKanjiVG": sorted(generated - curated, key=index.position.get),
+            "onlyInCurated": sorted(curated - generated, key=lambda k: index.position.get(k, len(index.kanji))),
+        }
+    return report
+
+
+def write_radical_files(index: ComponentIndex, radicals: list, glyph_map: dict, output_dir: Path) -> int:
+    """部首ごとの漢字リストを data/radicals と同じ形式・同じスラッグのファイル名で出力
+
+    radicalList にない KanjiVG の部首は u{コードポイント}-radical.json に出力する。
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    covered = set()
+    for slug, radical in radical_slugs(radicals):
+        glyph = radical_glyph(slug, radical, glyph_map)
+        key = GLYPH_ALIASES.get(glyph, glyph)
+        if key not in index.radicals:
+            continue
+        covered.add(key)
+        with open(output_dir / f"{slug}.json", "w", encoding="utf-8") as f:
+            json.dump(index.decode(index.radicals[key]), f, ensure_ascii=False, indent=2)
+        written += 1
+
+    for radical, bits in index.radicals.items():
+        if radical in covered:
+            continue
+        with open(output_dir / f"u{ord(radical[0]):04x}-radical.json", "w", encoding="utf-8") as f:
+            json.dump(index.decode(bits), f, ensure_ascii=False, indent=2)
+        written += 1
+    return written
+
+
+def run_query(index: ComponentIndex, components: list):
+    bits = index.query(*components)
+    runs = 100_000
+    elapsed = timeit.timeit(lambda: index.query(*components), number=runs) / runs
+    result = index.decode(bits)
+    print(f"[*] Query: {' & '.join(components)} -> {len(result)} kanji ({elapsed * 1e6:.2f} µs/query)")
+    print(f"    {''.join(result)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a KanjiVG component index with bitset queries")
+    parser.add_argument("--query", nargs="+", help="components to intersect using an existing index")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.query and OUTPUT_PATH.exists():
+        with open(OUTPUT_PATH, "r", encoding="utf-8") as f:
+            run_query(ComponentIndex.from_json(json.load(f)), args.query)
+        return
+
+    with open(KANJI_JOYO_PATH, "r", encoding="utf-8") as f:
+        joyo = json.load(f)
+    print(f"[*] Parsing component trees for {len(joyo)} kanji...")
+    index = build_index(joyo, args.workers)
+    print(f"    Components: {len(index.components)}, radicals: {len(index.radicals)}")
+
+    print(f"[*] Saving: {OUTPUT_PATH}")
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(index.to_json(), f, ensure_ascii=False, indent=2)
+
+    glyph_map = load_radical_glyph_map()
+    radicals = load_radical_list()
+    written = write_radical_files(index, radicals, glyph_map, RADICALS_OUTPUT_DIR)
+    print(f"[*] Saving: {RADICALS_OUTPUT_DIR} ({written} files)")
+
+    report = diff_radicals(index, radicals, glyph_map)
+    curated_files = len(list(RADICALS_DIR.glob("*.json")))
+    print(f"    Compared: {len(report)} / {curated_files} files in data/radicals")
+    if len(report) < curated_files:
+        print(f"Warning: {curated_files - len(report)} radical files have no entry in {RADICAL_LIST_PATH.name}")
+    print(f"[*] Saving: {DIFF_OUTPUT_PATH}")
+    with open(DIFF_OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n[*] Differences from data/radicals:")
+    for slug, entry in report.items():
+        added, removed = len(entry["onlyInKanjiVG"]), len(entry["onlyInCurated"])
+        if added or removed:
+            print(f"    {slug} ({entry['glyph']}): +{added} / -{removed}")
+
+    if args.query:
+        print()
+        run_query(index, args.query)
+
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学年・画数・JLPT・部首ごとの一覧ページ用ファセットインデックスを作成するスクリプト
+
+入力: data/kanji-joyo.json, data/kanji-details/*.json, data/radicals/*.json, src/lib/radicalList.ts
+出力: data/kanji-facets.json
+
+漢字の ID は kanji-joyo.json の並び順（0始まり）。各ファセット値ごとに昇順の
+ID 配列と件数を持ち、「3年生 かつ 8画」のような組み合わせは整列済み配列の
+積集合（またはビットセットの AND）で求める。
+
+部首のファセット値は部首ページ（/radical/{slug}）と同じスラッグで、各部首ページが
+読み込む data/radicals/{slug}.json に含まれる漢字をその部首に入れる
+（スラッグとファイルの対応は build_component_index.py と共通）。
+
+使用方法:
+  python scripts/build_facet_index.py
+  python scripts/build_facet_index.py --benchmark
+"""
+
+import argparse
+import json
+import sys
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+
+from build_component_index import RADICALS_DIR, curated_radical_path, load_radical_list, radical_slugs
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+KANJI_DETAILS_DIR = DATA_DIR / "kanji-details"
+OUTPUT_PATH = DATA_DIR / "kanji-facets.json"
+
+FACETS = ("grade", "strokes", "jlpt", "radical")
+
+
+def load_kanji_records(joyo_path: Path = KANJI_JOYO_PATH, details_dir: Path = KANJI_DETAILS_DIR) -> list:
+    """kanji-joyo.json の順に、詳細データをマージしたレコードを返す"""
+    with open(joyo_path, "r", encoding="utf-8") as f:
+        joyo = json.load(f)
+    return [load_kanji_record(entry, details_dir) for entry in joyo]
+
+
+def load_kanji_record(entry: dict, details_dir: Path = KANJI_DETAILS_DIR) -> dict:
+    """kanji-joyo.json の1件に詳細データ（JLPT・頻度）と部首ページのスラッグをマージ"""
+    record = dict(entry)
+    detail_path = details_dir / f"{entry['kanji']}.json"
+    if detail_path.exists():
+        with open(detail_path, "r", encoding="utf-8") as f:
+            detail = json.load(f)
+        record["jlpt"] = detail.get("jlpt")
+        record["freq"] = detail.get("freq")
+    record["radicalSlugs"] = radical_slugs_by_kanji(RADICALS_DIR).get(entry["kanji"], [])
+    return record
+
+
+@lru_cache(maxsize=None)
+def radical_slugs_by_kanji(radicals_dir: Path = RADICALS_DIR) -> dict:
+    """漢字 -> その漢字を一覧に含む部首ページのスラッグ（radicalList の順）"""
+    slugs = {}
+    for slug, radical in radical_slugs(load_radical_list()):
+        path = curated_radical_path(slug, radical, radicals_dir)
+        if path is None:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for kanji in json.load(f):
+                entry = slugs.setdefault(kanji, [])
+                if slug not in entry:
+                    entry.append(slug)
+    return slugs
+
+
+def facet_values(record: dict, facet: str) -> list:
+    if facet == "radical":
+        return record.get("radicalSlugs") or []
+    value = record.get(facet)
+    return [] if value is None else [value]
+
+
+def build_facet_index(records: list) -> dict:
+    """1回の走査で全ファセットの ID 配列と件数を作る"""
+    postings = {facet: {} for facet in FACETS}
+    for kanji_id, record in enumerate(records):
+        for facet in FACETS:
+            for value in facet_values(record, facet):
+                postings[facet].setdefault(str(value), []).append(kanji_id)
+
+    def sort_key(value: str):
+        return (0, int(value), value) if value.isdigit() else (1, 0, value)
+
+    index = {"kanji": "".join(r["kanji"] for r in records), "facets": {}, "counts": {}}
+    for facet in FACETS:
+        ordered = dict(sorted(postings[facet].items(), key=lambda item: sort_key(item[0])))
+        index["facets"][facet] = ordered
+        index["counts"][facet] = {value: len(ids) for value, ids in ordered.items()}
+    return index
+
+
+def intersect_sorted(a: list, b: list) -> list:
+    """昇順 ID 配列の積集合（小さい方を基準に二分探索で進める）"""
+    if len(a) > len(b):
+        a, b = b, a
+    result = []
+    j = 0
+    n = len(b)
+    for value in a:
+        j = bisect_left(b, value, j)
+        if j == n:
+            break
+        if b[j] == value:
+            result.append(value)
+    return result
+
+
+class FacetIndex:
+    """kanji-facets.json を使った一覧ページ用の検索"""
+
+    def __init__(self, index: dict):
+        self.kanji = index["kanji"]
+        self.facets = index["facets"]
+        self.counts = index["counts"]
+        self._bitsets = {}
+
+    @classmethod
+    def load(cls, path: Path = OUTPUT_PATH) -> "FacetIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def ids(self, facet: str, value) -> list:
+        return self.facets[facet].get(str(value), [])
+
+    def bitset(self, facet: str, value) -> int:
+        key = (facet, str(value))
+        if key not in self._bitsets:
+            bits = 0
+            for kanji_id in self.ids(facet, value):
+                bits |= 1 << kanji_id
+            self._bitsets[key] = bits
+        return self._bitsets[key]
+
+    def query(self, **conditions) -> list:
+        """例: query(grade=3, strokes=8) -> 条件を全て満たす漢字 ID の昇順リスト"""
+        lists = sorted((self.ids(facet, value) for facet, value in conditions.items()), key=len)
+        if not lists:
+            return []
+        result = lists[0]
+        for ids in lists[1:]:
+            result = intersect_sorted(result, ids)
+        return result
+
+    def query_bits(self, **conditions) -> list:
+        """ビットセットの AND による query と同じ結果"""
+        bits = -1
+        for facet, value in conditions.items():
+            bits &= self.bitset(facet, value)
+        result = []
+        while bits > 0:
+            low = bits & -bits
+            result.append(low.bit_length() - 1)
+            bits ^= low
+        return result
+
+    def kanji_for(self, ids: list) -> list:
+        return [self.kanji[i] for i in ids]
+
+
+def static_build_pages(records: list) -> list:
+    """静的ビルドで生成される一覧ページ（ファセット, 値）の一覧"""
+    pages = []
+    for facet in ("grade", "strokes", "radical"):
+        values = sorted({str(v) for r in records for v in facet_values(r, facet)})
+        pages.extend((facet, value) for value in values)
+    return pages
+
+
+def run_benchmark(records: list, index: dict):
+    """各一覧ページで全件フィルタする場合とインデックスを引く場合のビルド時間を比較"""
+    pages = static_build_pages(records)
+    siblings = {}
+    for facet, value in pages:
+        siblings.setdefault(facet, []).append(value)
+
+    # 現状: 学年・画数ページは全件を filter し、ナビゲーション用の件数も filter で数える。
+    # 部首ページは data/radicals/{slug}.json を読み込む
+    radical_files = {slug: curated_radical_path(slug, radical) for slug, radical in radical_slugs(load_radical_list())}
+    start = time.perf_counter()
+    for facet, value in pages:
+        if facet == "radical":
+            with open(radical_files[value], "r", encoding="utf-8") as f:
+                selected = json.load(f)
+        else:
+            selected = [r for r in records if value in map(str, facet_values(r, facet))]
+            counts = {
+                other: sum(1 for r in records if other in map(str, facet_values(r, facet)))
+                for other in siblings[facet]
+            }
+    linear = time.perf_counter() - start
+
+    start = time.perf_counter()
+    facet_index = FacetIndex(index)
+    for facet, value in pages:
+        selected = facet_index.kanji_for(facet_index.ids(facet, value))
+        if facet != "radical":
+            counts = facet_index.counts[facet]
+    indexed = time.perf_counter() - start
+
+    combined = [(g, s) for g in facet_index.facets["grade"] for s in facet_index.facets["strokes"]]
+    start = time.perf_counter()
+    for grade, strokes in combined:
+        facet_index.query(grade=grade, strokes=strokes)
+    intersect = time.perf_counter() - start
+
+    print(f"    Pages: {len(pages)}")
+    print(f"    Linear filter: {linear * 1000:.1f} ms")
+    print(f"    Facet index:   {indexed * 1000:.1f} ms ({linear / max(indexed, 1e-9):.0f}x)")
+    print(f"    grade x strokes intersections: {len(combined)} in {intersect * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the grade/strokes/JLPT/radical facet index")
+    parser.add_argument("--benchmark", action="store_true", help="compare static-build filtering time")
+    args = parser.parse_args()
+
+    print(f"[*] Loading: {KANJI_JOYO_PATH}, {KANJI_DETAILS_DIR}")
+    records = load_kanji_records()
+    index = build_facet_index(records)
+    for facet in FACETS:
+        print(f"    {facet}: {len(index['facets'][facet])} values")
+
+    if args.benchmark:
+        print("\n[*] Benchmark")
+        run_benchmark(records, index)
+        return
+
+    print(f"\n[*] Saving: {OUTPUT_PATH}")
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+    facet_index = FacetIndex(index)
+    sample = facet_index.kanji_for(facet_index.query(grade=3, strokes=8))
+    print(f"    grade 3 ∩ 8 strokes: {''.join(sample)}")
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+検索ページ用の N-gram 転置インデックスを作成するスクリプト
+
+入力: data/kanji-dictionary.json, data/words-by-kanji.json
+出力: public/search-index.bin
+
+漢字・単語の表記、ひらがな読み（カタカナはひらがなに寄せる）、ヘボン式ローマ字、
+英語の意味から文字 N-gram（漢字・かなは1〜3文字、英字は2〜3文字）を作り、
+ポスティングリストを差分 + varint で圧縮して保存する。各ポスティングには
+フィールドの重みと長さから求めた関連度（0-255）を持たせる。完全一致は
+フィールド値全体を表す特別な N-gram で判定し、順位を引き上げる。
+
+ファイル形式:
+  magic "KSIDX001", uint32 ヘッダ長, ヘッダ JSON（文書一覧と N-gram -> [offset, 件数]）,
+  ポスティング本体（varint の差分 ID 列に続けて、件数分の uint8 重み）
+
+使用方法:
+  python scripts/build_search_index.py
+  python scripts/build_search_index.py --query にち
+  python scripts/build_search_index.py --benchmark
+"""
+
+import argparse
+import json
+import struct
+import sys
+import time
+import unicodedata
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from align_readings import katakana_to_hiragana
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+KANJI_DICTIONARY_PATH = DATA_DIR / "kanji-dictionary.json"
+WORDS_BY_KANJI_PATH = DATA_DIR / "words-by-kanji.json"
+OUTPUT_PATH = PROJECT_ROOT / "public" / "search-index.bin"
+
+MAGIC = b"KSIDX001"
+
+# フィールドごとの重み（SearchContent.tsx の Fuse.js の設定に合わせる）
+FIELD_WEIGHTS = {
+    "surface": 2.0,
+    "reading": 1.0,
+    "romaji": 1.0,
+    "meaning": 0.5,
+}
+
+MAX_GRAM = 3
+
+# フィールド値全体との完全一致を表す特別な N-gram の囲み文字
+EXACT_MARK = "\x02"
+
+# ヘボン式ローマ字変換表
+ROMAJI_DIGRAPHS = {
+    "きゃ": "kya", "きゅ": "kyu", "きょ": "kyo", "しゃ": "sha", "しゅ": "shu", "しょ": "sho",
+    "ちゃ": "cha", "ちゅ": "chu", "ちょ": "cho", "にゃ": "nya", "にゅ": "nyu", "にょ": "nyo",
+    "ひゃ": "hya", "ひゅ": "hyu", "ひょ": "hyo", "みゃ": "mya", "みゅ": "myu", "みょ": "myo",
+    "りゃ": "rya", "りゅ": "ryu", "りょ": "ryo", "ぎゃ": "gya", "ぎゅ": "gyu", "ぎょ": "gyo",
+    "じゃ": "ja", "じゅ": "ju", "じょ": "jo", "ぢゃ": "ja", "ぢゅ": "ju", "ぢょ": "jo",
+    "びゃ": "bya", "びゅ": "byu", "びょ": "byo", "ぴゃ": "pya", "ぴゅ": "pyu", "ぴょ": "pyo",
+}
+ROMAJI_MONOGRAPHS = dict(zip(
+    "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん"
+    "がぎぐげござじずぜぞだぢづでどばびぶべぼぱぴぷぺぽぁぃぅぇぉゃゅょ",
+    "a i u e o ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho "
+    "ma mi mu me mo ya yu yo ra ri ru re ro wa o n ga gi gu ge go za ji zu ze zo da ji zu de do "
+    "ba bi bu be bo pa pi pu pe po a i u e o ya yu yo".split(),
+))
+
+
+def normalize(text: str) -> str:
+    """全角英数の半角化・小文字化・カタカナのひらがな化"""
+    return katakana_to_hiragana(unicodedata.normalize("NFKC", text).lower())
+
+
+def to_romaji(kana: str) -> str:
+    """ひらがなをヘボン式ローマ字に変換（変換できない文字はそのまま）"""
+    kana = normalize(kana).replace(".", "").replace("-", "")
+    result = []
+    geminate = False
+    i = 0
+    while i < len(kana):
+        pair = kana[i:i + 2]
+        if pair in ROMAJI_DIGRAPHS:
+            syllable, i = ROMAJI_DIGRAPHS[pair], i + 2
+        elif kana[i] == "っ":
+            geminate, i = True, i + 1
+            continue
+        else:
+            syllable, i = ROMAJI_MONOGRAPHS.get(kana[i], kana[i]), i + 1
+        if geminate:
+            syllable = ("t" if syllable.startswith("ch") else syllable[0]) + syllable
+            geminate = False
+        result.append(syllable)
+    return "".join(result)
+
+
+def is_cjk_or_kana(char: str) -> bool:
+    return "぀" <= char <= "ヿ" or "一" <= char <= "鿿" or char == "々"
+
+
+def ngrams(text: str) -> set:
+    """索引・検索で共通に使う N-gram（漢字・かなは1文字も含める）"""
+    grams = set()
+    for n in range(1, MAX_GRAM + 1):
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if n == 1 and not is_cjk_or_kana(gram):
+                continue
+            if gram.strip():
+                grams.add(gram)
+    return grams
+
+
+def query_grams(text: str) -> set:
+    """クエリは最長の N-gram だけで照合する（短い N-gram はポスティングが長い）"""
+    n = min(MAX_GRAM, len(text))
+    if n == 1 and not is_cjk_or_kana(text):
+        n = 0
+    return {text[i:i + n] for i in range(len(text) - n + 1)} if n else set()
+
+
+def build_documents(dictionary: list, words_by_kanji: dict) -> list:
+    """検索対象の文書（漢字・単語）とフィールド値の一覧"""
+    documents = []
+    for entry in dictionary:
+        readings = entry.get("on", []) + entry.get("kun", [])
+        documents.append({
+            "type": "kanji",
+            "text": entry["kanji"],
+            "fields": {
+                "surface": [entry["kanji"]],
+                "reading": [normalize(r).replace(".", "").replace("-", "") for r in readings],
+                "romaji": [to_romaji(r) for r in readings],
+                "meaning": [normalize(m) for m in entry.get("meaning", [])],
+            },
+        })
+
+    seen = set()
+    for words in words_by_kanji.values():
+        for word in words:
+            key = (word["word"], normalize(word["reading"]))
+            if key in seen:
+                continue
+            seen.add(key)
+            documents.append({
+                "type": "word",
+                "text": word["word"],
+                "reading": key[1],
+                "fields": {
+                    "surface": [word["word"]],
+                    "reading": [key[1]],
+                    "romaji": [to_romaji(key[1])],
+                    "meaning": [normalize(word["meaning"])] if word.get("meaning") else [],
+                },
+            })
+    return documents
+
+
+def encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(buffer: bytes, offset: int, count: int) -> tuple:
+    values = []
+    value = shift = 0
+    while len(values) < count:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values, offset
+
+
+def build_index(documents: list) -> bytes:
+    """文書リストからバイナリの転置インデックスを作成"""
+    postings = {}
+    for doc_id, document in enumerate(documents):
+        weights = {}
+        for field, values in document["fields"].items():
+            for value in values:
+                # 短いフィールドでの一致ほど関連度が高い
+                weight = FIELD_WEIGHTS[field] / max(1, len(value)) ** 0.5
+                for gram in ngrams(value):
+                    weights[gram] = max(weights.get(gram, 0.0), weight)
+                exact = EXACT_MARK + value + EXACT_MARK
+                weights[exact] = max(weights.get(exact, 0.0), FIELD_WEIGHTS[field])
+        for gram, weight in weights.items():
+            postings.setdefault(gram, []).append((doc_id, weight))
+
+    max_weight = max(FIELD_WEIGHTS.values())
+    blob = bytearray()
+    table = {}
+    for gram in sorted(postings):
+        entries = postings[gram]
+        table[gram] = [len(blob), len(entries)]
+        previous = 0
+        for doc_id, _ in entries:
+            encode_varint(doc_id - previous, blob)
+            previous = doc_id
+        blob.extend(min(255, max(1, round(w / max_weight * 255))) for _, w in entries)
+
+    header = {
+        "documents": [
+            {k: v for k, v in doc.items() if k != "fields"} for doc in documents
+        ],
+        "grams": table,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes + bytes(blob)
+
+
+class SearchIndex:
+    """search-index.bin を読み込み、N-gram の積集合で検索する"""
+
+    def __init__(self, data: bytes):
+        if data[:8] != MAGIC:
+            raise ValueError("not a search index file")
+        (header_length,) = struct.unpack_from("<I", data, 8)
+        header = json.loads(data[12:12 + header_length].decode("utf-8"))
+        self.documents = header["documents"]
+        self.grams = header["grams"]
+        self.blob = data[12 + header_length:]
+        self._cache = {}
+
+    @classmethod
+    def load(cls, path: Path = OUTPUT_PATH) -> "SearchIndex":
+        return cls(Path(path).read_bytes())
+
+    def postings(self, gram: str) -> dict:
+        """N-gram のポスティングを {文書ID: 重み} で返す"""
+        if gram not in self._cache:
+            if gram not in self.grams:
+                return {}
+            offset, count = self.grams[gram]
+            deltas, weight_offset = decode_varints(self.blob, offset, count)
+            doc_id = 0
+            result = {}
+            for delta, weight in zip(deltas, self.blob[weight_offset:weight_offset + count]):
+                doc_id += delta
+                result[doc_id] = weight
+            self._cache[gram] = result
+        return self._cache[gram]
+
+    def search(self, query: str, limit: int = 50) -> list:
+        """全 N-gram を含む文書を関連度順に返す（なければ一致数の多い順）"""
+        query = normalize(query.strip())
+        grams = query_grams(query)
+        if not grams:
+            return []
+        exact = self.postings(EXACT_MARK + query + EXACT_MARK)
+        lists = sorted((self.postings(g) for g in grams), key=len)
+
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates.intersection_update(postings)
+            if not candidates:
+                break
+
+        if candidates:
+            scored = [(sum(p[d] for p in lists) + exact.get(d, 0) * len(lists), d) for d in candidates]
+        else:
+            # 部分一致のフォールバック（一致した N-gram 数 → 重みの順）
+            totals = {}
+            for postings in lists:
+                for d, weight in postings.items():
+                    hits, score = totals.get(d, (0, 0))
+                    totals[d] = (hits + 1, score + weight)
+            threshold = max(1, (len(lists) + 1) // 2)
+            scored = [(hits * 1000 + score, d) for d, (hits, score) in totals.items() if hits >= threshold]
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.documents[d] for _, d in scored[:limit]]
+
+
+def linear_fuzzy_search(documents: list, query: str, limit: int = 50) -> list:
+    """比較用: 毎回全文書を走査するあいまい検索（Fuse.js 相当の処理量）"""
+    query = normalize(query.strip())
+    scored = []
+    for document in documents:
+        best = 0.0
+        for field, values in document["fields"].items():
+            for value in values:
+                if query in value:
+                    score = 1.0
+                else:
+                    matcher = SequenceMatcher(None, query, value)
+                    score = matcher.ratio() if matcher.quick_ratio() >= 0.7 else 0.0
+                best = max(best, score * FIELD_WEIGHTS[field])
+        if best >= 0.7 * FIELD_WEIGHTS["meaning"]:
+            scored.append((best, document["text"]))
+    scored.sort(key=lambda item: -item[0])
+    return scored[:limit]
+
+
+def load_sources() -> tuple:
+    with open(KANJI_DICTIONARY_PATH, "r", encoding="utf-8") as f:
+        dictionary = json.load(f)
+    with open(WORDS_BY_KANJI_PATH, "r", encoding="utf-8") as f:
+        words_by_kanji = json.load(f)
+    return dictionary, words_by_kanji
+
+
+def run_benchmark(documents: list, index: SearchIndex):
+    queries = ["日", "にち", "nichi", "がっこう", "gakkou", "water", "mountain", "学生", "ひと", "tree"]
+
+    start = time.perf_counter()
+    for query in queries:
+        linear_fuzzy_search(documents, query)
+    linear = (time.perf_counter() - start) / len(queries)
+
+    index._cache.clear()
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    cold = (time.perf_counter() - start) / len(queries)
+
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    warm = (time.perf_counter() - start) / len(queries)
+
+    print(f"    Documents: {len(documents):,}, queries: {len(queries)}")
+    print(f"    Linear fuzzy scan: {linear * 1000:.2f} ms/query")
+    print(f"    N-gram index:      {cold * 1000:.3f} ms/query (cold), {warm * 1000:.3f} ms/query (warm)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the n-gram search index")
+    parser.add_argument("--query", help="search an existing index")
+    parser.add_argument("--benchmark", action="store_true", help="compare against a linear fuzzy scan")
+    args = parser.parse_args()
+
+    if args.query and OUTPUT_PATH.exists():
+        for document in SearchIndex.load().search(args.query, limit=20):
+            print(f"    [{document['type']}] {document['text']} {document.get('reading', '')}")
+        return
+
+    dictionary, words_by_kanji = load_sources()
+    documents = build_documents(dictionary, words_by_kanji)
+
+    start = time.perf_counter()
+    data = build_index(documents)
+    elapsed = time.perf_counter() - start
+    index = SearchIndex(data)
+    print(f"[*] Indexed {len(documents):,} documents, {len(index.grams):,} n-grams in {elapsed:.2f}s")
+
+    if args.benchmark:
+        print("\n[*] Benchmark")
+        run_benchmark(documents, index)
+        return
+
+    print(f"[*] Saving: {OUTPUT_PATH} ({len(data) / 1024:.0f} KB)")
+    OUTPUT_PATH.write_bytes(data)
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
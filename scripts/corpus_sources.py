@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+圧縮されたコーパスファイルをストリームとして読むモジュール
+
+.gz / .bz2 / .xz と、tar アーカイブ（圧縮の有無を問わない）の各メンバーを
+展開先のファイルを作らずに1行ずつ読む。tar は先頭から順に読むストリーム
+モード（r|*）で開くため、アーカイブ全体を展開したりメンバー一覧を先に
+作ったりしない。
+
+圧縮されていない平文のファイルは mmap して、改行（長い行では「。」）の直後で
+区切ったバイト範囲 (path, start, end) に分けられる。ワーカーは自分の範囲だけを
+デコードするので、親プロセスはファイルを読まず、テキストを pickle して送る必要もない。
+"""
+
+import bz2
+import gzip
+import lzma
+import mmap
+import tarfile
+from collections import namedtuple
+from pathlib import Path
+
+OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# 平文のファイルを分けるおおよその大きさと、区切りの改行を探す範囲
+# （範囲内に改行がなければ「。」の直後で区切る）
+CHUNK_BYTES = 4 * 1024 * 1024
+NEWLINE_SCAN_BYTES = 64 * 1024
+SENTENCE_END = "。".encode("utf-8")
+
+# start が None ならファイル全体（圧縮ファイル・tar はストリームで読む）
+CorpusChunk = namedtuple("CorpusChunk", "path start end")
+
+
+def is_tar(path: Path) -> bool:
+    return str(path).lower().endswith(TAR_SUFFIXES)
+
+
+def open_binary(path: Path):
+    """拡張子に応じて展開しながら読むバイナリストリーム"""
+    opener = OPENERS.get(Path(path).suffix.lower(), open)
+    return opener(path, "rb")
+
+
+def iter_lines(stream) -> iter:
+    """バイナリストリームから空行を除いた行を返す
+
+    tar のストリームモードのメンバーは seek できず TextIOWrapper で包めないため、
+    バイト列の行を読んでから UTF-8 として解釈する。
+    """
+    for raw in stream:
+        line = raw.decode("utf-8", errors="replace").strip()
+        if line:
+            yield line
+
+
+def iter_texts(path: Path) -> iter:
+    """コーパスファイル1つ分のテキスト（1行ずつ）"""
+    path = Path(path)
+    if is_tar(path):
+        with tarfile.open(path, "r|*") as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                stream = archive.extractfile(member)
+                # メンバー自体が圧縮されている場合（例: texts.tar 内の a.txt.gz）
+                opener = OPENERS.get(Path(member.name).suffix.lower())
+                if opener is not None:
+                    stream = opener(stream, "rb")
+                yield from iter_lines(stream)
+        return
+
+    with open_binary(path) as stream:
+        yield from iter_lines(stream)
+
+
+def is_mappable(path: Path) -> bool:
+    """mmap してバイト範囲に分けられる平文のファイルか"""
+    return not is_tar(path) and Path(path).suffix.lower() not in OPENERS
+
+
+def chunk_boundaries(path: Path, chunk_bytes: int = CHUNK_BYTES) -> list:
+    """平文のファイルを chunk_bytes ごとに、改行か「。」の直後で区切った範囲のリスト
+
+    UTF-8 の改行と「。」は他の文字のバイト列の途中に現れないので、区切りで文字が割れない。
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    if size == 0:
+        return []
+    chunks = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            target = start + chunk_bytes
+            if target >= size:
+                end = size
+            else:
+                end = boundary_after(mm, target, size)
+            chunks.append(CorpusChunk(path, start, end))
+            start = end
+    return chunks
+
+
+def boundary_after(mm: mmap.mmap, position: int, size: int) -> int:
+    """position 以降で最初の区切り（改行、なければ「。」、どちらもなければ次の改行かファイル末尾）の直後"""
+    newline = mm.find(b"\n", position, position + NEWLINE_SCAN_BYTES)
+    if newline != -1:
+        return newline + 1
+    period = mm.find(SENTENCE_END, position, position + NEWLINE_SCAN_BYTES)
+    if period != -1:
+        return period + len(SENTENCE_END)
+    newline = mm.find(b"\n", position)
+    return size if newline == -1 else newline + 1
+
+
+def iter_chunk_texts(chunk: CorpusChunk) -> iter:
+    """バイト範囲だけを mmap から取り出してデコードし、空行を除いた行を返す"""
+    with open(chunk.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[chunk.start:chunk.end].decode("utf-8", errors="replace")
+    for line in text.split("\n"):
+        line = line.strip()
+        if line:
+            yield line
+
+
+def corpus_chunks(paths: list, chunk_bytes: int = CHUNK_BYTES) -> list:
+    """コーパスファイルをワーカーに渡す単位に分ける（平文はバイト範囲、それ以外はファイル全体）"""
+    chunks = []
+    for path in paths:
+        if is_mappable(path):
+            chunks.extend(chunk_boundaries(path, chunk_bytes))
+        else:
+            chunks.append(CorpusChunk(Path(path), None, None))
+    return chunks
+
+
+def iter_corpus_chunk(chunk: CorpusChunk) -> iter:
+    """CorpusChunk 1つ分のテキスト（1行ずつ）"""
+    if chunk.start is None:
+        return iter_texts(chunk.path)
+    return iter_chunk_texts(chunk)
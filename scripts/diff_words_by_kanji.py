@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+words-by-kanji.json の新旧を構造的に比較するスクリプト
+
+入力: data/words-by-kanji.json（新）と、git のリビジョンまたはファイル（旧）
+出力: 追加・削除・変更・並び替えされた単語とカバー率の差分（JSON）
+
+出力ファイルを漢字ごとの区間に分けてバイト列のハッシュで比べ、ハッシュが
+変わった漢字だけを JSON としてパースして単語単位で比較する。--max-removed などの条件を
+超えた場合は終了コード 1 を返すので、CI のゲートとして使える。
+
+使用方法:
+  python scripts/diff_words_by_kanji.py                      # HEAD と作業ツリーを比較
+  python scripts/diff_words_by_kanji.py --base origin/main --json
+  python scripts/diff_words_by_kanji.py --old old.json --max-removed 0 --max-lost-kanji 0
+"""
+
+import argparse
+import hashlib
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+WORDS_BY_KANJI_PATH = DATA_DIR / "words-by-kanji.json"
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+
+# indent=2 で出力された最上位のキーの直前（改行 + 空白2つ + "）
+SECTION_SEPARATOR = b'\n  "'
+EMPTY_SECTION = b"[]"
+WORD_FIELD = b'"word":'
+
+
+def kanji_sections(raw: bytes) -> dict:
+    """整形済み JSON のバイト列を漢字ごとの単語リスト部分に分割（パースしない）"""
+    if raw.strip() and SECTION_SEPARATOR not in raw:
+        # generate_words_by_kanji.py と異なる書式なら同じ書式に整形し直す
+        raw = json.dumps(json.loads(raw), ensure_ascii=False, indent=2).encode("utf-8")
+    pieces = raw.rstrip().rstrip(b"}").split(SECTION_SEPARATOR)
+    sections = {}
+    for piece in pieces[1:]:
+        key, _, body = piece.partition(b'": ')
+        sections[key.decode("utf-8")] = body.rstrip().rstrip(b",")
+    return sections
+
+
+def section_digest(section: bytes) -> str:
+    return hashlib.blake2b(section, digest_size=16).hexdigest()
+
+
+def diff_entries(old: list, new: list) -> dict:
+    """1つの漢字の単語リストの差分"""
+    old_by_word = {e["word"]: e for e in old}
+    new_by_word = {e["word"]: e for e in new}
+    added = [e["word"] for e in new if e["word"] not in old_by_word]
+    removed = [e["word"] for e in old if e["word"] not in new_by_word]
+    modified = [
+        w for w in new_by_word
+        if w in old_by_word and old_by_word[w] != new_by_word[w]
+    ]
+    # 共通する単語の並び順が変わったか
+    old_order = [e["word"] for e in old if e["word"] in new_by_word]
+    new_order = [e["word"] for e in new if e["word"] in old_by_word]
+    return {
+        "added": added,
+        "removed": removed,
+        "modified": modified,
+        "reordered": old_order != new_order,
+    }
+
+
+def coverage(sections: dict, joyo: set) -> dict:
+    covered = {k for k, section in sections.items() if section != EMPTY_SECTION}
+    return {
+        "kanji": len(covered),
+        "joyo": len(covered & joyo),
+        "joyoRatio": round(len(covered & joyo) / len(joyo), 4) if joyo else 0.0,
+        "entries": sum(section.count(WORD_FIELD) for section in sections.values()),
+    }
+
+
+def diff_words_by_kanji(old_raw: bytes, new_raw: bytes, joyo: set = frozenset()) -> dict:
+    """ハッシュが変わった漢字だけをパースして比較した差分レポート"""
+    old, new = kanji_sections(old_raw), kanji_sections(new_raw)
+    old_digests = {k: section_digest(v) for k, v in old.items()}
+    new_digests = {k: section_digest(v) for k, v in new.items()}
+    changed = [
+        kanji for kanji in list(old) + [k for k in new if k not in old]
+        if old_digests.get(kanji) != new_digests.get(kanji)
+    ]
+
+    kanji_diffs = {}
+    for kanji in changed:
+        diff = diff_entries(
+            json.loads(old[kanji]) if kanji in old else [],
+            json.loads(new[kanji]) if kanji in new else [],
+        )
+        diff["digest"] = [old_digests.get(kanji), new_digests.get(kanji)]
+        kanji_diffs[kanji] = diff
+
+    old_covered = {k for k, section in old.items() if section != EMPTY_SECTION}
+    new_covered = {k for k, section in new.items() if section != EMPTY_SECTION}
+    return {
+        "summary": {
+            "changedKanji": len(changed),
+            "addedWords": sum(len(d["added"]) for d in kanji_diffs.values()),
+            "removedWords": sum(len(d["removed"]) for d in kanji_diffs.values()),
+            "modifiedWords": sum(len(d["modified"]) for d in kanji_diffs.values()),
+            "reorderedKanji": sum(1 for d in kanji_diffs.values() if d["reordered"]),
+        },
+        "coverage": {
+            "before": coverage(old, joyo),
+            "after": coverage(new, joyo),
+            "gainedKanji": [k for k in new if k in new_covered - old_covered],
+            "lostKanji": [k for k in old if k in old_covered - new_covered],
+        },
+        "kanji": kanji_diffs,
+    }
+
+
+def load_revision(revision: str, path: Path = WORDS_BY_KANJI_PATH) -> bytes:
+    """git のリビジョンにあるファイルを読み込む（存在しなければ空）"""
+    relative = path.resolve().relative_to(PROJECT_ROOT.resolve()).as_posix()
+    result = subprocess.run(
+        ["git", "show", f"{revision}:{relative}"],
+        cwd=PROJECT_ROOT, capture_output=True,
+    )
+    if result.returncode != 0:
+        return b""
+    return result.stdout
+
+
+def gate_failures(report: dict, max_removed: int = None, max_lost_kanji: int = None,
+                  max_changed_kanji: int = None) -> list:
+    """CI で失敗させる条件に該当したものの説明"""
+    failures = []
+    summary, lost = report["summary"], report["coverage"]["lostKanji"]
+    if max_removed is not None and summary["removedWords"] > max_removed:
+        failures.append(f"removed words {summary['removedWords']} > {max_removed}")
+    if max_lost_kanji is not None and len(lost) > max_lost_kanji:
+        failures.append(f"kanji without words {len(lost)} > {max_lost_kanji}: {''.join(lost)}")
+    if max_changed_kanji is not None and summary["changedKanji"] > max_changed_kanji:
+        failures.append(f"changed kanji {summary['changedKanji']} > {max_changed_kanji}")
+    return failures
+
+
+def print_report(report: dict, elapsed: float, limit: int = 20):
+    summary, cov = report["summary"], report["coverage"]
+    print(f"[*] Changed kanji: {summary['changedKanji']} ({elapsed * 1000:.1f} ms)")
+    print(f"    Words: +{summary['addedWords']} / -{summary['removedWords']} / ~{summary['modifiedWords']}, "
+          f"reordered kanji: {summary['reorderedKanji']}")
+    before, after = cov["before"], cov["after"]
+    print(f"    Coverage: {before['joyo']} -> {after['joyo']} joyo kanji, "
+          f"{before['entries']} -> {after['entries']} entries")
+    if cov["gainedKanji"]:
+        print(f"    Gained: {''.join(cov['gainedKanji'])}")
+    if cov["lostKanji"]:
+        print(f"    Lost: {''.join(cov['lostKanji'])}")
+    for kanji, diff in list(report["kanji"].items())[:limit]:
+        parts = [f"+{w}" for w in diff["added"]] + [f"-{w}" for w in diff["removed"]] + [f"~{w}" for w in diff["modified"]]
+        if diff["reordered"]:
+            parts.append("(reordered)")
+        print(f"    {kanji}: {' '.join(parts)}")
+    if len(report["kanji"]) > limit:
+        print(f"    ... and {len(report['kanji']) - limit} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structural diff of words-by-kanji.json")
+    parser.add_argument("new", nargs="?", type=Path, default=WORDS_BY_KANJI_PATH)
+    parser.add_argument("--old", type=Path, help="previous output file (instead of --base)")
+    parser.add_argument("--base", default="HEAD", help="git revision of the previous output (default: HEAD)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--output", type=Path, help="also write the JSON report to this file")
+    parser.add_argument("--max-removed", type=int, help="fail if more words are removed")
+    parser.add_argument("--max-lost-kanji", type=int, help="fail if more kanji lose all their words")
+    parser.add_argument("--max-changed-kanji", type=int, help="fail if more kanji change")
+    args = parser.parse_args()
+
+    old = args.old.read_bytes() if args.old else load_revision(args.base)
+    new = args.new.read_bytes()
+    with open(KANJI_JOYO_PATH, "r", encoding="utf-8") as f:
+        joyo = {k["kanji"] for k in json.load(f)}
+
+    start = time.perf_counter()
+    report = diff_words_by_kanji(old, new, joyo)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report, elapsed)
+
+    failures = gate_failures(report, args.max_removed, args.max_lost_kanji, args.max_changed_kanji)
+    for failure in failures:
+        print(f"Error: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コーパスから単語ごとの例文をリザーバーサンプリングで集めるモジュール
+
+generate_words_by_kanji.py の形態素解析と同じ1回のストリーミング処理の中で、
+単語ごとに最大 K 文を一様ランダムに保持する。1文の長さにも上限があるため、
+単語あたりのメモリは K × MAX_SENTENCE_LENGTH 文字で頭打ちになる。
+乱数はシード固定の1つの生成器を使うので、同じ入力なら結果も同じになる。
+
+出力: data/word-sentences.json（単語 -> 例文リスト）
+"""
+
+import random
+import re
+
+# 1単語あたりの例文数
+DEFAULT_SAMPLES_PER_WORD = 3
+
+# 例文として採用する文の長さ（文字数）
+MIN_SENTENCE_LENGTH = 6
+MAX_SENTENCE_LENGTH = 60
+
+# 文末記号（。！？）で区切る
+SENTENCE_RE = re.compile(r"[^。！？!?\n]+[。！？!?]?")
+
+# URL・英数字の多い文・括弧の対応が崩れた文は例文に向かない
+URL_RE = re.compile(r"https?://|www\.")
+ASCII_RE = re.compile(r"[A-Za-z0-9]")
+
+
+def split_sentences(text: str) -> list:
+    """テキストを文に分割（前後の空白は除く）"""
+    return [s.strip() for s in SENTENCE_RE.findall(text) if s.strip()]
+
+
+def is_good_sentence(sentence: str) -> bool:
+    """長さと品質の条件を満たす文か判定"""
+    if not MIN_SENTENCE_LENGTH <= len(sentence) <= MAX_SENTENCE_LENGTH:
+        return False
+    if URL_RE.search(sentence):
+        return False
+    if len(ASCII_RE.findall(sentence)) > len(sentence) // 4:
+        return False
+    if sentence.count("「") != sentence.count("」") or sentence.count("（") != sentence.count("）"):
+        return False
+    return True
+
+
+class SentenceReservoir:
+    """単語ごとに最大 k 文を保持するリザーバー（Algorithm R）"""
+
+    def __init__(self, k: int = DEFAULT_SAMPLES_PER_WORD, seed: int = 0):
+        self.k = k
+        self.rng = random.Random(seed)
+        self.samples = {}
+        self.seen = {}
+
+    def offer(self, word: str, sentence: str):
+        """word を含む文を1件候補として渡す"""
+        if not is_good_sentence(sentence):
+            return
+        samples = self.samples.setdefault(word, [])
+        if sentence in samples:
+            return
+        seen = self.seen.get(word, 0) + 1
+        self.seen[word] = seen
+        if len(samples) < self.k:
+            samples.append(sentence)
+        else:
+            slot = self.rng.randrange(seen)
+            if slot < self.k:
+                samples[slot] = sentence
+
+    def for_words(self, words: set) -> dict:
+        """出力対象の単語だけを単語順に返す"""
+        return {word: self.samples[word] for word in sorted(words) if self.samples.get(word)}
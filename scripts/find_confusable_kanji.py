@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字形の似ている漢字の組を自動抽出するスクリプト
+
+入力: data/kanji-joyo.json, public/kanjivg/*.svg
+出力: data/confused_kanji_candidates.json（confused_kanji_pairs.json と同じ形式）
+
+各字形をストロークの折れ線からぼかし付きのラスター画像（固定長ベクトル）にして
+L2 正規化し、ブロックごとの行列積で全組のコサイン類似度を計算する。
+漢字ごとに上位 k 件を取り出し、重複を除いた組を類似度順に出力する。
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/find_confusable_kanji.py --top-k 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from kanjivg_geometry import CANVAS_SIZE, KANJIVG_DIR, resample, stroke_polylines
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+CURATED_PAIRS_PATH = DATA_DIR / "confused_kanji_pairs.json"
+OUTPUT_PATH = DATA_DIR / "confused_kanji_candidates.json"
+
+# ラスター解像度・ストロークあたりの標本点数・ぼかし幅（ピクセル）
+GRID_SIZE = 32
+POINTS_PER_STROKE = 48
+BLUR_SIGMA = 1.0
+
+# 類似度行列を計算する行ブロックの大きさ
+BLOCK_SIZE = 512
+
+REASON = "形が似ている"
+
+
+def gaussian_kernel(sigma: float) -> np.ndarray:
+    radius = max(1, int(3 * sigma))
+    x = np.arange(-radius, radius + 1)
+    kernel = np.exp(-(x ** 2) / (2 * sigma ** 2))
+    return kernel / kernel.sum()
+
+
+def rasterize(polylines: list, grid: int = GRID_SIZE, sigma: float = BLUR_SIGMA) -> np.ndarray:
+    """ストローク群をぼかしたラスター画像にして L2 正規化したベクトルを返す"""
+    image = np.zeros((grid, grid))
+    if polylines:
+        points = np.concatenate([resample(p, POINTS_PER_STROKE) for p in polylines])
+        cells = np.clip((points / CANVAS_SIZE * grid).astype(int), 0, grid - 1)
+        np.add.at(image, (cells[:, 1], cells[:, 0]), 1.0)
+
+        # 分離可能なガウシアンで縦横にぼかす
+        kernel = gaussian_kernel(sigma)
+        image = np.apply_along_axis(np.convolve, 0, image, kernel, mode="same")
+        image = np.apply_along_axis(np.convolve, 1, image, kernel, mode="same")
+
+    vector = image.ravel()
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm > 0 else vector).astype(np.float32)
+
+
+def featurize(svg_path: Path) -> np.ndarray:
+    return rasterize(stroke_polylines(svg_path))
+
+
+def top_k_similar(features: np.ndarray, k: int, block: int = BLOCK_SIZE) -> tuple:
+    """ブロック行列積で各行の上位 k 件（自身を除く）の (添字, 類似度) を返す"""
+    n = len(features)
+    k = min(k, n - 1)
+    indices = np.zeros((n, k), dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    for lo in range(0, n, block):
+        hi = min(lo + block, n)
+        sim = features[lo:hi] @ features.T
+        sim[np.arange(hi - lo), np.arange(lo, hi)] = -np.inf
+
+        part = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(sim, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        indices[lo:hi] = np.take_along_axis(part, order, axis=1)
+        scores[lo:hi] = np.take_along_axis(part_scores, order, axis=1)
+
+    return indices, scores
+
+
+def build_pairs(kanji: list, indices: np.ndarray, scores: np.ndarray) -> list:
+    """上位 k 件から重複しない組を作り、類似度の高い順に並べる"""
+    best = {}
+    for a, (row, row_scores) in enumerate(zip(indices, scores)):
+        for b, score in zip(row, row_scores):
+            key = (min(a, int(b)), max(a, int(b)))
+            best[key] = max(best.get(key, -1.0), float(score))
+
+    pairs = []
+    for (a, b), score in sorted(best.items(), key=lambda item: -item[1]):
+        pairs.append({
+            "kanjiA": kanji[a],
+            "kanjiB": kanji[b],
+            "reason": REASON,
+            "note": f"字形の類似度 {score:.3f}（KanjiVG から自動抽出）",
+            "similarity": round(score, 4),
+        })
+    return pairs
+
+
+def curated_recall(pairs: list, curated_path: Path) -> tuple:
+    """手作業のリストのうち候補に含まれた組の数"""
+    if not curated_path.exists():
+        return 0, 0
+    with open(curated_path, "r", encoding="utf-8") as f:
+        curated = {frozenset((p["kanjiA"], p["kanjiB"])) for p in json.load(f)}
+    found = {frozenset((p["kanjiA"], p["kanjiB"])) for p in pairs}
+    return len(curated & found), len(curated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find visually confusable kanji pairs from KanjiVG")
+    parser.add_argument("--top-k", type=int, default=3, help="candidates per kanji")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    with open(KANJI_JOYO_PATH, "r", encoding="utf-8") as f:
+        joyo = [k for k in json.load(f) if (KANJIVG_DIR / f"{k['ucsHex']}.svg").exists()]
+    kanji = [k["kanji"] for k in joyo]
+    svg_paths = [KANJIVG_DIR / f"{k['ucsHex']}.svg" for k in joyo]
+    print(f"[*] Featurizing {len(kanji)} glyphs ({GRID_SIZE}x{GRID_SIZE})...")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count()) as pool:
+        features = np.stack(list(pool.map(featurize, svg_paths, chunksize=32)))
+    featurized = time.perf_counter()
+
+    indices, scores = top_k_similar(features, args.top_k)
+    pairs = build_pairs(kanji, indices, scores)
+    finished = time.perf_counter()
+
+    print(f"    Featurize: {featurized - start:.2f}s, similarity: {finished - featurized:.2f}s")
+    print(f"    Candidate pairs: {len(pairs)}")
+    hit, total = curated_recall(pairs, CURATED_PAIRS_PATH)
+    if total:
+        print(f"    Curated pairs found: {hit} / {total}")
+
+    print(f"\n[*] Saving: {args.output}")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(pairs, f, ensure_ascii=False, indent=2)
+
+    print("\n[*] Top candidates:")
+    for pair in pairs[:10]:
+        print(f"    {pair['kanjiA']} / {pair['kanjiB']}: {pair['similarity']:.3f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,29 +3,44 @@
 """
 常用漢字2136字に対応する単語リストを自動生成するスクリプト
 
-入力: data/kanji-joyo.json
-出力: data/words-by-kanji.json
+入力: data/kanji-joyo.json, data/kanji-details/*.json, data/kanji_exam.json, data/kanji_mistake.json
+出力: data/words-by-kanji.json, data/words-by-reading.json, data/kanji-facets.json,
+      data/related-kanji.json, data/word-sentences.json, data/word-difficulty.json,
+      data/learnable-words.json, public/search-index.bin,
+      public/sitemaps/*.xml.gz, public/sitemaps/sitemap-index.xml, data/url-manifest.ndjson
 
 必要なライブラリ:
-  pip install fugashi unidic-lite requests
+  pip install fugashi unidic-lite requests numpy   (scipy は任意)
 
 使用方法:
   python scripts/generate_words_by_kanji.py
+  python scripts/generate_words_by_kanji.py --watch   入力の変更を監視して差分だけ再生成
+  python scripts/generate_words_by_kanji.py --corpus corpus/*.txt.gz   コーパスからも単語を追加
 """
 
+import argparse
 import json
 import os
 import sys
+import tempfile
+import time
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 
-try:
-    import fugashi
-except ImportError:
-    print("Error: fugashi がインストールされていません")
-    print("以下のコマンドでインストールしてください:")
-    print("  pip install fugashi unidic-lite")
-    sys.exit(1)
+from align_readings import ReadingAligner, add_alignments, build_reading_table, load_kanji_readings
+from build_facet_index import build_facet_index, load_kanji_record, load_kanji_records
+from build_search_index import build_documents, build_index
+from corpus_sources import CHUNK_BYTES, corpus_chunks, iter_corpus_chunk
+from example_sentences import SentenceReservoir, split_sentences
+from kanji_cooccurrence import build_related_kanji, unique_words
+from normalize_text import fold_reading, normalize_text
+from sitemap_writer import SitemapUrl, SitemapWriter, content_hash
+from word_difficulty import LEARNABLE_WORDS_PATH, WORD_DIFFICULTY_PATH, build_word_difficulty
+from word_sources import (
+    SourceRegistry, WordRecord, exam_kanji_records, merge_records, mistake_example_records, tuple_records,
+)
 
 # プロジェクトルートを取得
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -33,7 +48,38 @@ DATA_DIR = PROJECT_ROOT / "data"
 
 # 入出力ファイル
 KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+KANJI_DETAILS_DIR = DATA_DIR / "kanji-details"
+KANJI_DICTIONARY_PATH = DATA_DIR / "kanji-dictionary.json"
 OUTPUT_PATH = DATA_DIR / "words-by-kanji.json"
+WORDS_BY_READING_PATH = DATA_DIR / "words-by-reading.json"
+FACETS_PATH = DATA_DIR / "kanji-facets.json"
+RELATED_KANJI_PATH = DATA_DIR / "related-kanji.json"
+WORD_SENTENCES_PATH = DATA_DIR / "word-sentences.json"
+KANJI_EXAM_PATH = DATA_DIR / "kanji_exam.json"
+KANJI_MISTAKE_PATH = DATA_DIR / "kanji_mistake.json"
+# LemmaTagger が parse() に使う MeCab の出力形式（素性の番号は辞書ごとに埋める）
+LEMMA_RC_PATH = Path(__file__).parent / "mecab-lemma.rc"
+LEMMA_FEATURES = ("pos1", "orthBase", "kana", "kanaBase")
+
+# LemmaMemo・CachingTagger・LemmaTagger が保持する解析結果（fugashi のノードは次の解析で上書きされるためコピーする）
+LemmaEntry = namedtuple("LemmaEntry", "lemma kana pos")
+TaggedWord = namedtuple("TaggedWord", "surface entry")
+SEARCH_INDEX_PATH = PROJECT_ROOT / "public" / "search-index.bin"
+KANJIVG_DIR = PROJECT_ROOT / "public" / "kanjivg"
+
+# UniDic辞書から単語を抽出するサンプルテキスト
+SAMPLE_TEXTS = [
+    "日本語を勉強しています。毎日学校に行きます。",
+    "今日は天気がいいです。明日は雨かもしれません。",
+    "電車で東京駅まで行きました。",
+    "友達と一緒に映画を見ました。とても面白かったです。",
+    "来週の試験のために図書館で勉強します。",
+    "新しい本を買いました。とても興味深い内容です。",
+    "週末は家族と公園で遊びました。",
+    "会社の会議は午後三時から始まります。",
+    "日本の文化について研究しています。",
+    "健康のために毎朝運動をしています。",
+]
 
 # 日本語の一般的な単語リスト（サンプルデータ）
 # 実際の運用では外部辞書やコーパスから取得することを推奨
@@ -1390,12 +1436,14 @@ def extract_words_for_kanji(kanji_list: list, word_list: list) -> dict:
     # 漢字セットを作成
     kanji_set = {k["kanji"] for k in kanji_list}
     
+    seen = set()
+    
     for word, reading, meaning in word_list:
         for char in word:
             if char in kanji_set:
                 # 重複チェック
-                existing = [w for w in words_by_kanji[char] if w["word"] == word]
-                if not existing:
+                if (char, word) not in seen:
+                    seen.add((char, word))
                     words_by_kanji[char].append({
                         "word": word,
                         "reading": reading,
@@ -1405,52 +1453,572 @@ def extract_words_for_kanji(kanji_list: list, word_list: list) -> dict:
     return dict(words_by_kanji)
 
 
-def add_words_from_fugashi(words_by_kanji: dict, kanji_set: set):
-    """fugashiで形態素解析して追加の単語を生成"""
+def create_tagger(options: str = ""):
+    """fugashi の Tagger を作成（fugashi は使う時に import する。options は MeCab の引数）"""
     try:
-        tagger = fugashi.Tagger()
+        import fugashi
+    except ImportError:
+        print("Error: fugashi がインストールされていません")
+        print("以下のコマンドでインストールしてください:")
+        print("  pip install fugashi unidic-lite")
+        sys.exit(1)
+    return fugashi.Tagger(options)
+
+
+def tag_texts(texts, tagger):
+    """テキストを正規化して文に分け、(文, 形態素のリスト) を順に返す"""
+    for text in texts:
+        # 全角・半角や旧字体の違いで kanji_set に一致しない文字をそろえる
+        text = normalize_text(text)
+        for sentence in split_sentences(text):
+            yield sentence, tagger(sentence)
+
+
+class LemmaMemo:
+    """(表層形, 素性の文字列) -> (辞書形, 辞書形の読み, 品詞) の表
+
+    コーパスの形態素はほとんどが既出の語なので、素性の取り出しと読みの変換は
+    初めて見た組み合わせだけで行う。UniDic の品詞 ID は全て同じ値なので、
+    語の区別には辞書の見出しごとに異なる素性の文字列を使う（「行っ」は文脈により
+    行く・行う の別の素性になる）。
+    """
+
+    def __init__(self):
+        self.table = {}
+
+    @property
+    def decodes(self) -> int:
+        return len(self.table)
+
+    def __call__(self, word) -> LemmaEntry:
+        if type(word) is TaggedWord:
+            return word.entry
+        key = (word.surface, word.feature_raw)
+        entry = self.table.get(key)
+        if entry is None:
+            entry = self.table[key] = lemma_entry(word.surface, word.feature)
+        return entry
+
+
+def lemma_entry(surface: str, feature) -> LemmaEntry:
+    """形態素の素性から (辞書形, 辞書形の読み, 品詞)（活用形を見出し語にまとめる）"""
+    return make_lemma_entry(surface, getattr(feature, "orthBase", None), getattr(feature, "kanaBase", None),
+                            getattr(feature, "kana", None), getattr(feature, "pos1", None))
+
+
+def make_lemma_entry(surface: str, lemma: str, kana_base: str, kana: str, pos: str) -> LemmaEntry:
+    """素性の各項目から LemmaEntry を作る（辞書形・読みが無いか * なら表層形・出現形の読みで補う）"""
+    if not lemma or lemma == "*":
+        lemma = surface
+    if not kana_base or kana_base == "*":
+        kana_base = kana
+    return LemmaEntry(lemma, fold_reading(kana_base or ""), pos)
+
+
+def create_lemma_tagger(rc_path: Path = LEMMA_RC_PATH):
+    """mecab-lemma.rc の出力形式の Tagger を作る
+
+    素性の番号は読み込んだ辞書の素性の並びから決める（unidic-lite と unidic で
+    kana・kanaBase の位置が異なる）。必要な素性が無い辞書では None を返す。
+    """
+    tagger = create_tagger()
+    fields = getattr(type(tagger("日")[0].feature), "_fields", ())
+    if not all(name in fields for name in LEMMA_FEATURES):
+        return None
+    rc = rc_path.read_text(encoding="utf-8").format(**{name: fields.index(name) for name in LEMMA_FEATURES})
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".rc", delete=False) as f:
+        f.write(rc)
+    try:
+        # MeCab は Tagger を作る時に rc を読むので、作った後は消してよい
+        return create_tagger(f'-r "{f.name}" -Olemma')
+    finally:
+        os.unlink(f.name)
+
+
+class LemmaTagger:
+    """形態素ごとに必要な素性だけを文字列で受け取る Tagger（fugashi のノードを作らない）
+
+    tagger(text) は形態素ごとに Python のノードを作り、素性も全項目に展開するので、
+    短い文を大量に解析するとその生成の方が解析そのものより重くなる。ここでは
+    mecab-lemma.rc の出力形式で parse() し、1行に1形態素の (品詞, 辞書形, 読み,
+    辞書形の読み, 表層形) を受け取る。行ごとに1つ作った TaggedWord を使い回す。
+    行には辞書形が含まれるので、同じ表層形でも 行く・行う は別の語になる。
+    文は1つずつ解析する（複数の文をつないで渡すと文の境目で分割が変わる）。
+
+    辞書に辞書形・読みの素性が無い場合は通常の Tagger のノードをそのまま返し、
+    tagged_records が LemmaMemo で素性の名前から取り出す。
+    """
+
+    def __init__(self, tagger=None):
+        self.tagger = tagger or create_lemma_tagger()
+        self.nodes = None
+        if self.tagger is None:
+            print("Warning: 辞書に orthBase/kana/kanaBase の素性が無いため、ノードから素性を読み取ります")
+            self.nodes = create_tagger()
+        self.words = {}
+
+    @property
+    def decodes(self) -> int:
+        return len(self.words)
+
+    def __call__(self, text: str) -> list:
+        if self.nodes is not None:
+            return self.nodes(text)
+        lines = self.tagger.parse(text).splitlines()
+        words = self.words
+        try:
+            return [words[line] for line in lines]
+        except KeyError:
+            pass
+        tagged = []
+        for line in lines:
+            word = words.get(line)
+            if word is None:
+                pos, lemma, kana, kana_base, surface = line.split("\t")
+                word = words[line] = TaggedWord(surface, make_lemma_entry(surface, lemma, kana_base, kana, pos))
+            tagged.append(word)
+        return tagged
+
+
+def tagged_records(tagged, kanji_set: set, source: str, sentences: SentenceReservoir = None,
+                   memo: LemmaMemo = None):
+    """(文, 形態素のリスト) の列を辞書形の単語レコードにする（sentences があれば例文も集める）
+
+    レコードは (辞書形, 読み) ごとに最初の出現の1件だけを返す（SourceRegistry.load が
+    list() で保持するので、出現ごとに返すとコーパスの大きさに比例してメモリを使う）。
+    例文は2回目以降の出現の文も sentences に渡す。
+    """
+    memo = memo if memo is not None else LemmaMemo()
+    # 辞書形と読みの組ごとのレコード（漢字を含まない語は None）
+    records = {}
+    emitted = set()
+    for sentence, words in tagged:
+        for word in words:
+            # LemmaTagger・CachingTagger の結果は辞書形を持っているのでメモを引かない
+            entry = word.entry if type(word) is TaggedWord else memo(word)
+            record = records.get(entry, False)
+            first = False
+            if record is False:
+                lemma = entry.lemma
+                keep = len(lemma) >= 2 and any(c in kanji_set for c in lemma)
+                record = records[entry] = WordRecord(lemma, entry.kana, "", source, 1.0) if keep else None
+                # 品詞だけが異なる語も同じ (辞書形, 読み) なら1件にまとめる
+                if record is not None and record.reading and (lemma, record.reading) not in emitted:
+                    emitted.add((lemma, record.reading))
+                    first = True
+            if record is None:
+                continue
+            if sentences is not None:
+                sentences.offer(record.word, sentence)
+            if first:
+                yield record
+
+
+def add_tagged_words(words_by_kanji: dict, kanji_set: set, tagged, sentences: SentenceReservoir = None,
+                     memo: LemmaMemo = None):
+    """(文, 形態素のリスト) の列から単語（辞書形）と例文を追加"""
+    seen = {(char, w["word"]) for char, entries in words_by_kanji.items() for w in entries}
+    added = set()
+    
+    for record in tagged_records(tagged, kanji_set, "fugashi", sentences, memo):
+        if record.word not in added:
+            added.add(record.word)
+            add_record(words_by_kanji, kanji_set, record, seen)
+
+
+def add_words_from_fugashi(words_by_kanji: dict, kanji_set: set, sentences: SentenceReservoir = None,
+                           texts: list = SAMPLE_TEXTS, tagger=None, memo: LemmaMemo = None):
+    """fugashiで形態素解析して追加の単語を生成（sentences があれば単語ごとの例文も集める）"""
+    try:
+        tagger = tagger or LemmaTagger()
+        add_tagged_words(words_by_kanji, kanji_set, tag_texts(texts, tagger), sentences, memo)
+    except Exception as e:
+        print(f"Warning: fugashi processing failed: {e}")
+
+
+def init_corpus_worker(kanji_set: set, tagger_factory=LemmaTagger):
+    """ワーカープロセスごとに Tagger と素性のメモを1つ作る"""
+    global _worker_tagger, _worker_kanji_set, _worker_memo
+    _worker_tagger = tagger_factory()
+    _worker_kanji_set = kanji_set
+    _worker_memo = LemmaMemo()
+
+
+def tag_worker_texts(texts) -> list:
+    """ワーカープロセス内でテキストを解析し、辞書形が漢字を含む形態素だけを返す"""
+    tagged = []
+    for sentence, words in tag_texts(texts, _worker_tagger):
+        kept = []
+        for w in words:
+            entry = _worker_memo(w)
+            if len(entry.lemma) >= 2 and any(c in _worker_kanji_set for c in entry.lemma):
+                kept.append(TaggedWord(w.surface, entry))
+        if kept:
+            tagged.append((sentence, kept))
+    return tagged
+
+
+def tag_corpus_chunk(chunk) -> list:
+    """ワーカープロセス内でコーパスの1範囲（平文のバイト範囲か圧縮ファイル全体）を読んで解析する"""
+    return tag_worker_texts(iter_corpus_chunk(chunk))
+
+
+def add_words_from_corpus(words_by_kanji: dict, kanji_set: set, paths: list,
+                          sentences: SentenceReservoir = None, workers: int = None,
+                          tagger_factory=LemmaTagger, chunk_bytes: int = CHUNK_BYTES):
+    """コーパスファイル（.gz/.bz2/.xz/tar 可）をワーカーに分けて渡して単語を追加
+
+    平文のファイルは mmap したバイト範囲に分け、ワーカーは (path, start, end) だけを
+    受け取って自分の範囲を読む。圧縮ファイルはファイル単位で渡し、展開もワーカー側で
+    行う。結果はファイル・範囲の順に取り込むので、ワーカー数によらず出力は同じになる。
+    """
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=init_corpus_worker, initargs=(kanji_set, tagger_factory)) as pool:
+        tagged = chain.from_iterable(pool.map(tag_corpus_chunk, corpus_chunks(paths, chunk_bytes)))
+        add_tagged_words(words_by_kanji, kanji_set, tagged, sentences)
+
+
+def corpus_records(paths: list, kanji_set: set, sentences: SentenceReservoir = None, workers: int = None,
+                   tagger_factory=LemmaTagger, chunk_bytes: int = CHUNK_BYTES):
+    """コーパスファイルをワーカーで解析した結果を単語レコードとして返す（順序はファイル・範囲の順）"""
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=init_corpus_worker, initargs=(kanji_set, tagger_factory)) as pool:
+        tagged = chain.from_iterable(pool.map(tag_corpus_chunk, corpus_chunks(paths, chunk_bytes)))
+        yield from tagged_records(tagged, kanji_set, "corpus", sentences)
+
+
+def add_record(words_by_kanji: dict, kanji_set: set, record: WordRecord, seen: set):
+    """単語レコード1件を、含まれる漢字ごとの単語リストに追加（seen は登録済みの (漢字, 単語)）"""
+    for char in record.word:
+        if char in kanji_set and (char, record.word) not in seen:
+            seen.add((char, record.word))
+            words_by_kanji.setdefault(char, []).append({
+                "word": record.word,
+                "reading": record.reading,
+                "meaning": record.meaning
+            })
+
+
+def add_provenance(words_by_kanji: dict, provenance: dict):
+    """各単語に取得元のソース名を付ける"""
+    for words in words_by_kanji.values():
+        for entry in words:
+            entry["sources"] = provenance[entry["word"]]
+
+
+def sort_words_by_length(words_by_kanji: dict):
+    """各漢字の単語を頻度順（単語の長さ順）にソート"""
+    for kanji in words_by_kanji:
+        words_by_kanji[kanji].sort(key=lambda w: len(w["word"]))
+
+
+class CachingTagger:
+    """文ごとの解析結果（表層形と辞書形）を保持する Tagger（--watch で再解析を省く）"""
+
+    def __init__(self, tagger):
+        self.tagger = tagger
+        self.cache = {}
+        self.memo = LemmaMemo()
+
+    def __call__(self, text: str) -> list:
+        words = self.cache.get(text)
+        if words is None:
+            words = [TaggedWord(w.surface, self.memo(w)) for w in self.tagger(text)]
+            self.cache[text] = words
+        return words
+
+
+class GeneratorState:
+    """読み込んだ入力と生成結果を保持し、変更された入力に応じて出力を更新する"""
+
+    def __init__(self, tagger, corpus: list = (), workers: int = None):
+        self.tagger = tagger
+        self.corpus = list(corpus)
+        self.workers = workers
+
+    def build(self):
+        """全ての入力を読み込み、全ての出力を生成する"""
+        # 常用漢字リストを読み込み
+        print(f"\n[*] Loading: {KANJI_JOYO_PATH}")
+        self.kanji_list = load_joyo_kanji(KANJI_JOYO_PATH)
+        print(f"    Loaded {len(self.kanji_list)} kanji")
         
-        # UniDic辞書から単語を抽出するサンプルテキスト
-        sample_texts = [
-            "日本語を勉強しています。毎日学校に行きます。",
-            "今日は天気がいいです。明日は雨かもしれません。",
-            "電車で東京駅まで行きました。",
-            "友達と一緒に映画を見ました。とても面白かったです。",
-            "来週の試験のために図書館で勉強します。",
-            "新しい本を買いました。とても興味深い内容です。",
-            "週末は家族と公園で遊びました。",
-            "会社の会議は午後三時から始まります。",
-            "日本の文化について研究しています。",
-            "健康のために毎朝運動をしています。",
+        kanji_set = {k["kanji"] for k in self.kanji_list}
+        
+        # 全てのソースから単語を集めて1語1件にまとめる
+        print("\n[*] Loading word sources...")
+        self.sentences = SentenceReservoir(seed=0)
+        self.loaded, timings = self.word_sources(kanji_set).load()
+        for source, records in self.loaded:
+            print(f"    {source.name:<8} priority {source.priority:>3}: {len(records):>7} records"
+                  f" in {timings[source.name] * 1000:.0f} ms")
+        self.readings = load_kanji_readings(KANJI_DETAILS_DIR)
+        self.merge_words()
+        
+        self.records = load_kanji_records(KANJI_JOYO_PATH, KANJI_DETAILS_DIR)
+        with open(KANJI_DICTIONARY_PATH, "r", encoding="utf-8") as f:
+            self.dictionary = json.load(f)
+        
+        # 統計情報
+        total_words = sum(len(words) for words in self.words_by_kanji.values())
+        kanji_with_words = len(self.words_by_kanji)
+        
+        print(f"\n[*] Statistics:")
+        print(f"    Kanji with words: {kanji_with_words} / {len(self.kanji_list)}")
+        print(f"    Total word entries: {total_words}")
+        print(f"    Average words per kanji: {total_words / kanji_with_words:.1f}")
+        
+        # 出力
+        print()
+        self.save_words()
+        self.save_sentences()
+        self.save_related_kanji()
+        self.save_facets()
+        self.save_difficulty()
+        self.save_search_index()
+        self.save_sitemap()
+
+    def word_sources(self, kanji_set: set) -> SourceRegistry:
+        """単語ソースの一覧（優先度が高いほど読み・意味が優先される）"""
+        registry = SourceRegistry()
+        registry.register("sample", 100, lambda: tuple_records(SAMPLE_WORDS, "sample"), io_bound=True)
+        # 形態素解析は例文の抽選順を固定するため、登録順にメインスレッドで行う
+        registry.register("fugashi", 50, lambda: tagged_records(
+            tag_texts(SAMPLE_TEXTS, self.tagger), kanji_set, "fugashi", self.sentences))
+        if self.corpus:
+            registry.register("corpus", 50, lambda: corpus_records(
+                self.corpus, kanji_set, self.sentences, self.workers))
+        registry.register("mistake", 30, lambda: mistake_example_records(KANJI_MISTAKE_PATH), io_bound=True)
+        registry.register("exam", 20, lambda: exam_kanji_records(KANJI_EXAM_PATH, KANJI_DETAILS_DIR),
+                          io_bound=True)
+        return registry
+
+    def merge_words(self):
+        """読み込んだソースのレコードを1語1件にまとめ、漢字ごとの単語一覧と音訓の対応付けを作る"""
+        merged = merge_records(self.loaded)
+        self.words_by_kanji = extract_words_for_kanji(
+            self.kanji_list, [(w["word"], w["reading"], w["meaning"]) for w in merged]
+        )
+        add_provenance(self.words_by_kanji, {w["word"]: w["sources"] for w in merged})
+        
+        # 各漢字の単語を頻度順（単語の長さ順）にソート
+        sort_words_by_length(self.words_by_kanji)
+        
+        # 単語の読みを漢字ごとの音訓に対応付け
+        print("[*] Aligning readings to on/kun...")
+        self.words_by_reading = add_alignments(self.words_by_kanji, ReadingAligner(self.readings))
+
+    def reload_sources(self, names: set) -> bool:
+        """指定したソースだけを読み直し、どれかのレコードが変わっていれば True"""
+        changed = False
+        for i, (source, records) in enumerate(self.loaded):
+            if source.name in names:
+                reloaded = list(source.loader())
+                if reloaded != records:
+                    print(f"    {source.name:<8} {len(records):>7} -> {len(reloaded)} records")
+                    self.loaded[i] = (source, reloaded)
+                    changed = True
+        return changed
+
+    def update_details(self, changed: set):
+        """詳細ファイルが変わった漢字について、読みの表・アライメント・ファセットを更新"""
+        for kanji in changed:
+            detail_path = KANJI_DETAILS_DIR / f"{kanji}.json"
+            if detail_path.exists():
+                with open(detail_path, "r", encoding="utf-8") as f:
+                    detail = json.load(f)
+                self.readings[kanji] = build_reading_table(detail.get("on", []), detail.get("kun", []))
+            else:
+                self.readings.pop(kanji, None)
+        
+        # 変わった漢字を含む単語が載っている一覧だけを対応付け直す
+        affected = {
+            kanji: words for kanji, words in self.words_by_kanji.items()
+            if any(char in changed for w in words for char in w["word"])
+        }
+        realigned = add_alignments(affected, ReadingAligner(self.readings))
+        merged = {k: v for k, v in self.words_by_reading.items() if k not in affected}
+        merged.update(realigned)
+        self.words_by_reading = {k: merged[k] for k in self.words_by_kanji if k in merged}
+        
+        self.records = [
+            load_kanji_record(entry, KANJI_DETAILS_DIR) if entry["kanji"] in changed else record
+            for entry, record in zip(self.kanji_list, self.records)
         ]
+        print(f"    Realigned words for {len(affected)} kanji")
+
+    def apply_changes(self, changed: set):
+        """変更された入力ファイルに応じて必要な出力だけを更新"""
+        if KANJI_JOYO_PATH in changed:
+            self.build()
+            return
         
-        for text in sample_texts:
-            for word in tagger(text):
-                # 漢字を含む単語のみ
-                surface = word.surface
-                for char in surface:
-                    if char in kanji_set and len(surface) >= 2:
-                        # 読みを取得
-                        reading = word.feature.kana if hasattr(word.feature, 'kana') and word.feature.kana else ""
-                        
-                        if reading:
-                            existing = [w for w in words_by_kanji.get(char, []) if w["word"] == surface]
-                            if not existing:
-                                if char not in words_by_kanji:
-                                    words_by_kanji[char] = []
-                                words_by_kanji[char].append({
-                                    "word": surface,
-                                    "reading": reading,
-                                    "meaning": ""
-                                })
-    except Exception as e:
-        print(f"Warning: fugashi processing failed: {e}")
+        details = {path.stem for path in changed if path.parent == KANJI_DETAILS_DIR}
+        sources = {name for name, path in (("exam", KANJI_EXAM_PATH), ("mistake", KANJI_MISTAKE_PATH))
+                   if path in changed}
+        if details:
+            print(f"[*] Kanji details changed: {''.join(sorted(details))}")
+            self.update_details(details)
+            # 試験漢字の読みは kanji-details から取る
+            sources.add("exam")
+        
+        words_changed = False
+        if sources:
+            print(f"[*] Reloading word sources: {', '.join(sorted(sources))}")
+            words_changed = self.reload_sources(sources)
+            if words_changed:
+                self.merge_words()
+        
+        if details or words_changed:
+            self.save_words()
+            if words_changed:
+                self.save_sentences()
+                self.save_related_kanji()
+            if details:
+                self.save_facets()
+            self.save_difficulty()
+            self.save_sitemap()
+        
+        if KANJI_DICTIONARY_PATH in changed:
+            print(f"[*] Loading: {KANJI_DICTIONARY_PATH}")
+            with open(KANJI_DICTIONARY_PATH, "r", encoding="utf-8") as f:
+                self.dictionary = json.load(f)
+        if words_changed or KANJI_DICTIONARY_PATH in changed:
+            self.save_search_index()
+
+    def save_words(self):
+        print(f"[*] Saving: {OUTPUT_PATH}")
+        with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+            json.dump(self.words_by_kanji, f, ensure_ascii=False, indent=2)
+        
+        print(f"[*] Saving: {WORDS_BY_READING_PATH}")
+        with open(WORDS_BY_READING_PATH, "w", encoding="utf-8") as f:
+            json.dump(self.words_by_reading, f, ensure_ascii=False, indent=2)
+
+    def save_sentences(self):
+        # 単語ごとの例文（本体を小さく保つため別ファイル）
+        print(f"[*] Saving: {WORD_SENTENCES_PATH}")
+        word_sentences = self.sentences.for_words(set(unique_words(self.words_by_kanji)))
+        with open(WORD_SENTENCES_PATH, "w", encoding="utf-8") as f:
+            json.dump(word_sentences, f, ensure_ascii=False, indent=2)
+
+    def save_related_kanji(self):
+        # 単語を介した関連漢字
+        print(f"[*] Saving: {RELATED_KANJI_PATH}")
+        kanji_order = [k["kanji"] for k in self.kanji_list]
+        self.related_kanji = build_related_kanji(unique_words(self.words_by_kanji), kanji_order)
+        with open(RELATED_KANJI_PATH, "w", encoding="utf-8") as f:
+            json.dump(self.related_kanji, f, ensure_ascii=False, indent=2)
+
+    def save_facets(self):
+        # 学年・画数・JLPT・部首の一覧ページ用インデックス
+        print(f"[*] Saving: {FACETS_PATH}")
+        facets = build_facet_index(self.records)
+        with open(FACETS_PATH, "w", encoding="utf-8") as f:
+            json.dump(facets, f, ensure_ascii=False, separators=(",", ":"))
+
+    def save_difficulty(self):
+        # 単語の難易度と、学年ごとに学べる単語
+        difficulty, learnable = build_word_difficulty(self.words_by_kanji, self.records)
+        print(f"[*] Saving: {WORD_DIFFICULTY_PATH}")
+        with open(WORD_DIFFICULTY_PATH, "w", encoding="utf-8") as f:
+            json.dump(difficulty, f, ensure_ascii=False, indent=2)
+        print(f"[*] Saving: {LEARNABLE_WORDS_PATH}")
+        with open(LEARNABLE_WORDS_PATH, "w", encoding="utf-8") as f:
+            json.dump(learnable, f, ensure_ascii=False, indent=2)
+
+    def save_search_index(self):
+        # 検索ページ用の N-gram インデックス
+        print(f"[*] Saving: {SEARCH_INDEX_PATH}")
+        SEARCH_INDEX_PATH.write_bytes(build_index(build_documents(self.dictionary, self.words_by_kanji)))
+
+    def kanji_page_hash(self, record: dict) -> str:
+        """漢字ページに載る内容（詳細データ・筆順 SVG・単語・読み・関連漢字）のハッシュ"""
+        kanji = record["kanji"]
+        files = [KANJI_DETAILS_DIR / f"{kanji}.json", KANJIVG_DIR / f"{record['ucsHex']}.svg"]
+        return content_hash(
+            [path.read_text(encoding="utf-8") if path.exists() else None for path in files],
+            self.words_by_kanji.get(kanji, []),
+            self.words_by_reading.get(kanji),
+            self.related_kanji.get(kanji),
+        )
+
+    def sitemap_urls(self):
+        """src/app/sitemap.ts に無いページの URL（漢字ごとの書き取り練習。漢字・学年別・画数別は sitemap.ts が出す）"""
+        for record in self.records:
+            slug = f"u{ord(record['kanji']):X}"
+            yield SitemapUrl(f"/kanji/{slug}/practice", self.kanji_page_hash(record), "monthly", 0.6)
+
+    def save_sitemap(self):
+        # 内容が変わったページだけ lastmod を更新した分割サイトマップ
+        with SitemapWriter() as writer:
+            for url in self.sitemap_urls():
+                writer.add(url)
+        print(f"[*] Saving: {writer.output_dir} ({writer.total} URLs in {len(writer.shards)} sitemaps, "
+              f"{writer.store.changed} updated)")
+
+
+def input_snapshot() -> dict:
+    """入力ファイルごとの (更新時刻, サイズ)"""
+    snapshot = {}
+    for path in [KANJI_JOYO_PATH, KANJI_DICTIONARY_PATH, KANJI_EXAM_PATH, KANJI_MISTAKE_PATH,
+                 *KANJI_DETAILS_DIR.glob("*.json")]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def changed_inputs(before: dict, after: dict) -> set:
+    return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+
+def watch(state: GeneratorState, interval: float, debounce: float):
+    """入力ファイルをポーリングし、変更があれば該当する出力だけを作り直す"""
+    print(f"\n[*] Watching inputs every {interval}s (Ctrl+C to stop)...")
+    snapshot = input_snapshot()
+    try:
+        while True:
+            time.sleep(interval)
+            current = input_snapshot()
+            changed = changed_inputs(snapshot, current)
+            if not changed:
+                continue
+            
+            # 連続した保存がおさまるまで待ってからまとめて処理する
+            while True:
+                time.sleep(debounce)
+                latest = input_snapshot()
+                burst = changed_inputs(current, latest)
+                if not burst:
+                    break
+                changed |= burst
+                current = latest
+            snapshot = current
+            
+            start = time.perf_counter()
+            state.apply_changes(changed)
+            elapsed = time.perf_counter() - start
+            print(f"[OK] Rebuilt for {len(changed)} changed file(s) in {elapsed * 1000:.0f} ms\n")
+    except KeyboardInterrupt:
+        print("\n[*] Stopped watching")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate words-by-kanji.json and derived data")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild when inputs change")
+    parser.add_argument("--interval", type=float, default=1.0, help="polling interval in seconds (default: 1.0)")
+    parser.add_argument("--debounce", type=float, default=0.3, help="quiet period before rebuilding (default: 0.3)")
+    parser.add_argument("--corpus", type=Path, nargs="+", default=[],
+                        help="corpus text files to tokenize (.gz/.bz2/.xz and tar archives are read as streams)")
+    parser.add_argument("--workers", type=int, default=None, help="corpus worker processes (default: CPU count)")
+    args = parser.parse_args()
+    
     # Windows console encoding fix
     import io
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace', line_buffering=args.watch)
     
     print("=" * 50)
     print("words-by-kanji.json generation script")
@@ -1461,38 +2029,9 @@ def main():
         print(f"Error: {KANJI_JOYO_PATH} not found")
         sys.exit(1)
     
-    # 常用漢字リストを読み込み
-    print(f"\n[*] Loading: {KANJI_JOYO_PATH}")
-    kanji_list = load_joyo_kanji(KANJI_JOYO_PATH)
-    print(f"    Loaded {len(kanji_list)} kanji")
-    
-    kanji_set = {k["kanji"] for k in kanji_list}
-    
-    # サンプル単語リストから抽出
-    print("\n[*] Extracting words from sample data...")
-    words_by_kanji = extract_words_for_kanji(kanji_list, SAMPLE_WORDS)
-    
-    # fugashiで追加の単語を生成
-    print("[*] Processing with fugashi (if available)...")
-    add_words_from_fugashi(words_by_kanji, kanji_set)
-    
-    # 各漢字の単語を頻度順（単語の長さ順）にソート
-    for kanji in words_by_kanji:
-        words_by_kanji[kanji].sort(key=lambda w: len(w["word"]))
-    
-    # 統計情報
-    total_words = sum(len(words) for words in words_by_kanji.values())
-    kanji_with_words = len(words_by_kanji)
-    
-    print(f"\n[*] Statistics:")
-    print(f"    Kanji with words: {kanji_with_words} / {len(kanji_list)}")
-    print(f"    Total word entries: {total_words}")
-    print(f"    Average words per kanji: {total_words / kanji_with_words:.1f}")
-    
-    # 出力
-    print(f"\n[*] Saving: {OUTPUT_PATH}")
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(words_by_kanji, f, ensure_ascii=False, indent=2)
+    tagger = LemmaTagger()
+    state = GeneratorState(CachingTagger(tagger) if args.watch else tagger, args.corpus, args.workers)
+    state.build()
     
     print("\n[OK] Done!")
     
@@ -1500,12 +2039,14 @@ def main():
     print("\n[*] Sample output:")
     sample_kanji = ["日", "水", "学", "人", "山"]
     for k in sample_kanji:
-        if k in words_by_kanji:
-            words = words_by_kanji[k][:5]
+        if k in state.words_by_kanji:
+            words = state.words_by_kanji[k][:5]
             word_strs = ", ".join([f"{w['word']}({w['reading']})" for w in words])
             print(f"    {k}: {word_strs}")
+    
+    if args.watch:
+        watch(state, args.interval, args.debounce)
 
 
 if __name__ == "__main__":
     main()
-
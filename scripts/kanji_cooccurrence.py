@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+単語を介した漢字の共起グラフから「関連する漢字」を計算するスクリプト
+
+入力: data/kanji-joyo.json, data/words-by-kanji.json
+出力: data/related-kanji.json
+
+漢字×単語の接続行列（SciPy があれば CSR 疎行列、なければ NumPy 配列の組）を作り、
+A·Aᵀ で漢字同士の共起数を求める。共起数を各漢字の出現単語数で正規化した
+重み（コサイン類似度）の上位 k 件を、つないでいる単語の例と一緒に出力する。
+
+必要なライブラリ:
+  pip install numpy        (scipy は任意)
+
+使用方法:
+  python scripts/kanji_cooccurrence.py
+  python scripts/kanji_cooccurrence.py --benchmark
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+WORDS_BY_KANJI_PATH = DATA_DIR / "words-by-kanji.json"
+OUTPUT_PATH = DATA_DIR / "related-kanji.json"
+
+DEFAULT_TOP_K = 10
+EXAMPLE_WORDS = 3
+
+
+def incidence(words: list, kanji: list) -> tuple:
+    """単語リストから (漢字ID, 単語ID) の組を重複なしで返す（文字単位の処理は NumPy で行う）"""
+    if not words:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    codes = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+    lengths = np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words))
+    word_ids = np.repeat(np.arange(len(words)), lengths)
+
+    lookup = np.full(max(int(codes.max()), max(map(ord, kanji))) + 1, -1, dtype=np.int64)
+    lookup[[ord(k) for k in kanji]] = np.arange(len(kanji))
+    kanji_ids = lookup[codes]
+
+    keep = kanji_ids >= 0
+    pairs = np.unique(kanji_ids[keep] * len(words) + word_ids[keep])
+    return pairs // len(words), pairs % len(words)
+
+
+def word_slots(rows: np.ndarray, cols: np.ndarray, n_words: int) -> np.ndarray:
+    """単語ごとに含まれる漢字ID を左詰めした (単語数, 最大漢字数) の配列（空きは -1）"""
+    order = np.lexsort((rows, cols))
+    rows, cols = rows[order], cols[order]
+    starts = np.searchsorted(cols, np.arange(n_words))
+    sizes = np.bincount(cols, minlength=n_words)
+    width = int(sizes.max()) if len(sizes) else 0
+    slots = np.full((n_words, width), -1, dtype=np.int64)
+    slots[cols, np.arange(len(rows)) - starts[cols]] = rows
+    return slots
+
+
+def kanji_pairs(slots: np.ndarray) -> tuple:
+    """同じ単語に含まれる異なる漢字の組 (漢字A, 漢字B, 単語ID) を列挙"""
+    firsts, seconds, owners = [], [], []
+    width = slots.shape[1]
+    for a in range(width):
+        for b in range(width):
+            if a == b:
+                continue
+            valid = np.nonzero((slots[:, a] >= 0) & (slots[:, b] >= 0))[0]
+            firsts.append(slots[valid, a])
+            seconds.append(slots[valid, b])
+            owners.append(valid)
+    if not firsts:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(owners)
+
+
+def cooccurrence(rows: np.ndarray, cols: np.ndarray, n_kanji: int, n_words: int):
+    """漢字×漢字の共起数（対角成分は各漢字の出現単語数）"""
+    if sparse is not None:
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(n_kanji, n_words)
+        )
+        return (matrix @ matrix.T).tocsr()
+
+    # SciPy がない場合: 単語内の漢字の組を数える
+    first, second, _ = kanji_pairs(word_slots(rows, cols, n_words))
+    counts = np.bincount(first * n_kanji + second, minlength=n_kanji * n_kanji).astype(np.float64)
+    counts = counts.reshape(n_kanji, n_kanji)
+    counts[np.diag_indices(n_kanji)] = np.bincount(rows, minlength=n_kanji)
+    return counts
+
+
+def example_words(slots: np.ndarray, wanted: np.ndarray, n_kanji: int, limit: int = EXAMPLE_WORDS) -> dict:
+    """指定した漢字の組（A*n_kanji+B）ごとに、両方を含む単語ID を先頭から limit 件"""
+    first, second, owners = kanji_pairs(slots)
+    keys = first * n_kanji + second
+    keep = np.isin(keys, wanted)
+    keys, owners = keys[keep], owners[keep]
+
+    order = np.lexsort((owners, keys))
+    keys, owners = keys[order], owners[order]
+    group_start = np.searchsorted(keys, keys)
+    rank = np.arange(len(keys)) - group_start
+    keep = rank < limit
+
+    examples = {}
+    for key, owner in zip(keys[keep].tolist(), owners[keep].tolist()):
+        examples.setdefault(key, []).append(owner)
+    return examples
+
+
+def top_related(matrix, top_k: int) -> list:
+    """各漢字について (相手の漢字ID, 重み, 共起数) の上位 k 件"""
+    if sparse is not None and sparse.issparse(matrix):
+        diagonal = matrix.diagonal()
+        rows = [(matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]],
+                 matrix.data[matrix.indptr[i]:matrix.indptr[i + 1]]) for i in range(matrix.shape[0])]
+    else:
+        diagonal = np.diag(matrix)
+        rows = [(np.nonzero(row)[0], row[np.nonzero(row)[0]]) for row in matrix]
+
+    norms = np.sqrt(np.maximum(diagonal, 1))
+    result = []
+    for i, (indices, counts) in enumerate(rows):
+        keep = indices != i
+        indices, counts = indices[keep], counts[keep]
+        if len(indices) == 0:
+            result.append([])
+            continue
+        weights = counts / (norms[i] * norms[indices])
+        # 同じ重みは漢字ID 順（常用漢字の並び順）にして出力を安定させる
+        best = np.lexsort((indices, -weights))[:top_k]
+        result.append([(int(indices[j]), float(weights[j]), int(counts[j])) for j in best])
+    return result
+
+
+def build_related_kanji(words: list, kanji: list, top_k: int = DEFAULT_TOP_K) -> dict:
+    """漢字 -> 関連漢字のリスト（重み順、つないでいる単語の例つき）"""
+    rows, cols = incidence(words, kanji)
+    matrix = cooccurrence(rows, cols, len(kanji), len(words))
+    related = top_related(matrix, top_k)
+
+    # 上位 k 件の組についてだけ、共通する単語の例を集める
+    n_kanji = len(kanji)
+    wanted = np.array([i * n_kanji + j for i, entries in enumerate(related) for j, _, _ in entries], dtype=np.int64)
+    examples = example_words(word_slots(rows, cols, len(words)), wanted, n_kanji)
+
+    output = {}
+    for i, entries in enumerate(related):
+        if not entries:
+            continue
+        output[kanji[i]] = [
+            {
+                "kanji": kanji[j],
+                "weight": round(weight, 4),
+                "count": count,
+                "words": [words[w] for w in examples.get(i * n_kanji + j, [])],
+            }
+            for j, weight, count in entries
+        ]
+    return output
+
+
+def unique_words(words_by_kanji: dict) -> list:
+    seen = {}
+    for entries in words_by_kanji.values():
+        for entry in entries:
+            seen.setdefault(entry["word"], None)
+    return list(seen)
+
+
+def run_benchmark(kanji: list, sizes: tuple = (10_000, 100_000, 1_000_000), seed: int = 0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(kanji))]
+    for size in sizes:
+        words = ["".join(rng.choices(kanji, weights=weights, k=rng.choice((2, 2, 3, 4)))) for _ in range(size)]
+        start = time.perf_counter()
+        build_related_kanji(words, kanji)
+        elapsed = time.perf_counter() - start
+        print(f"    {size:>9,} words: {elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute related kanji from word co-occurrence")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--benchmark", action="store_true", help="time synthetic word lists")
+    args = parser.parse_args()
+
+    with open(KANJI_JOYO_PATH, "r", encoding="utf-8") as f:
+        kanji = [k["kanji"] for k in json.load(f)]
+
+    if args.benchmark:
+        print(f"[*] Benchmark ({'scipy.sparse' if sparse is not None else 'numpy'})")
+        run_benchmark(kanji)
+        return
+
+    with open(WORDS_BY_KANJI_PATH, "r", encoding="utf-8") as f:
+        words = unique_words(json.load(f))
+    related = build_related_kanji(words, kanji, args.top_k)
+    print(f"[*] Related kanji for {len(related)} kanji from {len(words)} words")
+
+    print(f"[*] Saving: {OUTPUT_PATH}")
+    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
+        json.dump(related, f, ensure_ascii=False, indent=2)
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
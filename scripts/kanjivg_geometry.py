@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KanjiVG のストローク形状を NumPy 配列に前処理するスクリプト
+
+入力: public/kanjivg/*.svg
+出力: public/kanjivg-geometry.bin
+
+各 SVG の kvg:StrokePaths グループからパスを読み取り、ベジェ曲線を平坦化して
+固定点数にリサンプリングする。ストローク長・バウンディングボックス・始点/終点も
+合わせて1つのバイナリファイルに書き出す。
+
+バイナリ形式（リトルエンディアン）:
+  header   : magic "KVGEOM01", uint32 version, points, kanji_count, stroke_count
+  index    : kanji_count x (uint32 codepoint, uint32 first_stroke, uint32 stroke_count)
+  points   : stroke_count x points x 2 float32
+  lengths  : stroke_count float32
+  bboxes   : stroke_count x 4 float32 (min_x, min_y, max_x, max_y)
+  endpoints: stroke_count x 4 float32 (start_x, start_y, end_x, end_y)
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/kanjivg_geometry.py
+"""
+
+import argparse
+import os
+import re
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+KANJIVG_DIR = PROJECT_ROOT / "public" / "kanjivg"
+OUTPUT_PATH = PROJECT_ROOT / "public" / "kanjivg-geometry.bin"
+
+KVG_NS = "http://kanjivg.tagaini.net"
+SVG_NS = "http://www.w3.org/2000/svg"
+
+MAGIC = b"KVGEOM01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIII")
+INDEX_DTYPE = np.dtype([("codepoint", "<u4"), ("first_stroke", "<u4"), ("stroke_count", "<u4")])
+
+# リサンプリング後の点数、ベジェ1区間あたりの平坦化分割数
+DEFAULT_POINTS = 32
+BEZIER_STEPS = 16
+
+# KanjiVG の座標系（viewBox 0 0 109 109）
+CANVAS_SIZE = 109.0
+
+PATH_TOKEN_RE = re.compile(r"[MmCcSsLlHhVvZz]|-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+_BEZIER_T = np.linspace(0.0, 1.0, BEZIER_STEPS + 1)[1:]
+_BEZIER_BASIS = np.stack([
+    (1 - _BEZIER_T) ** 3,
+    3 * (1 - _BEZIER_T) ** 2 * _BEZIER_T,
+    3 * (1 - _BEZIER_T) * _BEZIER_T ** 2,
+    _BEZIER_T ** 3,
+], axis=1)
+
+
+def parse_path(d: str) -> np.ndarray:
+    """SVG パスの d 属性を平坦化した折れ線 (N, 2) に変換"""
+    tokens = PATH_TOKEN_RE.findall(d)
+    points = []
+    segments = []  # 3次ベジェの制御点 (p0, p1, p2, p3)
+    current = np.zeros(2)
+    start = np.zeros(2)
+    last_control = None
+    command = None
+    i = 0
+
+    def take(count: int) -> np.ndarray:
+        nonlocal i
+        values = np.array([float(v) for v in tokens[i:i + count]])
+        i += count
+        return values
+
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]
+            i += 1
+            if command in "Zz":
+                segments.append((current, current, start, start))
+                current = start
+                last_control = None
+                continue
+        elif command is None:
+            raise ValueError(f"path data must start with a command: {d[:20]}")
+
+        relative = command.islower()
+        origin = current if relative else np.zeros(2)
+        upper = command.upper()
+
+        if upper == "M":
+            current = origin + take(2)
+            start = current
+            points.append(current)
+            # M に続く座標は L として扱う
+            command = "l" if relative else "L"
+            last_control = None
+        elif upper == "L":
+            target = origin + take(2)
+            segments.append((current, current, target, target))
+            current, last_control = target, None
+        elif upper in "HV":
+            value = take(1)[0]
+            target = current.copy()
+            axis = 0 if upper == "H" else 1
+            target[axis] = (current[axis] if relative else 0) + value
+            segments.append((current, current, target, target))
+            current, last_control = target, None
+        elif upper == "C":
+            values = take(6).reshape(3, 2) + origin
+            segments.append((current, values[0], values[1], values[2]))
+            last_control, current = values[1], values[2]
+        elif upper == "S":
+            values = take(4).reshape(2, 2) + origin
+            first = 2 * current - last_control if last_control is not None else current
+            segments.append((current, first, values[0], values[1]))
+            last_control, current = values[0], values[1]
+
+    if not segments:
+        return np.array(points or [current], dtype=np.float64)
+
+    controls = np.array(segments, dtype=np.float64)  # (S, 4, 2)
+    curve = np.einsum("tk,skd->std", _BEZIER_BASIS, controls).reshape(-1, 2)
+    return np.vstack([controls[0, 0][None, :], curve])
+
+
+def polyline_length(polyline: np.ndarray) -> float:
+    """折れ線の全長"""
+    return float(np.linalg.norm(np.diff(polyline, axis=0), axis=1).sum())
+
+
+def resample(polyline: np.ndarray, count: int = DEFAULT_POINTS) -> np.ndarray:
+    """折れ線を弧長に沿って等間隔な count 点に再サンプリング"""
+    polyline = np.asarray(polyline, dtype=np.float64)
+    if len(polyline) == 1:
+        return np.repeat(polyline, count, axis=0)
+    seg = np.linalg.norm(np.diff(polyline, axis=0), axis=1)
+    cumulative = np.concatenate([[0.0], np.cumsum(seg)])
+    if cumulative[-1] == 0:
+        return np.repeat(polyline[:1], count, axis=0)
+    targets = np.linspace(0.0, cumulative[-1], count)
+    return np.stack([
+        np.interp(targets, cumulative, polyline[:, 0]),
+        np.interp(targets, cumulative, polyline[:, 1]),
+    ], axis=1)
+
+
+def load_svg_root(svg_path: Path) -> ET.Element:
+    """KanjiVG SVG を読み込む（DTD 内部サブセットは expat が処理する）"""
+    return ET.parse(svg_path).getroot()
+
+
+def stroke_group(root: ET.Element) -> ET.Element:
+    """kvg:StrokePaths_xxxxx グループを返す"""
+    for group in root.iter(f"{{{SVG_NS}}}g"):
+        if group.get("id", "").startswith("kvg:StrokePaths_"):
+            return group
+    raise ValueError("kvg:StrokePaths group not found")
+
+
+def stroke_polylines(svg_path: Path) -> list:
+    """SVG の全ストロークを書き順どおりの折れ線リストとして返す"""
+    group = stroke_group(load_svg_root(svg_path))
+    return [parse_path(path.get("d", "")) for path in group.iter(f"{{{SVG_NS}}}path")]
+
+
+def extract_geometry(svg_path: Path, points: int = DEFAULT_POINTS) -> tuple:
+    """1ファイル分の (コードポイント, 点列, 長さ, bbox, 始終点) を計算"""
+    polylines = stroke_polylines(svg_path)
+    resampled = np.zeros((len(polylines), points, 2), dtype=np.float32)
+    lengths = np.zeros(len(polylines), dtype=np.float32)
+    bboxes = np.zeros((len(polylines), 4), dtype=np.float32)
+    for s, polyline in enumerate(polylines):
+        resampled[s] = resample(polyline, points)
+        lengths[s] = polyline_length(polyline)
+        bboxes[s, :2] = polyline.min(axis=0)
+        bboxes[s, 2:] = polyline.max(axis=0)
+    endpoints = np.concatenate([resampled[:, 0], resampled[:, -1]], axis=1)
+    return int(Path(svg_path).stem, 16), resampled, lengths, bboxes, endpoints
+
+
+def _extract_worker(args: tuple) -> tuple:
+    return extract_geometry(*args)
+
+
+def build_geometry(svg_paths: list, points: int = DEFAULT_POINTS, workers: int = None) -> dict:
+    """プロセスプールで全 SVG を処理し、連結済みの配列を返す"""
+    tasks = [(path, points) for path in svg_paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_extract_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_extract_worker, tasks, chunksize=32))
+
+    results.sort(key=lambda r: r[0])
+    index = np.zeros(len(results), dtype=INDEX_DTYPE)
+    first = 0
+    for k, (codepoint, resampled, _, _, _) in enumerate(results):
+        index[k] = (codepoint, first, len(resampled))
+        first += len(resampled)
+
+    def concat(column: int, shape: tuple) -> np.ndarray:
+        arrays = [r[column] for r in results]
+        if not arrays:
+            return np.zeros((0,) + shape, dtype=np.float32)
+        return np.concatenate(arrays).astype(np.float32)
+
+    return {
+        "index": index,
+        "points": concat(1, (points, 2)),
+        "lengths": concat(2, ()),
+        "bboxes": concat(3, (4,)),
+        "endpoints": concat(4, (4,)),
+    }
+
+
+def write_geometry(path: Path, geometry: dict):
+    """ジオメトリをバイナリファイルに書き出す"""
+    points = geometry["points"]
+    header = HEADER.pack(MAGIC, VERSION, points.shape[1], len(geometry["index"]), len(points))
+    with open(path, "wb") as f:
+        f.write(header)
+        for key in ("index", "points", "lengths", "bboxes", "endpoints"):
+            f.write(np.ascontiguousarray(geometry[key]).tobytes())
+
+
+class StrokeGeometry:
+    """kanjivg-geometry.bin を読み込み、漢字ごとのストローク配列を返す"""
+
+    def __init__(self, path: Path = OUTPUT_PATH):
+        buffer = Path(path).read_bytes()
+        magic, version, points, kanji_count, stroke_count = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"unsupported geometry file: {path}")
+
+        offset = HEADER.size
+
+        def section(dtype, count: int, shape: tuple = ()) -> np.ndarray:
+            nonlocal offset
+            array = np.frombuffer(buffer, dtype=dtype, count=count * int(np.prod(shape, dtype=int)), offset=offset)
+            offset += array.nbytes
+            return array.reshape((count,) + shape)
+
+        self.points_per_stroke = points
+        self.index = section(INDEX_DTYPE, kanji_count)
+        self.points = section("<f4", stroke_count, (points, 2))
+        self.lengths = section("<f4", stroke_count)
+        self.bboxes = section("<f4", stroke_count, (4,))
+        self.endpoints = section("<f4", stroke_count, (4,))
+        self._lookup = {int(row["codepoint"]): k for k, row in enumerate(self.index)}
+
+    def __contains__(self, kanji: str) -> bool:
+        return ord(kanji) in self._lookup
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def stroke_slice(self, kanji: str) -> slice:
+        row = self.index[self._lookup[ord(kanji)]]
+        return slice(int(row["first_stroke"]), int(row["first_stroke"] + row["stroke_count"]))
+
+    def strokes(self, kanji: str) -> np.ndarray:
+        """(ストローク数, 点数, 2) の点列"""
+        return self.points[self.stroke_slice(kanji)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract KanjiVG stroke geometry into a binary file")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="resampled points per stroke")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    svg_paths = sorted(KANJIVG_DIR.glob("*.svg"))
+    print(f"[*] Extracting geometry from {len(svg_paths)} SVG files...")
+
+    start = time.perf_counter()
+    geometry = build_geometry(svg_paths, args.points, args.workers)
+    elapsed = time.perf_counter() - start
+
+    write_geometry(args.output, geometry)
+    size = args.output.stat().st_size
+    print(f"    Kanji: {len(geometry['index'])}, strokes: {len(geometry['points'])}")
+    print(f"    Elapsed: {elapsed:.2f}s")
+    print(f"[*] Saving: {args.output} ({size / 1024:.0f} KB)")
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KanjiVG の SVG を縮小し、学年別・画数別のバンドルにまとめるスクリプト
+
+入力: public/kanjivg/*.svg, data/kanji-joyo.json
+出力: public/kanjivg-bundles/grade-<学年>.json, public/kanjivg-bundles/strokes-<画数>.json
+
+各 SVG から次のものを取り除く（プロセスプールで並列に処理する）:
+  - ライセンスのコメントと DTD（ATTLIST 宣言）
+  - フロントエンドで使わない kvg: 属性（kvg:element, kvg:type など）
+  - 要素間の空白
+パスの座標と画数番号の位置は小数点以下 --precision 桁に丸める。要素の id
+（kvg:StrokePaths_xxxxx, kvg:StrokeNumbers_xxxxx）は表示側が参照するので残す。
+
+バンドルの形式:
+  {"attribution": "<KanjiVG のライセンス表記>", "svgs": {"<ucsHex>": "<svg ...>", ...}}
+ライセンス表記は各 SVG から外し、バンドルごとに1つだけ持つ。
+
+使用方法:
+  python scripts/minify_kanjivg.py
+  python scripts/minify_kanjivg.py --precision 2 --workers 4
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+KANJIVG_DIR = PROJECT_ROOT / "public" / "kanjivg"
+KANJI_JOYO_PATH = PROJECT_ROOT / "data" / "kanji-joyo.json"
+OUTPUT_DIR = PROJECT_ROOT / "public" / "kanjivg-bundles"
+
+KVG_NS = "http://kanjivg.tagaini.net"
+SVG_NS = "http://www.w3.org/2000/svg"
+
+DEFAULT_PRECISION = 1
+
+COMMENT_RE = re.compile(r"<!--(.*?)-->", re.S)
+NUMBER_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# 数値どうしの区切りのうち、次の数値が "-" で始まるなら省ける
+SEPARATOR_RE = re.compile(r"[ ,](?=-)")
+
+ET.register_namespace("", SVG_NS)
+
+
+def format_number(value: float, precision: int) -> str:
+    """丸めた数値の最短表記（0.50 -> .5, -0.0 -> 0, 12.0 -> 12）"""
+    text = f"{round(value, precision):.{precision}f}".rstrip("0").rstrip(".") if precision else str(round(value))
+    if text in ("-0", ""):
+        return "0"
+    if text.startswith("0."):
+        return text[1:]
+    if text.startswith("-0."):
+        return "-" + text[2:]
+    return text
+
+
+def round_numbers(text: str, precision: int) -> str:
+    """文字列中の数値を丸め、不要な区切り文字を省く（パスの d と transform 用）"""
+
+    def replace(match: re.Match) -> str:
+        number = format_number(float(match.group()), precision)
+        # "3.6-0.02" の "-" は区切りも兼ねているので、0 に丸めて符号が消えたら区切りを補う
+        if match.group().startswith("-") and not number.startswith("-") and match.start() > 0 \
+                and text[match.start() - 1] in "0123456789.":
+            return "," + number
+        return number
+
+    return SEPARATOR_RE.sub("", NUMBER_RE.sub(replace, text))
+
+
+def attribution(svg_text: str) -> str:
+    """先頭のライセンスコメント"""
+    match = COMMENT_RE.search(svg_text)
+    return match.group(1).strip() if match else ""
+
+
+def minify_svg(svg_text: str, precision: int = DEFAULT_PRECISION) -> tuple:
+    """1ファイル分の (縮小した SVG, 画数)"""
+    # expat が DTD の #FIXED 宣言から kvg 名前空間を補うので、解析後は DTD もコメントも残らない
+    root = ET.fromstring(svg_text.encode("utf-8"))
+    strokes = 0
+    for element in root.iter():
+        for name in [name for name in element.attrib if name.startswith(f"{{{KVG_NS}}}")]:
+            del element.attrib[name]
+        if element.tag == f"{{{SVG_NS}}}path":
+            strokes += 1
+            element.set("d", round_numbers(element.get("d", ""), precision))
+        elif element.tag == f"{{{SVG_NS}}}text" and "transform" in element.attrib:
+            element.set("transform", round_numbers(element.get("transform"), precision).replace(",", " "))
+        # インデントと改行だけのテキストを捨てる（画数番号の数字は残す）
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        element.tail = None
+    return ET.tostring(root, encoding="unicode").replace(" />", "/>"), strokes
+
+
+def _minify_worker(args: tuple) -> tuple:
+    """(ucsHex, 元のバイト数, 縮小した SVG, 画数, ライセンス表記)"""
+    path, precision = args
+    raw = Path(path).read_bytes()
+    text = raw.decode("utf-8")
+    minified, strokes = minify_svg(text, precision)
+    return Path(path).stem, len(raw), minified, strokes, attribution(text)
+
+
+def minify_all(svg_paths: list, precision: int = DEFAULT_PRECISION, workers: int = None) -> list:
+    """プロセスプールで全 SVG を縮小し、ucsHex 順のリストを返す"""
+    tasks = [(path, precision) for path in svg_paths]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_minify_worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_minify_worker, tasks, chunksize=32))
+    results.sort(key=lambda r: r[0])
+    return results
+
+
+def build_bundles(results: list, grades: dict) -> dict:
+    """バンドル名 -> {"attribution", "svgs"}（学年別と画数別）"""
+    bundles = {}
+    for ucs_hex, _, svg, strokes, notice in results:
+        grade = grades.get(ucs_hex)
+        names = [f"grade-{grade}" if grade is not None else "grade-other", f"strokes-{strokes:02d}"]
+        for name in names:
+            bundle = bundles.setdefault(name, {"attribution": notice, "svgs": {}})
+            if not bundle["attribution"]:
+                bundle["attribution"] = notice
+            bundle["svgs"][ucs_hex] = svg
+    return dict(sorted(bundles.items()))
+
+
+def load_grades(path: Path = KANJI_JOYO_PATH) -> dict:
+    """ucsHex -> 学年"""
+    with open(path, "r", encoding="utf-8") as f:
+        return {entry["ucsHex"]: entry.get("grade") for entry in json.load(f)}
+
+
+def write_bundles(bundles: dict, output_dir: Path) -> dict:
+    """バンドルを書き出し、バンドル名 -> バイト数を返す"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for name, bundle in bundles.items():
+        data = json.dumps(bundle, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        (output_dir / f"{name}.json").write_bytes(data)
+        sizes[name] = len(data)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify KanjiVG SVGs into grade and stroke-count bundles")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                        help=f"decimal places kept in coordinates (default: {DEFAULT_PRECISION})")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    svg_paths = sorted(KANJIVG_DIR.glob("*.svg"))
+    print(f"[*] Minifying {len(svg_paths)} SVG files...")
+
+    start = time.perf_counter()
+    results = minify_all(svg_paths, args.precision, args.workers)
+    bundles = build_bundles(results, load_grades())
+    elapsed = time.perf_counter() - start
+
+    before = sum(r[1] for r in results)
+    minified = sum(len(r[2].encode("utf-8")) for r in results)
+    sizes = write_bundles(bundles, args.output)
+    print(f"    Original SVGs:  {before / 1024:>8.0f} KB")
+    print(f"    Minified SVGs:  {minified / 1024:>8.0f} KB ({minified / before:.0%})")
+    # 各漢字は学年別と画数別のバンドルに1回ずつ入る
+    for family in ("grade", "strokes"):
+        files = [size for name, size in sizes.items() if name.startswith(f"{family}-")]
+        print(f"    {family + ' bundles:':<15} {sum(files) / 1024:>8.0f} KB in {len(files)} files "
+              f"({sum(files) / before:.0%})")
+    print(f"    Elapsed: {elapsed:.2f}s")
+    print(f"[*] Saving: {args.output}")
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
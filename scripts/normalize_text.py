@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+コーパスの文字を正規化するモジュール
+
+全角英数・半角カナ・CJK 互換漢字の NFKC と、旧字体・異体字から常用漢字への
+変換を、1文字ごとの変換結果をまとめた str.translate の表（BMP のリスト）で行う。読みの
+カタカナ→ひらがなも同じ方式で変換する。変換表は import 時に1回だけ作るため、
+ワーカープロセスでもそのまま使い回せる。
+
+ほとんどの文は変換不要なので ASCII のみか、unicodedata.is_normalized と正規表現で先に判定する。
+半角カナの濁点のように前の文字との合成が必要な場合だけ unicodedata.normalize を使う。
+
+使用方法:
+  python scripts/normalize_text.py --benchmark
+"""
+
+import argparse
+import re
+import sys
+import time
+import unicodedata
+
+# 旧字体・異体字 -> 常用漢字
+ITAIJI_TO_JOYO = {
+    "亞": "亜", "惡": "悪", "壓": "圧", "圍": "囲", "爲": "為", "醫": "医", "壹": "壱", "飮": "飲",
+    "隱": "隠", "營": "営", "榮": "栄", "衞": "衛", "驛": "駅", "圓": "円", "鹽": "塩", "奧": "奥",
+    "應": "応", "歐": "欧", "毆": "殴", "櫻": "桜", "假": "仮", "價": "価", "畫": "画", "會": "会",
+    "壞": "壊", "懷": "懐", "繪": "絵", "擴": "拡", "覺": "覚", "學": "学", "嶽": "岳", "樂": "楽",
+    "勸": "勧", "卷": "巻", "歡": "歓", "罐": "缶", "觀": "観", "關": "関", "陷": "陥",
+    "顏": "顔", "歸": "帰", "氣": "気", "龜": "亀", "僞": "偽", "戲": "戯", "犧": "犠", "舊": "旧",
+    "據": "拠", "擧": "挙", "峽": "峡", "挾": "挟", "狹": "狭", "曉": "暁", "區": "区", "驅": "駆",
+    "勳": "勲", "徑": "径", "惠": "恵", "溪": "渓", "經": "経", "繼": "継", "莖": "茎", "螢": "蛍",
+    "輕": "軽", "鷄": "鶏", "藝": "芸", "擊": "撃", "缺": "欠", "儉": "倹", "劍": "剣", "圈": "圏",
+    "檢": "検", "權": "権", "獻": "献", "縣": "県", "險": "険", "顯": "顕", "驗": "験", "嚴": "厳",
+    "效": "効", "廣": "広", "恆": "恒", "鑛": "鉱", "號": "号", "國": "国", "黑": "黒", "濟": "済",
+    "碎": "砕", "齋": "斎", "劑": "剤", "雜": "雑", "參": "参", "慘": "惨", "棧": "桟", "蠶": "蚕",
+    "贊": "賛", "殘": "残", "絲": "糸", "齒": "歯", "兒": "児", "辭": "辞", "濕": "湿", "實": "実",
+    "舍": "舎", "寫": "写", "釋": "釈", "壽": "寿", "收": "収", "從": "従", "澁": "渋", "獸": "獣",
+    "縱": "縦", "肅": "粛", "處": "処", "緖": "緒", "敍": "叙", "將": "将", "稱": "称", "涉": "渉",
+    "燒": "焼", "證": "証", "奬": "奨", "條": "条", "狀": "状", "乘": "乗", "淨": "浄", "剩": "剰",
+    "疊": "畳", "孃": "嬢", "讓": "譲", "釀": "醸", "觸": "触", "寢": "寝", "愼": "慎", "眞": "真",
+    "盡": "尽", "圖": "図", "粹": "粋", "醉": "酔", "穗": "穂", "隨": "随", "髓": "髄", "樞": "枢",
+    "數": "数", "瀨": "瀬", "聲": "声", "齊": "斉", "靜": "静", "攝": "摂", "竊": "窃", "專": "専",
+    "戰": "戦", "淺": "浅", "潛": "潜", "纖": "繊", "踐": "践", "錢": "銭", "禪": "禅", "雙": "双",
+    "壯": "壮", "搜": "捜", "插": "挿", "爭": "争", "總": "総", "莊": "荘", "裝": "装",
+    "騷": "騒", "增": "増", "臟": "臓", "藏": "蔵", "屬": "属", "續": "続", "墮": "堕", "體": "体",
+    "對": "対", "帶": "帯", "滯": "滞", "臺": "台", "瀧": "滝", "擇": "択", "澤": "沢", "單": "単",
+    "擔": "担", "膽": "胆", "團": "団", "彈": "弾", "斷": "断", "癡": "痴", "遲": "遅", "晝": "昼",
+    "蟲": "虫", "鑄": "鋳", "廳": "庁", "聽": "聴", "敕": "勅", "鎭": "鎮", "遞": "逓", "鐵": "鉄",
+    "轉": "転", "點": "点", "傳": "伝", "黨": "党", "盜": "盗", "燈": "灯", "當": "当", "鬭": "闘",
+    "德": "徳", "獨": "独", "讀": "読", "屆": "届", "繩": "縄", "貳": "弐", "惱": "悩", "腦": "脳",
+    "霸": "覇", "廢": "廃", "拜": "拝", "賣": "売", "麥": "麦", "發": "発", "髮": "髪", "拔": "抜",
+    "蠻": "蛮", "祕": "秘", "濱": "浜", "拂": "払", "佛": "仏", "竝": "並", "變": "変", "邊": "辺",
+    "辨": "弁", "瓣": "弁", "辯": "弁", "舖": "舗", "步": "歩", "寶": "宝", "豐": "豊", "沒": "没",
+    "飜": "翻", "每": "毎", "萬": "万", "滿": "満", "默": "黙", "藥": "薬", "譯": "訳", "豫": "予",
+    "餘": "余", "與": "与", "譽": "誉", "搖": "揺", "樣": "様", "謠": "謡", "來": "来", "賴": "頼",
+    "亂": "乱", "覽": "覧", "龍": "竜", "兩": "両", "獵": "猟", "綠": "緑", "壘": "塁", "淚": "涙",
+    "勵": "励", "禮": "礼", "隸": "隷", "靈": "霊", "齡": "齢", "曆": "暦", "歷": "歴", "戀": "恋",
+    "爐": "炉", "勞": "労", "樓": "楼", "郞": "郎", "錄": "録", "灣": "湾", "黃": "黄",
+    "巢": "巣", "麵": "麺", "靑": "青", "淸": "清", "姬": "姫", "卽": "即", "硏": "研", "强": "強",
+}
+
+# NFKC を1文字ずつ適用する範囲（BMP）
+NFKC_RANGES = (range(0x80, 0xD800), range(0xE000, 0x10000))
+
+
+def build_fold_table() -> list:
+    """1文字ごとの NFKC と旧字体の変換を1つにまとめた str.translate 用の表
+
+    dict より速く引けるように BMP の全コードポイントを並べたリストにする。
+    BMP の外の文字は IndexError でそのまま残るので、CJK 互換漢字補助などは
+    normalize_text の最後の is_normalized で本来の NFKC に回す。
+    """
+    table = [chr(code) for code in range(0x10000)]
+    for codes in NFKC_RANGES:
+        for code in codes:
+            char = chr(code)
+            folded = unicodedata.normalize("NFKC", char)
+            if folded != char:
+                table[code] = folded.translate(ITAIJI_TABLE)
+    for code, joyo in ITAIJI_TABLE.items():
+        table[code] = joyo
+    return table
+
+
+# 変換表（import 時に1回だけ作る）
+ITAIJI_TABLE = str.maketrans(ITAIJI_TO_JOYO)
+ITAIJI_RE = re.compile("[" + "".join(ITAIJI_TO_JOYO) + "]")
+FOLD_TABLE = build_fold_table()
+# 半角カナの濁点・半濁点は結合文字になるので、直前のかなと合成する
+KANA_MARK_RE = re.compile("[\u3041-\u30ff][\u3099\u309a]")
+COMPOSED_KANA = {
+    kana + mark: unicodedata.normalize("NFC", kana + mark)
+    for kana in map(chr, range(0x3041, 0x3100))
+    for mark in ("\u3099", "\u309a")
+    if len(unicodedata.normalize("NFC", kana + mark)) == 1
+}
+KATAKANA_TO_HIRAGANA = str.maketrans({chr(c): chr(c - 0x60) for c in range(ord("ァ"), ord("ヶ") + 1)})
+
+
+def normalize_text(text: str) -> str:
+    """NFKC と旧字体・異体字の常用漢字への変換（変換不要な文はそのまま返す）"""
+    if text.isascii() or (unicodedata.is_normalized("NFKC", text) and not ITAIJI_RE.search(text)):
+        return text
+    text = text.translate(FOLD_TABLE)
+    if "\u3099" in text or "\u309a" in text:
+        text = KANA_MARK_RE.sub(lambda m: COMPOSED_KANA.get(m.group(), m.group()), text)
+    # それでも合成が必要な文字や BMP の外の文字が残っている場合だけ本来の NFKC を使う
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text).translate(ITAIJI_TABLE)
+    return text
+
+
+def fold_reading(reading: str) -> str:
+    """読みの NFKC（半角カナ対策）とカタカナ→ひらがな変換"""
+    return normalize_text(reading).translate(KATAKANA_TO_HIRAGANA)
+
+
+def run_benchmark(megabytes: int = 100, seed_text: str = None):
+    """変換不要な文・変換が必要な文それぞれの処理速度（UTF-8 換算の MB/s）"""
+    plain = seed_text or "友達と一緒に映画を見ました。とても面白かったです。"
+    mixed = "ＡＢＣの學校で國語を勉強しました。ｶﾀｶﾅも混ざります。"
+    dakuten = "ﾃﾞｰﾀﾍﾞｰｽの學校で國語を勉強しました。"
+    ascii_only = "The quick brown fox jumps over the lazy dog."
+    for label, sentence in (("ascii", ascii_only), ("plain", plain), ("mixed", mixed), ("dakuten", dakuten)):
+        size = len(sentence.encode("utf-8"))
+        lines = [sentence] * (megabytes * 2**20 // size)
+        start = time.perf_counter()
+        for line in lines:
+            normalize_text(line)
+        elapsed = time.perf_counter() - start
+        print(f"    {label:<7} {len(lines):>9,} lines: {len(lines) * size / 2**20 / elapsed:>7.1f} MB/s")
+
+    # 1行ずつではなく大きなまとまりで処理する場合
+    chunk = "\n".join([plain] * (megabytes * 2**20 // len(plain.encode("utf-8"))))
+    start = time.perf_counter()
+    normalize_text(chunk)
+    elapsed = time.perf_counter() - start
+    print(f"    chunk   {len(chunk.encode('utf-8')) / 2**20:>9.0f} MB:    {len(chunk.encode('utf-8')) / 2**20 / elapsed:>7.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unicode normalization and itaiji folding for corpus text")
+    parser.add_argument("--benchmark", action="store_true", help="measure normalization throughput")
+    parser.add_argument("--megabytes", type=int, default=100)
+    parser.add_argument("text", nargs="*", help="text to normalize")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"[*] Benchmark ({len(ITAIJI_TO_JOYO)} folded variants)")
+        run_benchmark(args.megabytes)
+        return
+
+    for text in args.text:
+        print(normalize_text(text))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
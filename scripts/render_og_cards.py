@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+KanjiVG の筆画から OGP 用の PNG カードをまとめて生成するスクリプト
+
+入力: public/kanjivg/*.svg
+出力: public/og/kanji/<ucsHex>.png, public/og/kanji/manifest.json
+
+src/app/api/og-kanji/route.tsx のカードと同じ 1200x630・背景色・ドット模様で、
+KanjiVG の筆画だけを描いた静的な「筆画のみ」のカードを作る。route.tsx にある
+「書き順・筆順」のサブテキスト、「Kanji Stroke Order」のブランドラベル、
+「常用漢字 2136字」の装飾はフォントが必要なので描かない（NumPy のみで描画するため）。
+そのため route.tsx の置き換えではなく、文字なしのバリエーションとして使う
+（manifest.json の variant が "strokes-only"）。
+
+筆画はベジェ曲線を平坦化した折れ線（kanjivg_geometry.py と同じ処理）を、
+線分までの距離からアンチエイリアス付きで塗りつぶす（PNG も zlib と struct で書き出す）。
+
+SVG の内容・テンプレートのパラメータ・描画処理のバージョンから作ったハッシュを
+manifest.json に記録し、次回はハッシュが変わったカードだけを描き直す。描画は
+プロセスプールで並列に行う。
+
+manifest.json の形式:
+  {"version": 1, "variant": "strokes-only", "template": {...},
+   "cards": {"<ucsHex>": {"kanji", "file", "hash"}, ...}}
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/render_og_cards.py
+  python scripts/render_og_cards.py --force          全てのカードを描き直す
+  python scripts/render_og_cards.py --benchmark      一時ディレクトリで初回ビルドと変更なしの再ビルドを計測
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from kanjivg_geometry import CANVAS_SIZE, stroke_polylines
+
+PROJECT_ROOT = Path(__file__).parent.parent
+KANJIVG_DIR = PROJECT_ROOT / "public" / "kanjivg"
+OUTPUT_DIR = PROJECT_ROOT / "public" / "og" / "kanji"
+MANIFEST_NAME = "manifest.json"
+
+# 描画処理を変えたら上げる（全カードのハッシュが変わる）
+RENDERER_VERSION = 1
+
+# カードの種類（文字のテキストは描かず、筆画だけ）
+VARIANT = "strokes-only"
+
+# route.tsx の背景・ドット模様・文字色に合わせたテンプレート（色は RGB、テキストは含まない）
+TEMPLATE = {
+    "width": 1200,
+    "height": 630,
+    "background": [248, 247, 242],
+    "dotColor": [229, 228, 223],
+    "dotSpacing": 40,
+    "dotRadius": 1.0,
+    "dotOpacity": 0.5,
+    "ink": [26, 26, 26],
+    "glyphSize": 460,
+    "strokeWidth": 3.5,
+}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def card_hash(svg_bytes: bytes, template: dict) -> str:
+    """SVG の内容とテンプレートから作るキャッシュキー"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"v{RENDERER_VERSION}".encode())
+    digest.update(json.dumps(template, sort_keys=True).encode())
+    digest.update(svg_bytes)
+    return digest.hexdigest()
+
+
+def background(template: dict) -> np.ndarray:
+    """背景色とドットのパターン (height, width, 3) uint8"""
+    height, width = template["height"], template["width"]
+    spacing = template["dotSpacing"]
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32) + 0.5
+    # 各ピクセルから最も近い格子点までの距離
+    dy = (y - 1) % spacing
+    dx = (x - 1) % spacing
+    distance = np.sqrt(np.minimum(dy, spacing - dy) ** 2 + np.minimum(dx, spacing - dx) ** 2)
+    alpha = np.clip(template["dotRadius"] + 0.5 - distance, 0, 1) * template["dotOpacity"]
+    bg = np.array(template["background"], dtype=np.float32)
+    dot = np.array(template["dotColor"], dtype=np.float32)
+    return np.round(bg + (dot - bg) * alpha[..., None]).astype(np.uint8)
+
+
+def stroke_coverage(polylines: list, size: int, width: float) -> np.ndarray:
+    """折れ線の筆画を太さ width（KanjiVG 座標）で塗った被覆率 (size, size)"""
+    scale = size / CANVAS_SIZE
+    radius = width * scale / 2
+    segments = [
+        np.stack([line[:-1], line[1:]], axis=1) if len(line) > 1 else np.stack([line, line], axis=1)
+        for line in polylines
+    ]
+    coverage = np.zeros(size * size, dtype=np.float32)
+    if not segments:
+        return coverage.reshape(size, size)
+    segments = (np.concatenate(segments) * scale).astype(np.float32)  # (S, 2 点, xy)
+    a, b = segments[:, 0], segments[:, 1]
+
+    # 各線分の周囲の正方形（全線分で同じ大きさ）のピクセルについて線分までの距離を求める
+    reach = int(np.ceil(np.abs(b - a).max() + radius + 1))
+    offsets = np.arange(-int(np.ceil(radius)) - 1, reach + 1)
+    origin = np.floor(np.minimum(a, b)).astype(np.int64)  # (S, 2)
+    px = origin[:, 0, None, None] + offsets[None, None, :]
+    py = origin[:, 1, None, None] + offsets[None, :, None]
+    px, py = np.broadcast_arrays(px, py)
+
+    ab = b - a
+    length2 = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+    cx = (px + 0.5).astype(np.float32) - a[:, 0, None, None]
+    cy = (py + 0.5).astype(np.float32) - a[:, 1, None, None]
+    t = np.clip((cx * ab[:, 0, None, None] + cy * ab[:, 1, None, None]) / length2[:, None, None], 0, 1)
+    distance = np.hypot(cx - t * ab[:, 0, None, None], cy - t * ab[:, 1, None, None])
+    alpha = np.clip(np.float32(radius + 0.5) - distance, 0, 1)
+
+    inside = (px >= 0) & (px < size) & (py >= 0) & (py < size) & (alpha > 0)
+    np.maximum.at(coverage, (py[inside] * size + px[inside]), alpha[inside])
+    return coverage.reshape(size, size)
+
+
+def render_card(polylines: list, template: dict, base: np.ndarray = None) -> np.ndarray:
+    """1枚分の RGB 画像 (height, width, 3) uint8（背景と筆画のみ）"""
+    image = (background(template) if base is None else base).copy()
+    size = template["glyphSize"]
+    top = (template["height"] - size) // 2
+    left = (template["width"] - size) // 2
+    alpha = stroke_coverage(polylines, size, template["strokeWidth"])[..., None]
+    ink = np.array(template["ink"], dtype=np.float32)
+    # 背景と重ねるのは文字の領域だけ
+    region = image[top:top + size, left:left + size].astype(np.float32)
+    image[top:top + size, left:left + size] = np.round(region + (ink - region) * alpha)
+    return image
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(image: np.ndarray, level: int = 6) -> bytes:
+    """RGB 画像を PNG（フィルタなし・zlib 圧縮）にする"""
+    height, width, _ = image.shape
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    # 各行の先頭にフィルタ種別 0（None）を付ける
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+    return (
+        PNG_SIGNATURE
+        + png_chunk(b"IHDR", header)
+        + png_chunk(b"IDAT", zlib.compress(rows.tobytes(), level))
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def init_render_worker(template: dict):
+    """ワーカープロセスごとに背景を1回だけ作る"""
+    global _worker_template, _worker_background
+    _worker_template = template
+    _worker_background = background(template)
+
+
+def render_file(args: tuple) -> str:
+    """ワーカープロセス内で1枚描いて書き出す"""
+    svg_path, output_path = args
+    image = render_card(stroke_polylines(svg_path), _worker_template, _worker_background)
+    Path(output_path).write_bytes(encode_png(image))
+    return Path(svg_path).stem
+
+
+def load_manifest(output_dir: Path) -> dict:
+    path = output_dir / MANIFEST_NAME
+    if not path.exists():
+        return {"cards": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_cards(svg_paths: list, output_dir: Path, template: dict = TEMPLATE, workers: int = None,
+                force: bool = False) -> dict:
+    """ハッシュが変わったカードだけを描き直し、manifest.json を更新する
+
+    戻り値: {"rendered": 描いた枚数, "cached": 再利用した枚数, "removed": 消した枚数}
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = load_manifest(output_dir)["cards"]
+
+    cards, tasks = {}, []
+    for svg_path in svg_paths:
+        ucs_hex = svg_path.stem
+        digest = card_hash(svg_path.read_bytes(), template)
+        file_name = f"{ucs_hex}.png"
+        cards[ucs_hex] = {"kanji": chr(int(ucs_hex, 16)), "file": file_name, "hash": digest}
+        cached = previous.get(ucs_hex)
+        if force or cached is None or cached["hash"] != digest or not (output_dir / file_name).exists():
+            tasks.append((svg_path, output_dir / file_name))
+
+    workers = workers or os.cpu_count() or 1
+    if tasks and workers == 1:
+        init_render_worker(template)
+        for task in tasks:
+            render_file(task)
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker,
+                                 initargs=(template,)) as pool:
+            list(pool.map(render_file, tasks, chunksize=8))
+
+    # SVG がなくなったカードは消す
+    removed = 0
+    for ucs_hex, card in previous.items():
+        if ucs_hex not in cards:
+            (output_dir / card["file"]).unlink(missing_ok=True)
+            removed += 1
+
+    manifest = {"version": RENDERER_VERSION, "variant": VARIANT, "template": template, "cards": cards}
+    with open(output_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    return {"rendered": len(tasks), "cached": len(cards) - len(tasks), "removed": removed}
+
+
+def run_benchmark(svg_paths: list, workers: int = None):
+    """一時ディレクトリで初回ビルドと変更なしの再ビルドの時間を計測"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        for label in ("cold build", "no-change rebuild"):
+            start = time.perf_counter()
+            stats = build_cards(svg_paths, output_dir, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"    {label:<18} {elapsed:>7.2f}s  (rendered {stats['rendered']}, cached {stats['cached']})")
+        total = sum(p.stat().st_size for p in output_dir.glob("*.png"))
+        print(f"    {len(svg_paths)} cards, {total / 2**20:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render static strokes-only OG card PNGs from KanjiVG strokes")
+    parser.add_argument("--output", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-render every card")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N SVG files (for testing)")
+    parser.add_argument("--benchmark", action="store_true", help="time a cold build and a no-change rebuild")
+    args = parser.parse_args()
+
+    svg_paths = sorted(KANJIVG_DIR.glob("*.svg"))[:args.limit]
+
+    if args.benchmark:
+        print(f"[*] Benchmark ({len(svg_paths)} cards, {args.workers or os.cpu_count()} workers)")
+        run_benchmark(svg_paths, args.workers)
+        return
+
+    print(f"[*] Rendering OG cards for {len(svg_paths)} kanji...")
+    start = time.perf_counter()
+    stats = build_cards(svg_paths, args.output, workers=args.workers, force=args.force)
+    elapsed = time.perf_counter() - start
+    print(f"    Rendered: {stats['rendered']}, cached: {stats['cached']}, removed: {stats['removed']}")
+    print(f"    Elapsed: {elapsed:.2f}s")
+    print(f"[*] Saving: {args.output}")
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
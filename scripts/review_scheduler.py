@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+書き取りテストの履歴から、全ユーザーの次に練習する漢字（復習キュー）を計算するスクリプト
+
+入力: stroke_tests のエクスポート（stroke_test_analytics.py と同じ CSV / NDJSON）, data/kanji-joyo.json
+状態: data/review-scheduler-state.npz（ユーザー x 漢字ごとの復習の状態と入力ごとの読み終えた位置）
+出力: data/review-queues.ndjson（1行1ユーザー）
+  {"userId": "...", "reviews": ["水", ...], "new": ["木", ...]}
+  reviews は期限の来た復習（期限を過ぎた割合の大きい順）、残りの枠は未学習の漢字を
+  易しい順（学年・画数）で埋める。
+
+スケジュールは SM-2 方式。点数（0-100）を 0〜5 の評価に換算し、3 以上なら間隔を
+1日 -> 6日 -> 間隔 x 易しさ係数 と延ばし、2 以下なら 1日に戻す。同じ日に同じ漢字を
+何度テストしても、復習として数えるのはその日の最初の1回だけ。
+漢字の難しさ（学年と画数を 0〜1 にしたもの）が大きいほど易しさ係数の初期値を下げ、
+間隔が延びにくくする。
+
+全ユーザーの組を1つの配列にまとめ、組ごとの k 回目の復習を k 回目のラウンドとして
+一括で更新する（ラウンド数は1回の取り込みで1組が受けた復習の最大回数）。
+キューも lexsort と組の中での順位で全ユーザー分をまとめて作る。
+状態は追記された行だけを読んで更新する（stroke_test_analytics.py と同じ方式）。
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/review_scheduler.py exports/stroke_tests-*.csv.gz
+  python scripts/review_scheduler.py exports/stroke_tests.csv --size 20 --as-of 2026-10-19
+  python scripts/review_scheduler.py exports/stroke_tests.csv --changed-only     新しいテストのあったユーザーだけ出力
+  python scripts/review_scheduler.py --benchmark
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from stroke_test_analytics import CODE_BITS, CODE_MASK, EPOCH, SECONDS_PER_DAY, ingest, intern_users
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+STATE_PATH = DATA_DIR / "review-scheduler-state.npz"
+OUTPUT_PATH = DATA_DIR / "review-queues.ndjson"
+
+QUEUE_SIZE = 10
+
+# SM-2 のパラメータ
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+PASS_QUALITY = 3
+FIRST_INTERVALS = (1, 6)
+# 最も難しい漢字で易しさ係数の初期値を下げる量
+EASE_DIFFICULTY = 0.8
+# 難しさ = 学年と画数を 0〜1 にした値の重み付き和（常用外の漢字は 1）
+DIFFICULTY_WEIGHTS = {"grade": 0.5, "strokes": 0.5}
+
+CARD_COLUMNS = ("ease", "interval", "reps", "lapses", "last", "due")
+
+
+class SchedulerState:
+    """ユーザー x 漢字の組（カード）ごとの SM-2 の状態"""
+
+    def __init__(self, difficulty: np.ndarray):
+        self.difficulty = difficulty
+        self.users = []
+        self.user_index = {}
+        self.card_keys = np.zeros(0, dtype=np.int64)
+        self.cards = {name: np.zeros(0) for name in CARD_COLUMNS}
+        self.sources = {}
+        self.rows = 0
+        self.changed = set()
+
+    @classmethod
+    def load(cls, path: Path, difficulty: np.ndarray) -> "SchedulerState":
+        state = cls(difficulty)
+        if not path.exists():
+            return state
+        with np.load(path, allow_pickle=False) as data:
+            state.users = data["users"].tolist()
+            state.user_index = {user: i for i, user in enumerate(state.users)}
+            state.card_keys = data["card_keys"]
+            state.cards = {name: data[f"card_{name}"] for name in CARD_COLUMNS}
+            meta = json.loads(str(data["meta"]))
+        state.sources = meta["sources"]
+        state.rows = meta["rows"]
+        return state
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "users": np.array(self.users, dtype=str),
+            "card_keys": self.card_keys,
+            "meta": np.array(json.dumps({"sources": self.sources, "rows": self.rows})),
+            **{f"card_{name}": values for name, values in self.cards.items()},
+        }
+        temp = path.with_suffix(".tmp.npz")
+        np.savez(temp, **arrays)
+        temp.replace(path)
+
+    def intern_users(self, names: np.ndarray) -> np.ndarray:
+        return intern_users(self.users, self.user_index, names)
+
+    def add(self, columns):
+        """1チャンク分のテストを復習として反映する（user_id のない行は使わない）"""
+        known = columns.user >= 0
+        self.rows += len(columns.score)
+        if not known.any():
+            return
+        user, code = columns.user[known], columns.code[known]
+        self.card_keys, self.cards = apply_reviews(
+            self.card_keys, self.cards, (user << CODE_BITS) | code,
+            columns.score[known], columns.day[known], self.difficulty,
+        )
+        self.changed.update(np.unique(user).tolist())
+
+
+def load_difficulty(path: Path = KANJI_JOYO_PATH) -> tuple:
+    """(コードポイント -> 難しさ の配列, 易しい順の常用漢字のコードポイント)
+
+    配列の末尾は範囲外のコードポイント（常用外）用の番兵で難しさ 1。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    codes = np.array([ord(e["kanji"]) for e in entries], dtype=np.int64)
+    grades = np.array([e["grade"] for e in entries], dtype=np.float64)
+    strokes = np.array([e["strokes"] for e in entries], dtype=np.float64)
+    scaled = (
+        DIFFICULTY_WEIGHTS["grade"] * (grades - grades.min()) / max(np.ptp(grades), 1)
+        + DIFFICULTY_WEIGHTS["strokes"] * (strokes - strokes.min()) / max(np.ptp(strokes), 1)
+    )
+    difficulty = np.ones(codes.max() + 2)
+    difficulty[codes] = scaled
+    return difficulty, codes[np.lexsort((codes, strokes, grades))]
+
+
+def quality(score: np.ndarray) -> np.ndarray:
+    """点数（0-100）-> SM-2 の評価（0〜5）"""
+    return np.clip(np.floor(score / 20 + 0.5), 0, 5)
+
+
+def apply_reviews(keys: np.ndarray, cards: dict, review_keys: np.ndarray, score: np.ndarray, day: np.ndarray,
+                  difficulty: np.ndarray) -> tuple:
+    """カードの状態に復習を順に反映する（新しい組はカードを作る）"""
+    # 組ごと・時刻順に並べ、各組の日ごとの最初のテストだけを残す
+    day_index = np.floor(day).astype(np.int64)
+    order = np.lexsort((day, review_keys))
+    review_keys, score, day_index = review_keys[order], score[order], day_index[order]
+    first = np.ones(len(review_keys), dtype=bool)
+    first[1:] = (review_keys[1:] != review_keys[:-1]) | (day_index[1:] != day_index[:-1])
+    review_keys, score, day_index = review_keys[first], score[first], day_index[first]
+    # 前回までの取り込みで同じ日に復習済みのカードも除く
+    if len(keys):
+        at = np.minimum(np.searchsorted(keys, review_keys), len(keys) - 1)
+        later = (keys[at] != review_keys) | (day_index > cards["last"][at])
+        review_keys, score, day_index = review_keys[later], score[later], day_index[later]
+
+    new_keys, starts, counts = np.unique(review_keys, return_index=True, return_counts=True)
+    rounds = np.arange(len(review_keys)) - np.repeat(starts, counts)
+
+    # 新しい組だけを挿入位置に差し込む（全体を並べ直さない）
+    missing = new_keys[~contains(keys, new_keys)]
+    insert_at = np.searchsorted(keys, missing)
+    merged = np.insert(keys, insert_at, missing)
+    result = {name: np.insert(cards[name], insert_at, 0.0) for name in CARD_COLUMNS}
+    created = insert_at + np.arange(len(missing))
+    codes = np.minimum(missing & CODE_MASK, len(difficulty) - 1)
+    result["ease"][created] = INITIAL_EASE - EASE_DIFFICULTY * difficulty[codes]
+
+    position = np.searchsorted(merged, review_keys)
+    q = quality(score)
+    ease, interval, reps, lapses = result["ease"], result["interval"], result["reps"], result["lapses"]
+    # 1ラウンドの中では各カードが1回ずつしか現れないので、添字で一括更新できる
+    by_round = np.argsort(rounds, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(rounds))]) if len(rounds) else [0]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        selected = by_round[lo:hi]
+        at, grade = position[selected], q[selected]
+        passed = grade >= PASS_QUALITY
+        ease[at] = np.maximum(MIN_EASE, ease[at] + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+        lapses[at] += ~passed & (reps[at] > 0)
+        next_reps = np.where(passed, reps[at] + 1, 0)
+        interval[at] = np.where(
+            next_reps == 1, FIRST_INTERVALS[0],
+            np.where(next_reps == 2, FIRST_INTERVALS[1], np.round(interval[at] * ease[at])),
+        )
+        interval[at] = np.where(passed, interval[at], FIRST_INTERVALS[0])
+        reps[at] = next_reps
+        result["last"][at] = day_index[selected]
+        result["due"][at] = day_index[selected] + interval[at]
+    return merged, result
+
+
+def build_queues(state: SchedulerState, new_order: np.ndarray, today: int, size: int = QUEUE_SIZE,
+                 users: np.ndarray = None) -> tuple:
+    """全ユーザーのキュー (ユーザー番号, 期限の来た復習の行列, 未学習の漢字の行列)
+
+    行列は (ユーザー数, size) のコードポイントで、空きは -1。
+    """
+    user_count = len(state.users)
+    users = np.arange(user_count) if users is None else np.asarray(users, dtype=np.int64)
+    wanted = np.zeros(user_count, dtype=bool)
+    wanted[users] = True
+    row_of = np.full(user_count, -1)
+    row_of[users] = np.arange(len(users))
+
+    owner = state.card_keys >> CODE_BITS
+    code = state.card_keys & CODE_MASK
+    due, interval = state.cards["due"], state.cards["interval"]
+
+    # 期限の来たカードを、期限を過ぎた日数 / 間隔 の大きい順に
+    ready = np.nonzero((due <= today) & wanted[owner])[0]
+    overdue = (today - due[ready]) / np.maximum(interval[ready], 1)
+    # カードはユーザー・漢字順に並んでいるので、ユーザー番号に (0, 0.5] の小数を足した
+    # 1つのキーの安定ソートで「ユーザーごとに期限切れの割合が大きい順（同じなら漢字順）」になる
+    ready = ready[np.argsort(owner[ready] + 1 / (2 + overdue), kind="stable")]
+    reviews = np.full((len(users), size), -1, dtype=np.int64)
+    rank = rank_in_groups(owner[ready])
+    keep = rank < size
+    reviews[row_of[owner[ready][keep]], rank[keep]] = code[ready][keep]
+    review_count = np.minimum(np.bincount(owner[ready], minlength=user_count)[users], size)
+
+    # 残りの枠を未学習の漢字で埋める。候補は易しい順の先頭から
+    # (空き枠 + そのユーザーのカード数) 個あれば、学習済みを除いても足りる
+    cards = np.bincount(owner, minlength=user_count)[users]
+    need = size - review_count
+    span = np.minimum(need + cards, len(new_order)) * (need > 0)
+    candidate_user = np.repeat(users, span)
+    candidate = new_order[rank_in_groups(candidate_user)]
+    seen = contains(state.card_keys, (candidate_user << CODE_BITS) | candidate)
+    candidate_user, candidate = candidate_user[~seen], candidate[~seen]
+    rank = rank_in_groups(candidate_user)
+    keep = rank < need[row_of[candidate_user]]
+    fresh = np.full((len(users), size), -1, dtype=np.int64)
+    fresh[row_of[candidate_user[keep]], rank[keep]] = candidate[keep]
+    return users, reviews, fresh
+
+
+def contains(sorted_keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """values の各要素がソート済みの sorted_keys にあるか"""
+    if not len(sorted_keys):
+        return np.zeros(len(values), dtype=bool)
+    position = np.minimum(np.searchsorted(sorted_keys, values), len(sorted_keys) - 1)
+    return sorted_keys[position] == values
+
+
+def rank_in_groups(groups: np.ndarray) -> np.ndarray:
+    """昇順に並んだグループ番号の配列で、各要素のグループ内での順番（0 始まり）"""
+    if not len(groups):
+        return np.zeros(0, dtype=np.int64)
+    starts = np.ones(len(groups), dtype=bool)
+    starts[1:] = groups[1:] != groups[:-1]
+    start_index = np.nonzero(starts)[0]
+    return np.arange(len(groups)) - np.repeat(start_index, np.diff(np.append(start_index, len(groups))))
+
+
+def write_queues(path: Path, state: SchedulerState, users: np.ndarray, reviews: np.ndarray, fresh: np.ndarray) -> int:
+    """キューを NDJSON で書き出し、書いた行数を返す"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for user, review_row, new_row in zip(users.tolist(), reviews.tolist(), fresh.tolist()):
+            f.write(json.dumps({
+                "userId": state.users[user],
+                "reviews": [chr(c) for c in review_row if c >= 0],
+                "new": [chr(c) for c in new_row if c >= 0],
+            }, ensure_ascii=False) + "\n")
+    return len(users)
+
+
+def today_index(as_of=None) -> int:
+    """基準日（stroke_test_analytics.EPOCH）からの日数"""
+    moment = np.datetime64(as_of or np.datetime64("now", "s"), "s")
+    return int((moment - EPOCH).astype(np.int64) // SECONDS_PER_DAY)
+
+
+def run_benchmark(difficulty: np.ndarray, new_order: np.ndarray, users: int = 1_000_000, tests: int = 8,
+                  seed: int = 0):
+    """users 人がそれぞれ平均 tests 回テストした履歴から、状態の更新とキュー作成の時間を計測"""
+    rng = np.random.default_rng(seed)
+    count = users * tests
+    user = rng.integers(0, users, count)
+    # 易しい漢字ほど選ばれやすい（Zipf 風）
+    code = new_order[np.minimum(rng.zipf(1.3, count) - 1, len(new_order) - 1)]
+    day = np.sort(rng.uniform(0, 60, count))
+    score = np.clip(rng.normal(90 - difficulty[code] * 40, 15), 0, 100)
+
+    state = SchedulerState(difficulty)
+    state.users = [f"user-{i}" for i in range(users)]
+    start = time.perf_counter()
+    state.card_keys, state.cards = apply_reviews(
+        state.card_keys, state.cards, (user << CODE_BITS) | code, score, day, difficulty
+    )
+    elapsed = time.perf_counter() - start
+    print(f"    {'apply (cold)':<22} {elapsed:>7.2f}s  {count:,} tests -> {len(state.card_keys):,} cards")
+
+    # 翌日: 1割のユーザーが1回ずつテストした分だけ反映
+    changed = rng.choice(users, users // 10, replace=False)
+    extra_code = new_order[np.minimum(rng.zipf(1.3, len(changed)) - 1, len(new_order) - 1)]
+    start = time.perf_counter()
+    state.card_keys, state.cards = apply_reviews(
+        state.card_keys, state.cards, (changed << CODE_BITS) | extra_code,
+        np.full(len(changed), 85.0), np.full(len(changed), 60.5), difficulty,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"    {'apply (+10% users)':<22} {elapsed:>7.2f}s  {len(changed):,} tests")
+
+    start = time.perf_counter()
+    queue_users, reviews, fresh = build_queues(state, new_order, today=61)
+    elapsed = time.perf_counter() - start
+    filled = int((reviews >= 0).sum() + (fresh >= 0).sum())
+    print(f"    {'queues':<22} {elapsed:>7.2f}s  {len(queue_users):,} users, {filled / len(queue_users):.1f} kanji each")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute next-review kanji queues for every user (SM-2)")
+    parser.add_argument("inputs", type=Path, nargs="*", help="CSV / NDJSON exports of stroke_tests")
+    parser.add_argument("--state", type=Path, default=STATE_PATH, help=f"scheduler state (default: {STATE_PATH})")
+    parser.add_argument("--rebuild", action="store_true", help="discard the saved state and start over")
+    parser.add_argument("--size", type=int, default=QUEUE_SIZE, help="kanji per queue")
+    parser.add_argument("--as-of", default=None, help="day the queues are for (YYYY-MM-DD, default: today UTC)")
+    parser.add_argument("--changed-only", action="store_true", help="only write users with new tests")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--benchmark", action="store_true", help="time scheduling of 1M synthetic users")
+    args = parser.parse_args()
+
+    difficulty, new_order = load_difficulty()
+
+    if args.benchmark:
+        print("[*] Benchmark")
+        run_benchmark(difficulty, new_order)
+        return
+
+    state = SchedulerState(difficulty) if args.rebuild else SchedulerState.load(args.state, difficulty)
+    start = time.perf_counter()
+    for path in args.inputs:
+        processed, skipped = ingest(state, path)
+        print(f"[*] {path}: {processed} new rows")
+        if skipped:
+            print(f"Warning: {path}: skipped {skipped} malformed rows")
+    state.save(args.state)
+
+    users = sorted(state.changed) if args.changed_only else None
+    queue_users, reviews, fresh = build_queues(state, new_order, today_index(args.as_of), args.size, users)
+    elapsed = time.perf_counter() - start
+    print(f"    Users: {len(state.users)}, cards: {len(state.card_keys)}, "
+          f"due reviews: {int((reviews >= 0).sum())}")
+    print(f"    Elapsed: {elapsed:.2f}s")
+
+    print(f"[*] Saving: {args.output}")
+    write_queues(args.output, state, queue_users, reviews, fresh)
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+閲覧イベントを日別の閲覧数に集計し、週間・月間・半年のランキングを書き出すスクリプト
+
+入力: 閲覧イベントのエクスポート（CSV / NDJSON、.gz/.bz2/.xz 可、SQLite の view_events テーブル）
+集計: data/kanji-views.sqlite（daily_views: 日 x 漢字の閲覧数）
+出力: src/data/rankingSnapshots.json
+
+kanji_views テーブル（migration 001）は漢字ごとの累計しか持たないため、期間別の
+ランキングはイベント単位のエクスポートから作る。イベントは1行ずつ読み、
+(日, 漢字) ごとの件数にまとめてから SQLite に加算する。ファイルごとに読み終えた
+位置（SQLite の入力は rowid）を記録するので、次回は追記された分だけを処理する。
+加算と位置の記録は同じトランザクションで行う。
+
+イベントの形式（列名・キー名）:
+  CSV   : ヘッダー行に kanji と viewed_at（または created_at / timestamp）
+  NDJSON: {"kanji": "水", "viewed_at": "2026-10-19T07:00:00Z"}
+  SQLite: view_events(kanji, viewed_at)
+viewed_at は ISO 8601 か UNIX 時刻（秒・ミリ秒）。日の区切りは日本時間。
+漢字が空・時刻が空か読めない・JSON や CSV として壊れている行は数えて読み飛ばす
+（読み終えた位置は進めるので、次回以降も同じ行で止まらない）。
+
+rankingSnapshots.json の形式:
+  {"asOf": "2026-10-19", "periods": {"week": {"since": "2026-10-13", "ranking": [{"kanji", "views"}, ...],
+                                               "positions": {"水": 1, ...}}, "month": ..., "half": ...}}
+positions は期間内に閲覧された全漢字の順位（1 始まり）で、表示側は O(1) で引ける。
+
+使用方法:
+  python scripts/rollup_kanji_views.py exports/views-*.ndjson.gz
+  python scripts/rollup_kanji_views.py exports/events.sqlite --as-of 2026-10-19
+  python scripts/rollup_kanji_views.py --benchmark
+"""
+
+import argparse
+import csv
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from corpus_sources import open_binary
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DB_PATH = PROJECT_ROOT / "data" / "kanji-views.sqlite"
+SNAPSHOT_PATH = PROJECT_ROOT / "src" / "data" / "rankingSnapshots.json"
+
+# 期間名（rankingUtils.ts の period と同じ）-> 日数
+PERIODS = {"week": 7, "month": 30, "half": 182}
+RANKING_SIZE = 100
+# この件数ごとに SQLite に加算する
+FLUSH_EVENTS = 100_000
+
+JST = timezone(timedelta(hours=9))
+TIMESTAMP_KEYS = ("viewed_at", "created_at", "timestamp")
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_views (
+  day TEXT NOT NULL,
+  kanji TEXT NOT NULL,
+  views INTEGER NOT NULL,
+  PRIMARY KEY (day, kanji)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingested_sources (
+  path TEXT PRIMARY KEY,
+  position INTEGER NOT NULL,
+  events INTEGER NOT NULL,
+  updated_at TEXT NOT NULL
+);
+"""
+
+
+def event_day(value) -> str:
+    """タイムスタンプ -> 日本時間の日付（YYYY-MM-DD）"""
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.replace(".", "", 1).isdigit()):
+        seconds = float(value)
+        if seconds > 1e11:  # ミリ秒
+            seconds /= 1000
+        moment = datetime.fromtimestamp(seconds, tz=timezone.utc)
+    else:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(JST).date().isoformat()
+
+
+def parse_event(kanji, timestamp):
+    """(漢字, タイムスタンプ) -> (日, 漢字)。漢字が空か、タイムスタンプが空・不正なら None"""
+    if not isinstance(kanji, str) or not kanji.strip():
+        return None
+    try:
+        return event_day(timestamp), kanji
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def parse_line(line: str, is_csv: bool, kanji_index: int = None, time_index: int = None):
+    """エクスポートの1行 -> (日, 漢字)。壊れた行は None"""
+    if is_csv:
+        fields = line.split(",") if '"' not in line else next(csv.reader([line]), [])
+        if len(fields) <= max(kanji_index, time_index):
+            return None
+        return parse_event(fields[kanji_index], fields[time_index])
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    timestamp = next((record[k] for k in TIMESTAMP_KEYS if record.get(k) not in (None, "")), None)
+    return parse_event(record.get("kanji"), timestamp)
+
+
+def iter_file_events(path: Path, position: int):
+    """テキストのエクスポートから position バイト目以降の (位置, (日, 漢字) か None) を返す
+
+    位置は読み終えた行の末尾。書き込み途中の最後の行（改行なし）は次回に回す。
+    """
+    with open_binary(path) as stream:
+        header = stream.readline()
+        if not header.endswith(b"\n"):
+            return
+        is_csv = not header.lstrip().startswith(b"{")
+        kanji_index = time_index = None
+        if is_csv:
+            columns = next(csv.reader([header.decode("utf-8-sig")]))
+            kanji_index = columns.index("kanji")
+            time_index = next((columns.index(k) for k in TIMESTAMP_KEYS if k in columns), None)
+            if time_index is None:
+                raise ValueError(f"{path}: no timestamp column ({', '.join(TIMESTAMP_KEYS)})")
+            if position < len(header):
+                position = len(header)
+            else:
+                stream.seek(position)
+        else:
+            # NDJSON には見出しがないので、1行目もイベントとして読む
+            stream.seek(position)
+
+        for raw in stream:
+            if not raw.endswith(b"\n"):
+                break
+            position += len(raw)
+            try:
+                line = raw.decode("utf-8").strip()
+            except UnicodeDecodeError:
+                yield position, None
+                continue
+            if not line:
+                continue
+            yield position, parse_line(line, is_csv, kanji_index, time_index)
+
+
+def iter_sqlite_events(path: Path, position: int):
+    """SQLite の view_events から rowid が position より大きい (rowid, (日, 漢字) か None) を返す"""
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = source.execute(
+            "SELECT rowid, kanji, viewed_at FROM view_events WHERE rowid > ? ORDER BY rowid", (position,)
+        )
+        for rowid, kanji, viewed_at in rows:
+            yield rowid, parse_event(kanji, viewed_at)
+    finally:
+        source.close()
+
+
+def connect(db_path: Path = DB_PATH) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(db_path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def flush(db: sqlite3.Connection, counts: Counter):
+    db.executemany(
+        "INSERT INTO daily_views (day, kanji, views) VALUES (?, ?, ?) "
+        "ON CONFLICT (day, kanji) DO UPDATE SET views = views + excluded.views",
+        [(day, kanji, views) for (day, kanji), views in counts.items()],
+    )
+    counts.clear()
+
+
+def ingest(db: sqlite3.Connection, path: Path) -> tuple:
+    """1つの入力の新しいイベントを日別の閲覧数に加算し、(加算した件数, 読み飛ばした壊れた行の数) を返す"""
+    key = str(path.resolve())
+    row = db.execute("SELECT position, events FROM ingested_sources WHERE path = ?", (key,)).fetchone()
+    position, total = row if row else (0, 0)
+
+    is_sqlite = path.suffix.lower() in SQLITE_SUFFIXES
+    if not is_sqlite and path.stat().st_size < position and path.suffix.lower() not in (".gz", ".bz2", ".xz"):
+        print(f"Warning: {path} is shorter than the last ingested position; skipped (exports must be append-only)")
+        return 0, 0
+
+    events = iter_sqlite_events(path, position) if is_sqlite else iter_file_events(path, position)
+    counts = Counter()
+    processed = skipped = 0
+    with db:
+        for position, event in events:
+            if event is None:
+                skipped += 1
+                continue
+            counts[event] += 1
+            processed += 1
+            if processed % FLUSH_EVENTS == 0:
+                flush(db, counts)
+        flush(db, counts)
+        db.execute(
+            "INSERT INTO ingested_sources (path, position, events, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (path) DO UPDATE SET position = excluded.position, events = excluded.events, "
+            "updated_at = excluded.updated_at",
+            (key, position, total + processed, datetime.now(timezone.utc).isoformat()),
+        )
+    return processed, skipped
+
+
+def latest_day(db: sqlite3.Connection):
+    row = db.execute("SELECT MAX(day) FROM daily_views").fetchone()
+    return date.fromisoformat(row[0]) if row and row[0] else None
+
+
+def build_snapshots(db: sqlite3.Connection, as_of: date = None, size: int = RANKING_SIZE) -> dict:
+    """期間ごとのランキング（上位 size 件）と全漢字の順位"""
+    as_of = as_of or latest_day(db)
+    if as_of is None:
+        return {"asOf": None, "periods": {}}
+
+    periods = {}
+    for name, days in PERIODS.items():
+        since = as_of - timedelta(days=days - 1)
+        rows = db.execute(
+            "SELECT kanji, SUM(views) AS total FROM daily_views WHERE day BETWEEN ? AND ? "
+            "GROUP BY kanji ORDER BY total DESC, kanji",
+            (since.isoformat(), as_of.isoformat()),
+        ).fetchall()
+        periods[name] = {
+            "since": since.isoformat(),
+            "ranking": [{"kanji": kanji, "views": views} for kanji, views in rows[:size]],
+            "positions": {kanji: rank for rank, (kanji, _) in enumerate(rows, start=1)},
+        }
+    return {"asOf": as_of.isoformat(), "periods": periods}
+
+
+def write_synthetic_events(path: Path, kanji: list, count: int, start: datetime, seed: int = 0, append: bool = False):
+    """Zipf 分布で漢字を選んだ NDJSON の閲覧イベント（2秒間隔）"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(kanji))]
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for i, k in enumerate(rng.choices(kanji, weights=weights, k=count)):
+            moment = start + timedelta(seconds=i * 2)
+            f.write(json.dumps({"kanji": k, "viewed_at": moment.isoformat()}, ensure_ascii=False) + "\n")
+
+
+def run_benchmark(kanji: list, count: int = 1_000_000, seed: int = 0):
+    """初回の取り込み・変更なし・追記分だけの取り込み・スナップショット作成の時間"""
+    with tempfile.TemporaryDirectory() as tmp:
+        events = Path(tmp) / "events.ndjson"
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        write_synthetic_events(events, kanji, count, start, seed)
+        db = connect(Path(tmp) / "rollup.sqlite")
+
+        def timed(label: str, func):
+            begin = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - begin
+            print(f"    {label:<22} {elapsed:>7.2f}s  {result}")
+
+        timed("ingest (cold)", lambda: f"{ingest(db, events)[0]:,} events")
+        timed("ingest (no change)", lambda: f"{ingest(db, events)[0]:,} events")
+        write_synthetic_events(events, kanji, count // 10, start + timedelta(seconds=count * 2), seed + 1, append=True)
+        timed("ingest (+10% appended)", lambda: f"{ingest(db, events)[0]:,} events")
+        timed("snapshots", lambda: f"{len(build_snapshots(db)['periods']['half']['positions'])} kanji in half")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up kanji view events into period rankings")
+    parser.add_argument("inputs", type=Path, nargs="*", help="CSV / NDJSON exports or SQLite files with view_events")
+    parser.add_argument("--db", type=Path, default=DB_PATH, help=f"rollup database (default: {DB_PATH})")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="last day of every period (default: latest day with events)")
+    parser.add_argument("--size", type=int, default=RANKING_SIZE, help="ranking entries per period")
+    parser.add_argument("--output", type=Path, default=SNAPSHOT_PATH)
+    parser.add_argument("--benchmark", action="store_true", help="time ingestion of 1M synthetic events")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        with open(PROJECT_ROOT / "data" / "kanji-joyo.json", "r", encoding="utf-8") as f:
+            kanji = [k["kanji"] for k in json.load(f)]
+        print("[*] Benchmark")
+        run_benchmark(kanji)
+        return
+
+    db = connect(args.db)
+    start = time.perf_counter()
+    for path in args.inputs:
+        processed, skipped = ingest(db, path)
+        print(f"[*] {path}: {processed} new events")
+        if skipped:
+            print(f"Warning: {path}: skipped {skipped} malformed rows (empty kanji or invalid timestamp)")
+    elapsed = time.perf_counter() - start
+
+    snapshots = build_snapshots(db, args.as_of, args.size)
+    db.close()
+    for name, period in snapshots["periods"].items():
+        print(f"    {name:<5} since {period['since']}: {len(period['positions'])} kanji")
+    print(f"    Elapsed: {elapsed:.2f}s")
+
+    print(f"[*] Saving: {args.output}")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(snapshots, f, ensure_ascii=False, indent=2)
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+書き取りテストをサーバー側で一括採点するスクリプト
+
+入力: 提出データ（NDJSON、1行1提出）
+  {"id": "...", "kanji_code": "u6c34", "strokes": [[[x, y], ...], ...], "score": 75}
+  座標は KanjiVG と同じ 109x109 の座標系。"size" を指定するとその辺長から換算する。
+出力: 採点結果（NDJSON）
+  採点できない提出（空のストローク・不明な kanji_code・壊れた行など）は1件だけ
+  score 0 とし、"error" に理由を入れて返す（同じバッチの他の提出は通常どおり採点する）。
+
+参照ストロークは public/kanjivg-geometry.bin（なければ public/kanjivg/*.svg）から読み込む。
+ユーザーと参照のストロークを同じ点数にリサンプリングし、画数・書き順・方向・形状
+（DTW 距離）を提出とストロークの両方向にまとめてベクトル化して計算する。
+
+count_score は src/lib/calcStrokeScore.ts と同じ計算式で、score はそれに
+書き順・方向・形状の一致度を掛け合わせた値（完全一致なら両者とも100点）。
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/score_stroke_tests.py submissions.ndjson -o results.ndjson
+  python scripts/score_stroke_tests.py --benchmark
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from kanjivg_geometry import (
+    CANVAS_SIZE,
+    DEFAULT_POINTS,
+    KANJIVG_DIR,
+    OUTPUT_PATH as GEOMETRY_PATH,
+    StrokeGeometry,
+    resample,
+    stroke_polylines,
+)
+
+# 各指標の重み（合計1）
+W_SHAPE = 0.4
+W_ORDER = 0.3
+W_DIRECTION = 0.3
+
+# DTW 平均距離をスコアに換算する尺度（KanjiVG 座標系での距離）
+SHAPE_TOLERANCE = 8.0
+
+# DTW を一度に計算するストローク組の数（メモリ上限）
+DTW_BLOCK = 4096
+
+KANJI_CODE_RE = re.compile(r"u[0-9a-fA-F]{1,6}")
+
+
+def calc_stroke_score(user_stroke_count: np.ndarray, correct_stroke_count: np.ndarray) -> np.ndarray:
+    """calcStrokeScore.ts と同じ画数スコア（0-100点）をベクトル化して計算"""
+    user = np.asarray(user_stroke_count, dtype=np.float64)
+    correct = np.asarray(correct_stroke_count, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.minimum(user / correct, correct / user)
+    score = np.where(user == correct, 100.0, np.nan_to_num(ratio, nan=0.0, posinf=0.0) * 100)
+    score = np.where(correct == 0, 0.0, score)
+    # Math.round と同じく 0.5 は切り上げる
+    return np.floor(np.clip(score, 0, 100) + 0.5).astype(np.int64)
+
+
+def resample_batch(strokes: list, count: int = DEFAULT_POINTS) -> np.ndarray:
+    """長さの異なる複数ストロークを一括で弧長リサンプリング -> (S, count, 2)"""
+    if not strokes:
+        return np.zeros((0, count, 2))
+    sizes = np.array([len(s) for s in strokes])
+    if (sizes == 0).any():
+        raise ValueError("empty stroke")
+    # 各ストロークの末尾点を複製して t=1 の番兵にする
+    last = np.cumsum(sizes) - 1
+    points = np.concatenate([np.asarray(s, dtype=np.float64).reshape(-1, 2) for s in strokes])
+    stroke_ids = np.repeat(np.arange(len(strokes)), sizes)
+
+    seg = np.zeros(len(points))
+    seg[1:] = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    seg[np.cumsum(sizes)[:-1]] = 0.0
+    cumulative = np.cumsum(seg)
+    first = last - sizes + 1
+    local = cumulative - cumulative[first][stroke_ids]
+    total = local[last]
+    t = local / np.where(total > 0, total, 1.0)[stroke_ids]
+
+    keys = np.concatenate([stroke_ids * 2 + t, np.arange(len(strokes)) * 2 + 1.0])
+    values = np.concatenate([points, points[last]])
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+
+    targets = (np.arange(len(strokes))[:, None] * 2 + np.linspace(0.0, 1.0, count)[None, :]).ravel()
+    x = np.interp(targets, keys, values[:, 0])
+    y = np.interp(targets, keys, values[:, 1])
+    return np.stack([x, y], axis=1).reshape(len(strokes), count, 2)
+
+
+def batched_dtw(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(P, N, 2) 同士の DTW 距離を反対角線ごとにまとめて計算（平均点間距離）"""
+    pairs, n, _ = a.shape
+    # 累積コストを「反対角線 d = i + j, 行 i」の斜交座標で持ち、
+    # 1つ前・2つ前の対角線をスライス（コピーなし）で参照する
+    rows = np.arange(n + 1)
+    diags = np.arange(2 * n + 1)
+    cols = diags[:, None] - rows[None, :]
+    valid = (rows[None, :] >= 1) & (cols >= 1) & (cols <= n)
+    d_idx, i_idx = np.nonzero(valid)
+    j_idx = cols[d_idx, i_idx]
+
+    result = np.empty(pairs)
+    for lo in range(0, pairs, DTW_BLOCK):
+        hi = min(lo + DTW_BLOCK, pairs)
+        a_t = a[lo:hi].astype(np.float32).transpose(1, 2, 0)  # (N, 2, P)
+        b_t = b[lo:hi].astype(np.float32).transpose(1, 2, 0)
+        dx = a_t[i_idx - 1, 0] - b_t[j_idx - 1, 0]
+        dy = a_t[i_idx - 1, 1] - b_t[j_idx - 1, 1]
+
+        dist = np.full((2 * n + 1, n + 1, hi - lo), np.inf, dtype=np.float32)
+        dist[d_idx, i_idx] = np.sqrt(dx * dx + dy * dy)
+
+        acc = np.full((2 * n + 1, n + 1, hi - lo), np.inf, dtype=np.float32)
+        acc[0, 0] = 0.0
+        for d in range(2, 2 * n + 1):
+            i_lo, i_hi = max(1, d - n), min(n, d - 1)
+            up = acc[d - 1, i_lo - 1:i_hi]        # (i-1, j)
+            left = acc[d - 1, i_lo:i_hi + 1]      # (i, j-1)
+            diagonal = acc[d - 2, i_lo - 1:i_hi]  # (i-1, j-1)
+            acc[d, i_lo:i_hi + 1] = dist[d, i_lo:i_hi + 1] + np.minimum(np.minimum(up, left), diagonal)
+        result[lo:hi] = acc[2 * n, n] / (2 * n)
+    return result
+
+
+class ReferenceStrokes:
+    """漢字コードごとの参照ストローク（リサンプリング済み）"""
+
+    def __init__(self, points: int = DEFAULT_POINTS, geometry_path: Path = GEOMETRY_PATH):
+        self.points = points
+        self.cache = {}
+        self.geometry = None
+        if Path(geometry_path).exists():
+            geometry = StrokeGeometry(geometry_path)
+            if geometry.points_per_stroke == points:
+                self.geometry = geometry
+
+    def get(self, kanji_code: str) -> np.ndarray:
+        if kanji_code not in self.cache:
+            codepoint = int(kanji_code.lstrip("u"), 16)
+            kanji = chr(codepoint)
+            if self.geometry is not None and kanji in self.geometry:
+                strokes = np.asarray(self.geometry.strokes(kanji), dtype=np.float64)
+            else:
+                svg_path = KANJIVG_DIR / f"{codepoint:05x}.svg"
+                strokes = np.array([resample(p, self.points) for p in stroke_polylines(svg_path)])
+            self.cache[kanji_code] = strokes
+        return self.cache[kanji_code]
+
+
+def score_group(user: list, reference: np.ndarray, points: int) -> dict:
+    """同じ漢字の提出群について画数・書き順・方向を一括採点"""
+    batch = len(user)
+    ref_count = len(reference)
+    counts = np.array([len(strokes) for strokes in user])
+    max_count = max(int(counts.max()), 1)
+
+    # ユーザーストロークを (B, max_count, N, 2) に詰める
+    flat = [stroke for strokes in user for stroke in strokes]
+    resampled = resample_batch(flat, points)
+    traces = np.zeros((batch, max_count, points, 2))
+    mask = np.arange(max_count)[None, :] < counts[:, None]
+    traces[mask] = resampled
+
+    # 書き順: 各ユーザーストロークに最も近い参照ストロークが同じ順番か
+    diff = traces[:, :, None] - reference[None, None]
+    cost = np.sqrt(np.einsum("bsrnk,bsrnk->bsrn", diff, diff)).mean(axis=-1)
+    nearest = cost.argmin(axis=2)
+    in_order = (nearest == np.arange(max_count)[None, :]) & mask
+    order = in_order.sum(axis=1) / np.maximum(np.maximum(counts, ref_count), 1)
+
+    # 方向: 同じ順番のストローク同士の始点→終点ベクトルを比較
+    paired = mask & (np.arange(max_count)[None, :] < ref_count)
+    b_idx, s_idx = np.nonzero(paired)
+    user_strokes = traces[b_idx, s_idx]
+    ref_strokes = reference[s_idx]
+
+    user_vec = user_strokes[:, -1] - user_strokes[:, 0]
+    ref_vec = ref_strokes[:, -1] - ref_strokes[:, 0]
+    norms = np.linalg.norm(user_vec, axis=1) * np.linalg.norm(ref_vec, axis=1)
+    cosine = np.where(norms > 0, (user_vec * ref_vec).sum(axis=1) / np.where(norms > 0, norms, 1), 0.0)
+
+    # 比較できなかった参照ストロークは 0 点として平均
+    denom = np.maximum(np.maximum(counts, ref_count), 1)
+    direction = np.bincount(b_idx, weights=(cosine + 1) / 2, minlength=batch) / denom
+
+    return {
+        "count_score": calc_stroke_score(counts, np.full(batch, ref_count)),
+        "order": order,
+        "direction": direction,
+        "denom": denom,
+        # 形状（DTW）は全漢字分をまとめて計算するため、組だけ返す
+        "pairs": (b_idx, user_strokes, ref_strokes),
+    }
+
+
+def prepare_submission(submission, references: ReferenceStrokes) -> tuple:
+    """提出を検証し、(漢字コード, 109x109 の座標系に揃えたストロークのリスト) を返す
+
+    採点できない提出は理由を付けて ValueError を送出する。
+    """
+    if not isinstance(submission, dict):
+        raise ValueError("submission is not a JSON object")
+    kanji_code = submission.get("kanji_code")
+    if not isinstance(kanji_code, str) or not KANJI_CODE_RE.fullmatch(kanji_code):
+        raise ValueError(f"invalid kanji_code: {kanji_code!r}")
+    try:
+        reference = references.get(kanji_code)
+    except (FileNotFoundError, ValueError):
+        raise ValueError(f"unknown kanji_code: {kanji_code}") from None
+    if len(reference) == 0:
+        raise ValueError(f"no reference strokes for {kanji_code}")
+
+    size = submission.get("size", CANVAS_SIZE)
+    if isinstance(size, bool) or not isinstance(size, (int, float)) or not size > 0:
+        raise ValueError(f"invalid size: {size!r}")
+    strokes = submission.get("strokes")
+    if not isinstance(strokes, list):
+        raise ValueError("strokes is not a list")
+
+    scale = CANVAS_SIZE / size
+    user = []
+    for i, stroke in enumerate(strokes):
+        try:
+            points = np.asarray(stroke, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"stroke {i} is not a list of [x, y] points") from None
+        if points.size == 0:
+            raise ValueError(f"stroke {i} is empty")
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError(f"stroke {i} is not a list of [x, y] points")
+        if not np.isfinite(points).all():
+            raise ValueError(f"stroke {i} has non-finite coordinates")
+        user.append(points * scale)
+    return kanji_code, user
+
+
+def score_submissions(submissions: list, references: ReferenceStrokes) -> list:
+    """提出のリストを漢字ごとにまとめて採点し、入力順の結果を返す（採点できない提出は score 0 と error）"""
+    groups = defaultdict(list)
+    prepared, errors = {}, {}
+    for position, submission in enumerate(submissions):
+        try:
+            kanji_code, user = prepare_submission(submission, references)
+        except ValueError as e:
+            errors[position] = str(e)
+            continue
+        groups[kanji_code].append(position)
+        prepared[position] = user
+
+    total = len(submissions)
+    count_score = np.zeros(total, dtype=np.int64)
+    order = np.zeros(total)
+    direction = np.zeros(total)
+    denom = np.ones(total)
+    pair_owner, user_strokes, ref_strokes = [], [], []
+
+    for kanji_code, positions in groups.items():
+        reference = references.get(kanji_code)
+        user = [prepared[p] for p in positions]
+        scores = score_group(user, reference, references.points)
+        positions = np.array(positions)
+        count_score[positions] = scores["count_score"]
+        order[positions] = scores["order"]
+        direction[positions] = scores["direction"]
+        denom[positions] = scores["denom"]
+        b_idx, users, refs = scores["pairs"]
+        pair_owner.append(positions[b_idx])
+        user_strokes.append(users)
+        ref_strokes.append(refs)
+
+    # 形状: 全提出のストローク組に対して DTW を一括計算
+    shape = np.zeros(total)
+    if pair_owner:
+        owners = np.concatenate(pair_owner)
+        similarity = np.exp(-batched_dtw(np.concatenate(user_strokes), np.concatenate(ref_strokes)) / SHAPE_TOLERANCE)
+        shape = np.bincount(owners, weights=similarity, minlength=total) / denom
+
+    quality = W_SHAPE * shape + W_ORDER * order + W_DIRECTION * direction
+    score = np.floor(np.clip(count_score * quality, 0, 100) + 0.5).astype(np.int64)
+
+    results = []
+    for p, submission in enumerate(submissions):
+        fields = submission if isinstance(submission, dict) else {}
+        result = {
+            "id": fields.get("id"),
+            "kanji_code": fields.get("kanji_code"),
+            "stored_score": fields.get("score"),
+            "count_score": int(count_score[p]),
+            "order": round(float(order[p]), 4),
+            "direction": round(float(direction[p]), 4),
+            "shape": round(float(shape[p]), 4),
+            "score": int(score[p]),
+        }
+        if p in errors:
+            result["error"] = errors[p]
+        results.append(result)
+    return results
+
+
+def parse_submission(line: str):
+    """NDJSON の1行（JSON として読めない行は None にして、採点結果の error で返す）"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def synthetic_submissions(references: ReferenceStrokes, count: int, seed: int = 0) -> list:
+    """参照ストロークにノイズ・画数誤り・書き順入れ替えを加えた合成提出"""
+    rng = np.random.default_rng(seed)
+    codes = [f"u{path.stem.lstrip('0')}" for path in sorted(KANJIVG_DIR.glob("*.svg"))]
+    submissions = []
+    for n in range(count):
+        code = codes[rng.integers(len(codes))]
+        strokes = [s + rng.normal(0, 1.5, s.shape) for s in references.get(code)]
+        strokes = [s[:: rng.integers(1, 3)] for s in strokes]
+        if len(strokes) > 1 and rng.random() < 0.2:
+            i = rng.integers(len(strokes) - 1)
+            strokes[i], strokes[i + 1] = strokes[i + 1], strokes[i]
+        if len(strokes) > 1 and rng.random() < 0.1:
+            strokes.pop()
+        submissions.append({"id": str(n), "kanji_code": code, "strokes": [s.tolist() for s in strokes]})
+    return submissions
+
+
+def run_benchmark(count: int):
+    references = ReferenceStrokes()
+    submissions = synthetic_submissions(references, count)
+    # 参照の読み込みは計測から除外
+    for submission in submissions:
+        references.get(submission["kanji_code"])
+
+    start = time.perf_counter()
+    results = score_submissions(submissions, references)
+    elapsed = time.perf_counter() - start
+
+    scores = np.array([r["score"] for r in results])
+    count_scores = np.array([r["count_score"] for r in results])
+    print(f"    Submissions: {count:,}")
+    print(f"    Elapsed: {elapsed:.2f}s ({count / elapsed:,.0f} submissions/sec)")
+    print(f"    Mean score: {scores.mean():.1f} (count_score: {count_scores.mean():.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score stroke test submissions against KanjiVG")
+    parser.add_argument("input", nargs="?", type=Path, help="submissions NDJSON")
+    parser.add_argument("-o", "--output", type=Path, help="results NDJSON (default: stdout)")
+    parser.add_argument("--benchmark", action="store_true", help="score synthetic submissions")
+    parser.add_argument("--count", type=int, default=20_000, help="synthetic submissions for --benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"[*] Benchmark ({args.count:,} synthetic submissions)")
+        run_benchmark(args.count)
+        return
+    if args.input is None:
+        parser.error("input is required unless --benchmark is given")
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        submissions = [parse_submission(line) for line in f if line.strip()]
+    results = score_submissions(submissions, ReferenceStrokes())
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    failed = sum(1 for r in results if "error" in r)
+    if failed:
+        print(f"Warning: {failed:,} submissions could not be scored (see \"error\" in the output)", file=sys.stderr)
+
+    stored = [
+        (r["stored_score"], r["count_score"])
+        for r in results
+        if "error" not in r and isinstance(r["stored_score"], (int, float))
+    ]
+    if stored:
+        diff = np.abs(np.array(stored, dtype=np.float64)[:, 0] - np.array(stored)[:, 1])
+        print(f"[*] count_score vs stored score: mean |diff| = {diff.mean():.2f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URL を1件ずつ受け取り、分割した gzip のサイトマップとサイトマップインデックスを書き出すモジュール
+
+出力: public/sitemaps/sitemap-00001.xml.gz ..., public/sitemaps/sitemap-index.xml
+      data/url-manifest.ndjson（1行1URL: {"loc", "lastmod", "hash"}）
+状態: data/sitemap-lastmod.sqlite（URL ごとの内容ハッシュと lastmod。コミットしない）
+
+各 URL にはページの内容から作ったハッシュを渡す。前回と同じハッシュなら前回の
+lastmod を使い、変わったときだけ今日の日付にする。ハッシュの照合は BATCH_SIZE 件
+ずつ SQLite に問い合わせ、サイトマップは書きながら gzip で圧縮するので、
+URL の数によらずメモリ使用量は一定。1ファイルは 50,000 URL・50 MB（展開後）の
+上限を超えないように次のファイルへ切り替える。
+
+サイトマップとマニフェストはコミットして public/ からそのまま配信する（next build は
+Python を実行しない）。SQLite は手元のキャッシュで、コミット済みのマニフェストが
+前回この DB から書いたものでなければ（clean checkout や pull の後）まず取り込むので、
+ハッシュが同じページの lastmod は環境によらず引き継がれる。gzip のヘッダーには
+時刻を入れず、内容が同じなら同じバイト列になるようにする。
+
+src/app/sitemap.ts（/sitemap.xml）は静的ページと漢字・学年・画数・部首のページを返し、
+こちらはそこに無いページ（漢字ごとの書き取り練習）だけをまとめる。robots.ts が両方を案内する。
+
+使用方法:
+  from sitemap_writer import SitemapUrl, SitemapWriter
+  with SitemapWriter(SITEMAP_DIR) as writer:
+      writer.add(SitemapUrl("/kanji/u6C34/practice", page_hash, "monthly", 0.6))
+
+  python scripts/sitemap_writer.py --benchmark      100万 URL で初回・変更なし・1% 変更の時間を計測
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+SITEMAP_DIR = PROJECT_ROOT / "public" / "sitemaps"
+LASTMOD_DB_PATH = DATA_DIR / "sitemap-lastmod.sqlite"
+MANIFEST_PATH = DATA_DIR / "url-manifest.ndjson"
+
+BASE_URL = "https://kanji-stroke-order.com"
+INDEX_NAME = "sitemap-index.xml"
+
+# sitemaps.org の1ファイルあたりの上限
+MAX_URLS = 50_000
+MAX_BYTES = 50 * 1024 * 1024
+# SQLite に一度に問い合わせる URL の数（3.32 より前の SQLite は1文のプレースホルダが 999 個まで）
+SQLITE_MAX_VARIABLES = 999
+BATCH_SIZE = 900
+
+URLSET_HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_FOOTER = b"</urlset>\n"
+
+SAFE_CHARS = "/:?=&-_.~"
+SAFE_PATH_RE = re.compile(r"[A-Za-z0-9/:?=&\-_.~]*")
+
+SitemapUrl = namedtuple("SitemapUrl", "path hash changefreq priority")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+  loc TEXT PRIMARY KEY,
+  hash TEXT NOT NULL,
+  lastmod TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+"""
+UPSERT_SQL = (
+    "INSERT INTO pages (loc, hash, lastmod) VALUES (?, ?, ?) "
+    "ON CONFLICT (loc) DO UPDATE SET hash = excluded.hash, lastmod = excluded.lastmod"
+)
+
+
+def encode_path(path: str) -> str:
+    """URL のパスをパーセントエンコードする（ASCII の安全な文字だけならそのまま）"""
+    if SAFE_PATH_RE.fullmatch(path):
+        return path
+    return "/".join(map(encode_segment, path.split("/")))
+
+
+@lru_cache(maxsize=65536)
+def encode_segment(segment: str) -> str:
+    """パスの1区切り（漢字1字や単語など、同じものが何度も現れる）"""
+    return quote(segment, safe=SAFE_CHARS)
+
+
+def content_hash(*parts) -> str:
+    """ページの内容（JSON にできる値）から作るハッシュ"""
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def file_stamp(path: Path) -> str:
+    """ファイルが書き換えられたかを見るための (サイズ, 更新時刻)"""
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class LastmodStore:
+    """URL ごとの (ハッシュ, lastmod)。ハッシュが変わった URL だけ lastmod を更新する"""
+
+    def __init__(self, db_path: Path = LASTMOD_DB_PATH, manifest_path: Path = None):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        self.changed = 0
+        self.imported = 0
+        if manifest_path is not None:
+            self.import_manifest(manifest_path)
+
+    def import_manifest(self, manifest_path: Path):
+        """コミット済みのマニフェストが前回この DB から書いたものでなければ、その lastmod を取り込む"""
+        try:
+            stamp = file_stamp(manifest_path)
+        except FileNotFoundError:
+            return
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'manifest'").fetchone()
+        if row is not None and row[0] == stamp:
+            return
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            before = self.db.total_changes
+            self.db.executemany(UPSERT_SQL, ((e["loc"], e["hash"], e["lastmod"]) for e in map(json.loads, f)))
+            self.imported = self.db.total_changes - before
+
+    def record_manifest(self, manifest_path: Path):
+        """書き出したマニフェストを覚える（次回はこの DB の内容と同じなので取り込まない）"""
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('manifest', ?)",
+                        (file_stamp(manifest_path),))
+
+    def resolve(self, entries: list, today: str) -> list:
+        """[(loc, hash), ...] -> 各 URL の lastmod（新しい・変わった URL は today）"""
+        locs = [loc for loc, _ in entries]
+        known = {}
+        for start in range(0, len(locs), SQLITE_MAX_VARIABLES):
+            chunk = locs[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            for loc, digest, lastmod in self.db.execute(
+                f"SELECT loc, hash, lastmod FROM pages WHERE loc IN ({placeholders})", chunk
+            ):
+                known[loc] = (digest, lastmod)
+        lastmods, updates = [], []
+        for loc, digest in entries:
+            previous = known.get(loc)
+            if previous is not None and previous[0] == digest:
+                lastmods.append(previous[1])
+            else:
+                lastmods.append(today)
+                updates.append((loc, digest, today))
+        if updates:
+            self.db.executemany(UPSERT_SQL, updates)
+            self.changed += len(updates)
+        return lastmods
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class SitemapWriter:
+    """URL を受け取った順に gzip のサイトマップへ書き、閉じるときにインデックスを書く"""
+
+    def __init__(self, output_dir: Path = SITEMAP_DIR, base_url: str = BASE_URL, store: LastmodStore = None,
+                 manifest_path: Path = MANIFEST_PATH, today: str = None, max_urls: int = MAX_URLS,
+                 max_bytes: int = MAX_BYTES, batch_size: int = BATCH_SIZE):
+        self.output_dir = output_dir
+        self.base_url = base_url.rstrip("/")
+        self.store = store or LastmodStore(manifest_path=manifest_path)
+        self.today = today or date.today().isoformat()
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.pending = []
+        self.shards = []  # [(ファイル名, 最新の lastmod)]
+        self.stream = None
+        self.urls = 0
+        self.total = 0
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = manifest_path
+        self.manifest = None
+        if manifest_path is not None:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            self.manifest = open(manifest_path, "w", encoding="utf-8")
+
+    def __enter__(self) -> "SitemapWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, url: SitemapUrl):
+        self.pending.append(url)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """たまった URL の lastmod を引いてサイトマップに書く"""
+        if not self.pending:
+            return
+        entries = [(self.base_url + encode_path(url.path), url.hash) for url in self.pending]
+        lastmods = self.store.resolve(entries, self.today)
+        chunk, manifest = [], []
+        for url, (loc, digest), lastmod in zip(self.pending, entries, lastmods):
+            parts = [f"<url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod>"]
+            if url.changefreq:
+                parts.append(f"<changefreq>{url.changefreq}</changefreq>")
+            if url.priority is not None:
+                parts.append(f"<priority>{url.priority:.1f}</priority>")
+            parts.append("</url>\n")
+            entry = "".join(parts).encode("utf-8")
+            if self.stream is not None and (
+                self.urls >= self.max_urls or self.size + len(entry) + len(URLSET_FOOTER) > self.max_bytes
+            ):
+                self.stream.write(b"".join(chunk))
+                chunk.clear()
+                self.finish_shard()
+            if self.stream is None:
+                self.start_shard(lastmod)
+            chunk.append(entry)
+            self.size += len(entry)
+            self.urls += 1
+            if lastmod > self.shards[-1][1]:
+                self.shards[-1][1] = lastmod
+            # loc はパーセントエンコード済みなので JSON のエスケープは要らない
+            manifest.append(f'{{"loc":"{loc}","lastmod":"{lastmod}","hash":"{digest}"}}\n')
+        self.stream.write(b"".join(chunk))
+        if self.manifest:
+            self.manifest.write("".join(manifest))
+        self.total += len(self.pending)
+        self.pending.clear()
+
+    def start_shard(self, lastmod: str):
+        name = f"sitemap-{len(self.shards) + 1:05d}.xml.gz"
+        # mtime=0: 内容が同じなら同じファイルになる（コミットの差分を出さない）
+        self.stream = gzip.GzipFile(self.output_dir / name, "wb", compresslevel=6, mtime=0)
+        self.stream.write(URLSET_HEADER)
+        self.size = len(URLSET_HEADER)
+        self.urls = 0
+        self.shards.append([name, lastmod])
+
+    def finish_shard(self):
+        self.stream.write(URLSET_FOOTER)
+        self.stream.close()
+        self.stream = None
+
+    def close(self) -> dict:
+        """残りを書き、インデックスを書き出して前回の余ったファイルを消す"""
+        self.flush()
+        if self.stream is not None:
+            self.finish_shard()
+        if self.manifest:
+            self.manifest.close()
+            self.store.record_manifest(self.manifest_path)
+        self.store.close()
+
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for name, lastmod in self.shards:
+            lines.append(f"<sitemap><loc>{escape(self.base_url)}/sitemaps/{name}</loc>"
+                         f"<lastmod>{lastmod}</lastmod></sitemap>")
+        lines.append("</sitemapindex>\n")
+        (self.output_dir / INDEX_NAME).write_text("\n".join(lines), encoding="utf-8")
+
+        written = {name for name, _ in self.shards}
+        for stale in self.output_dir.glob("sitemap-*.xml.gz"):
+            if stale.name not in written:
+                stale.unlink()
+        return {"urls": self.total, "shards": len(self.shards), "changed": self.store.changed}
+
+
+def synthetic_urls(count: int, revision: int = 0, changed_every: int = 100):
+    """count 件の URL（revision ごとに changed_every 件に1件の内容が変わる）"""
+    for i in range(count):
+        version = revision if i % changed_every == 0 else 0
+        digest = hashlib.blake2b(f"{i}:{version}".encode(), digest_size=12).hexdigest()
+        yield SitemapUrl(f"/word/{i:07d}/例", digest, "monthly", 0.5)
+
+
+def run_benchmark(count: int = 1_000_000):
+    """初回・変更なし・1% 変更の書き出し時間と最大 RSS"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for label, revision, today in (("cold", 0, "2026-10-01"), ("no change", 0, "2026-10-02"),
+                                       ("1% changed", 1, "2026-10-03")):
+            start = time.perf_counter()
+            store = LastmodStore(tmp / "lastmod.sqlite", tmp / "manifest.ndjson")
+            with SitemapWriter(tmp / "sitemaps", store=store, manifest_path=tmp / "manifest.ndjson",
+                               today=today) as writer:
+                for url in synthetic_urls(count, revision):
+                    writer.add(url)
+            elapsed = time.perf_counter() - start
+            size = sum(p.stat().st_size for p in (tmp / "sitemaps").glob("*.gz"))
+            print(f"    {label:<12} {elapsed:>7.2f}s  {writer.total:,} URLs, {len(writer.shards)} shards "
+                  f"({size / 2**20:.1f} MiB gz), {store.changed:,} lastmod updated")
+        with gzip.open(tmp / "sitemaps" / "sitemap-00001.xml.gz", "rt", encoding="utf-8") as f:
+            dates = {line.split("<lastmod>")[1][:10] for line in f if "<lastmod>" in line}
+        print(f"    lastmod values in first shard: {', '.join(sorted(dates))}")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"    Peak RSS: {peak:.0f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming sharded sitemap writer")
+    parser.add_argument("--benchmark", action="store_true", help="write 1M synthetic URLs three times")
+    parser.add_argument("--count", type=int, default=1_000_000, help="URLs in the benchmark")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"[*] Benchmark ({args.count:,} URLs)")
+        run_benchmark(args.count)
+        return
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
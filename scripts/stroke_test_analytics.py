@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+書き取りテスト（stroke_tests）のエクスポートから習熟度・傾向・漢字の難易度を集計するスクリプト
+
+入力: stroke_tests のエクスポート（CSV / NDJSON、.gz/.bz2/.xz 可）
+  列: id, user_id, kanji_code（例: "u6c34"）, score（0-100）, created_at
+状態: data/stroke-analytics-state.npz（集計途中の値と入力ごとの読み終えた位置）
+出力: src/data/strokeDifficulty.json（漢字の難易度ランキング）
+      --user-stats を指定したときはユーザーごとの集計（NDJSON）
+
+エクスポートは CHUNK_ROWS 行ずつ列ごとの NumPy 配列（ユーザー番号・コードポイント・
+点数・日数）にしてから、np.unique / bincount / reduceat でまとめて集計する。
+行ごとの Python の処理は文字列の分割だけで、集計はすべて配列演算。
+列数の合わない行や、点数・漢字コード・created_at が空か読めない行は数えて読み飛ばす。
+created_at はオフセット付き（+09:00 など）ならそのオフセットで、なければ UTC として読む。
+
+集計値は足し合わせられる形（件数・合計・二乗和・日数との積和など）で状態に残すので、
+次回は各入力の追記された分だけを読めばよい。ユーザー x 漢字の組ごとには
+回数・初回の点数・最高点・最終日時・指数移動平均（習熟度）を持つ。
+指数移動平均は入力が created_at 順に追記される前提で更新する。
+
+strokeDifficulty.json の形式:
+  {"asOf": "2026-10-19T07:00:00", "rows": 123456,
+   "ranking": [{"kanji": "鬱", "rank": 1, "difficulty": 0.62, "attempts": 120, "users": 80,
+                "meanScore": 48.5, "passRate": 0.21, "firstScore": 41.0, "trend": 3.2}, ...]}
+difficulty は件数の少ない漢字が極端にならないよう全体の平均に寄せた（ベイズ平均）
+平均点と合格率から求める（0〜1、大きいほど難しい）。trend は 30 日あたりの点数の変化。
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/stroke_test_analytics.py exports/stroke_tests-*.csv.gz
+  python scripts/stroke_test_analytics.py exports/stroke_tests.ndjson --user-stats data/stroke-user-stats.ndjson
+  python scripts/stroke_test_analytics.py --rebuild exports/stroke_tests.csv      状態を捨てて最初から集計
+  python scripts/stroke_test_analytics.py --benchmark
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from corpus_sources import open_binary
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+STATE_PATH = DATA_DIR / "stroke-analytics-state.npz"
+OUTPUT_PATH = PROJECT_ROOT / "src" / "data" / "strokeDifficulty.json"
+
+CHUNK_ROWS = 200_000
+# 合格とみなす点数と、組ごとの習熟度（指数移動平均）で習得済みとみなす点数
+PASS_SCORE = 80
+MASTERY_SCORE = 80
+EWMA_ALPHA = 0.3
+# ベイズ平均で全体の値に寄せる強さ（仮想的な件数）
+PRIOR_ATTEMPTS = 20
+DIFFICULTY_WEIGHTS = {"score": 0.6, "pass": 0.4}
+RANKING_MIN_ATTEMPTS = 5
+
+# 日数の基準日（二乗和の桁を抑える）
+EPOCH = np.datetime64("2024-01-01T00:00:00", "s")
+EPOCH_SECONDS = int(EPOCH.astype(np.int64))
+SECONDS_PER_DAY = 86400
+# ユーザー x 漢字の組のキー = ユーザー番号 << CODE_BITS | コードポイント
+CODE_BITS = 21
+CODE_MASK = (1 << CODE_BITS) - 1
+
+# 漢字ごと・ユーザーごとに足し合わせる値
+MOMENTS = ("n", "score", "score2", "passed", "day", "day2", "day_score")
+PAIR_COLUMNS = ("attempts", "first", "best", "ewma", "last")
+
+Columns = namedtuple("Columns", "user code score day")
+
+
+class AnalyticsState:
+    """集計途中の値（配列）と入力ごとの読み終えた位置"""
+
+    def __init__(self):
+        self.users = []
+        self.user_index = {}
+        self.kanji_keys = np.zeros(0, dtype=np.int64)
+        self.kanji = {name: np.zeros(0) for name in MOMENTS}
+        self.user = {name: np.zeros(0) for name in MOMENTS}
+        self.pair_keys = np.zeros(0, dtype=np.int64)
+        self.pair = {name: np.zeros(0) for name in PAIR_COLUMNS}
+        self.sources = {}
+        self.rows = 0
+        self.last_day = None
+
+    @classmethod
+    def load(cls, path: Path) -> "AnalyticsState":
+        state = cls()
+        if not path.exists():
+            return state
+        with np.load(path, allow_pickle=False) as data:
+            state.users = data["users"].tolist()
+            state.user_index = {user: i for i, user in enumerate(state.users)}
+            state.kanji_keys = data["kanji_keys"]
+            state.kanji = {name: data[f"kanji_{name}"] for name in MOMENTS}
+            state.user = {name: data[f"user_{name}"] for name in MOMENTS}
+            state.pair_keys = data["pair_keys"]
+            state.pair = {name: data[f"pair_{name}"] for name in PAIR_COLUMNS}
+            meta = json.loads(str(data["meta"]))
+        state.sources = meta["sources"]
+        state.rows = meta["rows"]
+        state.last_day = meta["lastDay"]
+        return state
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"sources": self.sources, "rows": self.rows, "lastDay": self.last_day}
+        arrays = {
+            "users": np.array(self.users, dtype=str),
+            "kanji_keys": self.kanji_keys,
+            "pair_keys": self.pair_keys,
+            "meta": np.array(json.dumps(meta)),
+            **{f"kanji_{name}": values for name, values in self.kanji.items()},
+            **{f"user_{name}": values for name, values in self.user.items()},
+            **{f"pair_{name}": values for name, values in self.pair.items()},
+        }
+        # 書き込み途中で止まっても前回の状態が残るように置き換える
+        temp = path.with_suffix(".tmp.npz")
+        np.savez(temp, **arrays)
+        temp.replace(path)
+
+    def intern_users(self, names: np.ndarray) -> np.ndarray:
+        return intern_users(self.users, self.user_index, names)
+
+    def add(self, columns: Columns):
+        """1チャンク分の列を集計値に加える"""
+        if not len(columns.score):
+            return
+        self.rows += len(columns.score)
+        last_day = float(columns.day.max())
+        self.last_day = last_day if self.last_day is None else max(self.last_day, last_day)
+
+        codes, inverse = np.unique(columns.code, return_inverse=True)
+        self.kanji_keys, self.kanji = merge_sums(
+            self.kanji_keys, self.kanji, codes, moments(inverse, len(codes), columns.score, columns.day)
+        )
+
+        known = columns.user >= 0
+        user, code, score, day = (column[known] for column in columns)
+        size = len(self.users)
+        self.user = {name: np.pad(values, (0, size - len(values))) for name, values in self.user.items()}
+        for name, values in moments(user, size, score, day).items():
+            self.user[name] += values
+
+        self.pair_keys, self.pair = merge_pairs(self.pair_keys, self.pair, (user << CODE_BITS) | code, score, day)
+
+
+def intern_users(users: list, user_index: dict, names: np.ndarray) -> np.ndarray:
+    """ユーザー ID（重複なし）-> ユーザー番号（user_id が空の行は -1）。新しい ID は users に追加する"""
+    indices = np.empty(len(names), dtype=np.int64)
+    for i, name in enumerate(names.tolist()):
+        if not name:
+            indices[i] = -1
+            continue
+        index = user_index.get(name)
+        if index is None:
+            index = user_index[name] = len(users)
+            users.append(name)
+        indices[i] = index
+    return indices
+
+
+def moments(inverse: np.ndarray, size: int, score: np.ndarray, day: np.ndarray) -> dict:
+    """グループ番号ごとの件数・合計・二乗和・日数との積和"""
+    weights = {
+        "n": None,
+        "score": score,
+        "score2": score * score,
+        "passed": (score >= PASS_SCORE).astype(np.float64),
+        "day": day,
+        "day2": day * day,
+        "day_score": day * score,
+    }
+    return {name: np.bincount(inverse, weights=w, minlength=size).astype(np.float64) for name, w in weights.items()}
+
+
+def merge_sums(keys: np.ndarray, columns: dict, new_keys: np.ndarray, new_columns: dict) -> tuple:
+    """ソート済みのキーと列に、別のキー（ソート済み・重複なし）の値を足し合わせる"""
+    merged = np.union1d(keys, new_keys)
+    old_pos = np.searchsorted(merged, keys)
+    new_pos = np.searchsorted(merged, new_keys)
+    result = {}
+    for name, values in new_columns.items():
+        total = np.zeros(len(merged))
+        total[old_pos] = columns[name]
+        total[new_pos] += values
+        result[name] = total
+    return merged, result
+
+
+def merge_pairs(keys: np.ndarray, columns: dict, pair_keys: np.ndarray, score: np.ndarray, day: np.ndarray) -> tuple:
+    """ユーザー x 漢字の組の回数・初回・最高点・最終日・指数移動平均を更新する"""
+    if not len(pair_keys):
+        return keys, columns
+    # 組ごと・時刻順に並べる
+    order = np.lexsort((day, pair_keys))
+    pair_keys, score, day = pair_keys[order], score[order], day[order]
+    new_keys, starts, counts = np.unique(pair_keys, return_index=True, return_counts=True)
+    ends = starts + counts - 1
+    group = np.repeat(np.arange(len(new_keys)), counts)
+
+    # 指数移動平均: 前の値 * (1-a)^n + Σ a (1-a)^(後ろからの順番) * 点数
+    from_end = ends[group] - np.arange(len(score))
+    weights = EWMA_ALPHA * (1 - EWMA_ALPHA) ** from_end
+    contribution = np.bincount(group, weights=weights * score, minlength=len(new_keys))
+    decay = (1 - EWMA_ALPHA) ** counts
+
+    merged = np.union1d(keys, new_keys)
+    old_pos = np.searchsorted(merged, keys)
+    new_pos = np.searchsorted(merged, new_keys)
+    existed = np.zeros(len(merged), dtype=bool)
+    existed[old_pos] = True
+    existed = existed[new_pos]
+
+    result = {}
+    for name in PAIR_COLUMNS:
+        values = np.zeros(len(merged))
+        values[old_pos] = columns[name]
+        result[name] = values
+    first = score[starts]
+    # 初めての組は初回の点数を前の値とみなす
+    previous = np.where(existed, result["ewma"][new_pos], first)
+    result["attempts"][new_pos] += counts
+    result["first"][new_pos] = np.where(existed, result["first"][new_pos], first)
+    result["best"][new_pos] = np.maximum(result["best"][new_pos], np.maximum.reduceat(score, starts))
+    result["last"][new_pos] = np.maximum(result["last"][new_pos], day[ends])
+    result["ewma"][new_pos] = previous * decay + contribution
+    return merged, result
+
+
+def parse_time(value) -> float:
+    """created_at 1件 -> 基準日からの日数（読めなければ NaN）
+
+    オフセット付き（+09:00 など）はそのオフセットで、オフセットのない日時は UTC として読む
+    （rollup_kanji_views.event_day と同じ）。
+    """
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return np.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment.timestamp() - EPOCH_SECONDS) / SECONDS_PER_DAY
+
+
+def parse_days(values: list) -> np.ndarray:
+    """created_at（ISO 8601 か UNIX 時刻）-> 基準日からの日数（読めない値は NaN）"""
+    text = np.array(values, dtype=str)
+    days = np.full(len(text), np.nan)
+    if not len(text):
+        return days
+    numeric = np.char.isdigit(np.char.replace(text, ".", "", count=1))
+    if numeric.any():
+        seconds = text[numeric].astype(np.float64)
+        seconds = np.where(seconds > 1e11, seconds / 1000, seconds)  # ミリ秒
+        days[numeric] = (seconds - EPOCH_SECONDS) / SECONDS_PER_DAY
+
+    # オフセットのない "2026-10-19 07:00:00.123" のような値は秒までを UTC として NumPy でまとめて読む
+    rest = np.nonzero(~numeric)[0]
+    offset = has_offset(text[rest])
+    naive = rest[~offset]
+    if len(naive):
+        try:
+            moments = np.array([value[:19] for value in text[naive].tolist()]).astype("datetime64[s]")
+        except ValueError:
+            rest = np.nonzero(~numeric)[0]
+        else:
+            days[naive] = np.where(np.isnat(moments), np.nan,
+                                   (moments - EPOCH).astype(np.int64) / SECONDS_PER_DAY)
+            rest = rest[offset]
+    # オフセット付きの値と、まとめて読めなかった値は1件ずつ読む
+    for i in rest.tolist():
+        days[i] = parse_time(str(text[i]))
+    return days
+
+
+def has_offset(text: np.ndarray) -> np.ndarray:
+    """日付（先頭10文字）の後ろにタイムゾーン（Z・+09:00・-05 など）があるか"""
+    return (
+        (np.char.rfind(text, "+") >= 10) | (np.char.rfind(text, "-") >= 10)
+        | np.char.endswith(text, "Z") | np.char.endswith(text, "z")
+    )
+
+
+def parse_code(name: str) -> int:
+    """"u6c34" -> コードポイント（読めなければ -1）"""
+    if name[:1] not in ("u", "U") or len(name) < 2:
+        return -1
+    try:
+        code = int(name[1:], 16)
+    except ValueError:
+        return -1
+    return code if code <= CODE_MASK else -1
+
+
+def parse_score(value) -> float:
+    """点数（数値か数値の文字列）-> float（空・読めない値は NaN）"""
+    if value in ("", None) or isinstance(value, bool):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def to_columns(state: AnalyticsState, users: list, codes: list, scores: list, times: list) -> tuple:
+    """1チャンク分の文字列の列 -> (数値の列, 捨てた行数)
+
+    点数・漢字コード・created_at のどれかが空か読めない行は捨てる。
+    """
+    code_names, code_inverse = np.unique(np.array(codes, dtype=str), return_inverse=True)
+    code_values = np.array([parse_code(name) for name in code_names.tolist()], dtype=np.int64)
+    code = code_values[code_inverse]
+    try:
+        # CSV のチャンクはほとんど全行が数値の文字列なのでまとめて変換する
+        if not scores or not isinstance(scores[0], str):
+            raise TypeError
+        score = np.array(scores, dtype=str).astype(np.float64)
+    except (TypeError, ValueError):
+        score = np.array([parse_score(value) for value in scores], dtype=np.float64)
+    day = parse_days(times)
+    keep = (code >= 0) & np.isfinite(score) & np.isfinite(day)
+
+    # 捨てる行のユーザーは登録しない
+    user_names, user_inverse = np.unique(np.array(users, dtype=str)[keep], return_inverse=True)
+    user = state.intern_users(user_names)[user_inverse]
+    columns = Columns(user, code[keep], np.clip(score[keep], 0, 100), day[keep])
+    return columns, int(len(keep) - keep.sum())
+
+
+def csv_rows(text: str, width: int) -> tuple:
+    """CSV の行 -> (列数の合う行, 列数の合わない行数)"""
+    rows = [line.split(",") for line in text.splitlines() if line.strip()] if '"' not in text \
+        else [row for row in csv.reader(text.splitlines()) if row]
+    fields = [row for row in rows if len(row) == width]
+    return fields, len(rows) - len(fields)
+
+
+def json_records(lines: list) -> tuple:
+    """NDJSON の行 -> (kanji_code と created_at のあるレコード, 壊れた行数)"""
+    records = []
+    broken = 0
+    for raw in lines:
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            broken += 1
+            continue
+        if not isinstance(record, dict) or record.get("kanji_code") is None or record.get("created_at") is None:
+            broken += 1
+            continue
+        records.append(record)
+    return records, broken
+
+
+def iter_chunks(path: Path, position: int, rows: int = CHUNK_ROWS):
+    """position バイト目以降を rows 行ずつ読み、(読み終えた位置, 列のリスト, 壊れた行数) を返す
+
+    書き込み途中の最後の行（改行なし）は次回に回す。列数の合わない CSV の行、
+    JSON として読めない行や kanji_code・created_at のない NDJSON の行は数えて捨てる。
+    """
+    with open_binary(path) as stream:
+        header = stream.readline()
+        if not header.endswith(b"\n"):
+            return
+        is_csv = not header.lstrip().startswith(b"{")
+        if is_csv:
+            names = next(csv.reader([header.decode("utf-8-sig")]))
+            indices = [names.index(name) for name in ("user_id", "kanji_code", "score", "created_at")]
+            position = max(position, len(header))
+        stream.seek(position)
+
+        while True:
+            lines = list(islice(stream, rows))
+            if lines and not lines[-1].endswith(b"\n"):
+                lines.pop()
+            if not lines:
+                return
+            position += sum(map(len, lines))
+            if is_csv:
+                fields, broken = csv_rows(b"".join(lines).decode("utf-8", errors="replace"), len(names))
+                columns = list(zip(*fields)) if fields else [()] * len(names)
+                users, codes, scores, times = (columns[i] for i in indices)
+            else:
+                records, broken = json_records(lines)
+                users = [str(r.get("user_id") or "") for r in records]
+                codes = [str(r["kanji_code"]) for r in records]
+                scores = [r.get("score") for r in records]
+                times = [str(r["created_at"]) for r in records]
+            yield position, (users, codes, scores, times), broken
+
+
+def ingest(state: AnalyticsState, path: Path, rows: int = CHUNK_ROWS) -> tuple:
+    """1つの入力の新しい行を集計値に加え、(処理した行数, 捨てた行数) を返す
+
+    壊れた行は数えて読み飛ばし、読み終えた位置はその行の後ろまで進める。
+    """
+    key = str(path.resolve())
+    position = state.sources.get(key, 0)
+    if path.suffix.lower() not in (".gz", ".bz2", ".xz") and path.stat().st_size < position:
+        print(f"Warning: {path} is shorter than the last ingested position; skipped (exports must be append-only)")
+        return 0, 0
+    before = state.rows
+    skipped = 0
+    for position, chunk, broken in iter_chunks(path, position, rows):
+        columns, dropped = to_columns(state, *chunk)
+        state.add(columns)
+        state.sources[key] = position
+        skipped += broken + dropped
+    return state.rows - before, skipped
+
+
+def trend(sums: dict) -> np.ndarray:
+    """点数を日数に回帰した傾き（30 日あたり）。日付が1種類なら 0"""
+    n, day, score = sums["n"], sums["day"], sums["score"]
+    denominator = n * sums["day2"] - day * day
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (n * sums["day_score"] - day * score) / denominator
+    return np.where(denominator > 1e-9 * np.maximum(n * n, 1), slope * 30, 0.0)
+
+
+def kanji_ranking(state: AnalyticsState, min_attempts: int = RANKING_MIN_ATTEMPTS) -> list:
+    """漢字ごとの統計を難しい順に並べる"""
+    sums = state.kanji
+    n = sums["n"]
+    if not n.sum():
+        return []
+    prior_score = sums["score"].sum() / n.sum()
+    prior_pass = sums["passed"].sum() / n.sum()
+    shrunk_score = (sums["score"] + PRIOR_ATTEMPTS * prior_score) / (n + PRIOR_ATTEMPTS)
+    shrunk_pass = (sums["passed"] + PRIOR_ATTEMPTS * prior_pass) / (n + PRIOR_ATTEMPTS)
+    difficulty = (
+        DIFFICULTY_WEIGHTS["score"] * (1 - shrunk_score / 100)
+        + DIFFICULTY_WEIGHTS["pass"] * (1 - shrunk_pass)
+    )
+
+    # 組の集計値を漢字ごとにまとめる（ユーザー数と初回の平均点）
+    position = np.searchsorted(state.kanji_keys, state.pair_keys & CODE_MASK)
+    users = np.bincount(position, minlength=len(n))
+    first = np.bincount(position, weights=state.pair["first"], minlength=len(n)) / np.maximum(users, 1)
+    slope = trend(sums)
+
+    keep = np.nonzero(n >= min_attempts)[0]
+    order = keep[np.lexsort((state.kanji_keys[keep], -difficulty[keep]))]
+    return [
+        {
+            "kanji": chr(int(state.kanji_keys[i])),
+            "rank": rank,
+            "difficulty": round(float(difficulty[i]), 4),
+            "attempts": int(n[i]),
+            "users": int(users[i]),
+            "meanScore": round(float(sums["score"][i] / n[i]), 1),
+            "passRate": round(float(sums["passed"][i] / n[i]), 3),
+            "firstScore": round(float(first[i]), 1) if users[i] else None,
+            "trend": round(float(slope[i]), 2),
+        }
+        for rank, i in enumerate(order.tolist(), start=1)
+    ]
+
+
+def user_stats(state: AnalyticsState):
+    """ユーザーごとの回数・漢字数・習得済みの漢字数・平均点・傾向"""
+    sums = state.user
+    owner = state.pair_keys >> CODE_BITS
+    size = len(state.users)
+    kanji = np.bincount(owner, minlength=size)
+    mastered = (state.pair["ewma"] >= MASTERY_SCORE) & (state.pair["attempts"] >= 2)
+    mastered = np.bincount(owner, weights=mastered, minlength=size)
+    mean = sums["score"] / np.maximum(sums["n"], 1)
+    slope = trend(sums)
+    for i in np.nonzero(sums["n"])[0].tolist():
+        yield {
+            "userId": state.users[i],
+            "attempts": int(sums["n"][i]),
+            "kanji": int(kanji[i]),
+            "mastered": int(mastered[i]),
+            "meanScore": round(float(mean[i]), 1),
+            "trend": round(float(slope[i]), 2),
+        }
+
+
+def snapshot(state: AnalyticsState, min_attempts: int = RANKING_MIN_ATTEMPTS) -> dict:
+    as_of = None
+    if state.last_day is not None:
+        as_of = str(EPOCH + np.timedelta64(int(state.last_day * SECONDS_PER_DAY), "s"))
+    return {"asOf": as_of, "rows": state.rows, "ranking": kanji_ranking(state, min_attempts)}
+
+
+def write_synthetic_tests(path: Path, kanji: list, count: int, users: int, start: datetime,
+                          seed: int = 0, append: bool = False):
+    """画数が多いほど点数が低くなる CSV の書き取りテスト（30秒間隔）"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(kanji))]
+    # ユーザーは seed によらず同じ顔ぶれにする（追記分も既存のユーザーになる）
+    user_rng = random.Random(users)
+    user_ids = [f"{user_rng.getrandbits(128):032x}" for _ in range(users)]
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        if not append:
+            f.write("id,user_id,kanji_code,score,created_at\n")
+        picks = rng.choices(kanji, weights=weights, k=count)
+        for i, (character, strokes) in enumerate(picks):
+            moment = (start + timedelta(seconds=i * 30)).isoformat(sep=" ")
+            score = max(0, min(100, round(rng.gauss(95 - strokes * 2.5, 12))))
+            user = rng.choice(user_ids) if rng.random() > 0.05 else ""
+            f.write(f"{seed}-{i},{user},u{ord(character):x},{score},{moment}\n")
+
+
+def run_benchmark(kanji: list, count: int = 2_000_000, users: int = 20_000, seed: int = 0):
+    """初回の集計・変更なし・追記分だけの集計・ランキング作成の時間"""
+    with tempfile.TemporaryDirectory() as tmp:
+        tests = Path(tmp) / "stroke_tests.csv"
+        state_path = Path(tmp) / "state.npz"
+        start = datetime(2026, 1, 1)
+        write_synthetic_tests(tests, kanji, count, users, start, seed)
+
+        def timed(label: str, func):
+            begin = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - begin
+            print(f"    {label:<24} {elapsed:>7.2f}s  {result}")
+
+        def run_ingest():
+            state = AnalyticsState.load(state_path)
+            processed, _ = ingest(state, tests)
+            state.save(state_path)
+            return f"{processed:,} rows"
+
+        timed("ingest (cold)", run_ingest)
+        timed("ingest (no change)", run_ingest)
+        write_synthetic_tests(tests, kanji, count // 10, users, start + timedelta(seconds=count * 30), seed + 1,
+                              append=True)
+        timed("ingest (+10% appended)", run_ingest)
+
+        state = AnalyticsState.load(state_path)
+        timed("ranking", lambda: f"{len(kanji_ranking(state))} kanji")
+        timed("user stats", lambda: f"{sum(1 for _ in user_stats(state)):,} users")
+
+        # 画数と難易度の順位相関（合成データは画数が多いほど難しい）
+        strokes = dict(kanji)
+        ranking = [(strokes[r["kanji"]], r["difficulty"]) for r in kanji_ranking(state)]
+        ranks = np.argsort(np.argsort(np.array(ranking), axis=0), axis=0)
+        print(f"    strokes vs difficulty Spearman: {np.corrcoef(ranks.T)[0, 1]:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate stroke_tests exports into mastery and difficulty stats")
+    parser.add_argument("inputs", type=Path, nargs="*", help="CSV / NDJSON exports of stroke_tests")
+    parser.add_argument("--state", type=Path, default=STATE_PATH, help=f"incremental state (default: {STATE_PATH})")
+    parser.add_argument("--rebuild", action="store_true", help="discard the saved state and start over")
+    parser.add_argument("--min-attempts", type=int, default=RANKING_MIN_ATTEMPTS,
+                        help="attempts needed for a kanji to be ranked")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--user-stats", type=Path, default=None, help="also write per-user stats (NDJSON)")
+    parser.add_argument("--benchmark", action="store_true", help="time aggregation of 2M synthetic rows")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        with open(DATA_DIR / "kanji-joyo.json", "r", encoding="utf-8") as f:
+            kanji = [(k["kanji"], k["strokes"]) for k in json.load(f)]
+        print("[*] Benchmark")
+        run_benchmark(kanji)
+        return
+
+    state = AnalyticsState() if args.rebuild else AnalyticsState.load(args.state)
+    start = time.perf_counter()
+    for path in args.inputs:
+        processed, skipped = ingest(state, path)
+        print(f"[*] {path}: {processed} new rows")
+        if skipped:
+            print(f"Warning: {path}: skipped {skipped} malformed rows")
+    elapsed = time.perf_counter() - start
+    state.save(args.state)
+
+    result = snapshot(state, args.min_attempts)
+    print(f"    Rows: {state.rows}, users: {len(state.users)}, kanji ranked: {len(result['ranking'])}")
+    print(f"    Elapsed: {elapsed:.2f}s")
+
+    print(f"[*] Saving: {args.output}")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.user_stats:
+        print(f"[*] Saving: {args.user_stats}")
+        with open(args.user_stats, "w", encoding="utf-8") as f:
+            for stats in user_stats(state):
+                f.write(json.dumps(stats, ensure_ascii=False) + "\n")
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
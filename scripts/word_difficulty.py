@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+単語の難易度（最大学年・JLPT・平均頻度）を計算し、学年ごとに学べる単語を選ぶスクリプト
+
+入力: data/kanji-joyo.json, data/kanji-details/*.json, data/words-by-kanji.json
+出力: data/word-difficulty.json, data/learnable-words.json
+
+コードポイントを添字にした学年・JLPT・頻度の配列を作り、全単語の文字を1つの
+配列にまとめて引く。単語ごとの最大値・平均は単語 ID で並んだ配列に対する
+reduceat / bincount で求めるため、単語ごとの Python のループはない。
+常用漢字以外の漢字は学年 9（常用外）として扱う。
+
+learnable-words.json は漢字ごとに、その漢字の学年までに習う漢字だけで
+書ける単語（例: 1年の「人」のページでは「一人」は入り「外国人」は入らない）。
+
+必要なライブラリ:
+  pip install numpy
+
+使用方法:
+  python scripts/word_difficulty.py
+  python scripts/word_difficulty.py --benchmark
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from build_facet_index import load_kanji_records
+from kanji_cooccurrence import unique_words
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+
+KANJI_JOYO_PATH = DATA_DIR / "kanji-joyo.json"
+KANJI_DETAILS_DIR = DATA_DIR / "kanji-details"
+WORDS_BY_KANJI_PATH = DATA_DIR / "words-by-kanji.json"
+WORD_DIFFICULTY_PATH = DATA_DIR / "word-difficulty.json"
+LEARNABLE_WORDS_PATH = DATA_DIR / "learnable-words.json"
+
+# 常用外の漢字の学年と、頻度順位・JLPT がない漢字の値
+NON_JOYO_GRADE = 9
+MISSING_FREQ = 2501
+JLPT_LEVELS = {"N5": 1, "N4": 2, "N3": 3, "N2": 4, "N1": 5}
+MISSING_JLPT = JLPT_LEVELS["N1"]
+
+# 漢字として扱うコードポイントの範囲（拡張 A・統合漢字・互換漢字・拡張 B〜G）
+CJK_RANGES = ((0x3400, 0x4DC0), (0x4E00, 0xA000), (0xF900, 0xFB00), (0x20000, 0x31350))
+
+# 難易度 = 各要素を 0〜1 に正規化した値の重み付き和
+DIFFICULTY_WEIGHTS = {"grade": 0.5, "freq": 0.3, "jlpt": 0.2}
+
+KanjiTables = namedtuple("KanjiTables", "grade jlpt freq")
+WordScores = namedtuple("WordScores", "max_grade jlpt mean_freq difficulty")
+
+
+def build_tables(records: list) -> KanjiTables:
+    """コードポイント -> 学年・JLPT・頻度順位 の配列（漢字でない文字は学年 0）"""
+    # 末尾の1要素は範囲外のコードポイントをまとめて引くための番兵
+    size = CJK_RANGES[-1][1] + 1
+    grade = np.zeros(size, dtype=np.uint8)
+    jlpt = np.zeros(size, dtype=np.uint8)
+    freq = np.zeros(size, dtype=np.float32)
+    for lo, hi in CJK_RANGES:
+        grade[lo:hi] = NON_JOYO_GRADE
+        jlpt[lo:hi] = MISSING_JLPT
+        freq[lo:hi] = MISSING_FREQ
+
+    codes = np.array([ord(r["kanji"]) for r in records], dtype=np.int64)
+    grade[codes] = [r.get("grade") or NON_JOYO_GRADE for r in records]
+    jlpt[codes] = [JLPT_LEVELS.get(r.get("jlpt"), MISSING_JLPT) for r in records]
+    freq[codes] = [r.get("freq") or MISSING_FREQ for r in records]
+    return KanjiTables(grade, jlpt, freq)
+
+
+def score_words(words: list, tables: KanjiTables) -> WordScores:
+    """全単語の最大学年・最も難しい JLPT・平均頻度順位・難易度を一括で計算"""
+    n = len(words)
+    codes = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+    codes = np.minimum(codes, len(tables.grade) - 1)
+    lengths = np.fromiter(map(len, words), dtype=np.int64, count=n)
+    word_ids = np.repeat(np.arange(n), lengths)
+
+    # 漢字の文字だけを残す（単語 ID の昇順のまま）
+    keep = tables.grade[codes] > 0
+    codes, word_ids = codes[keep], word_ids[keep]
+    counts = np.bincount(word_ids, minlength=n)
+
+    max_grade = np.zeros(n, dtype=np.uint8)
+    hardest_jlpt = np.zeros(n, dtype=np.uint8)
+    has_kanji = counts > 0
+    if has_kanji.any():
+        # 漢字を含む単語の先頭位置で区切って最大値をとる
+        starts = (np.cumsum(counts) - counts)[has_kanji]
+        max_grade[has_kanji] = np.maximum.reduceat(tables.grade[codes], starts)
+        hardest_jlpt[has_kanji] = np.maximum.reduceat(tables.jlpt[codes], starts)
+    mean_freq = np.bincount(word_ids, weights=tables.freq[codes], minlength=n) / np.maximum(counts, 1)
+
+    difficulty = (
+        DIFFICULTY_WEIGHTS["grade"] * (max_grade.astype(np.float64) / NON_JOYO_GRADE)
+        + DIFFICULTY_WEIGHTS["jlpt"] * (hardest_jlpt / MISSING_JLPT)
+        + DIFFICULTY_WEIGHTS["freq"] * (np.log1p(mean_freq) / np.log1p(MISSING_FREQ))
+    )
+    return WordScores(max_grade, hardest_jlpt, mean_freq, difficulty)
+
+
+def learnable_words(words_by_kanji: dict, words: list, scores: WordScores, tables: KanjiTables) -> dict:
+    """漢字 -> その漢字の学年までに習う漢字だけで書ける単語（words-by-kanji.json の順）"""
+    word_ids = {word: i for i, word in enumerate(words)}
+    kanji = list(words_by_kanji)
+    entries = [entry["word"] for k in kanji for entry in words_by_kanji[k]]
+    owners = np.repeat(np.arange(len(kanji)), [len(words_by_kanji[k]) for k in kanji])
+    entry_ids = np.fromiter((word_ids[w] for w in entries), dtype=np.int64, count=len(entries))
+
+    page_grade = tables.grade[[ord(k) for k in kanji]] if kanji else np.zeros(0, dtype=np.uint8)
+    keep = scores.max_grade[entry_ids] <= page_grade[owners]
+
+    learnable = {}
+    for owner, index in zip(owners[keep].tolist(), np.nonzero(keep)[0].tolist()):
+        learnable.setdefault(kanji[owner], []).append(entries[index])
+    return learnable
+
+
+def difficulty_table(words: list, scores: WordScores) -> dict:
+    """単語 -> {maxGrade, jlpt, meanFreq, difficulty}（漢字を含む単語のみ）"""
+    table = {}
+    levels = {level: name for name, level in JLPT_LEVELS.items()}
+    for word, grade, jlpt, freq, difficulty in zip(
+        words, scores.max_grade.tolist(), scores.jlpt.tolist(),
+        scores.mean_freq.round(1).tolist(), scores.difficulty.round(4).tolist(),
+    ):
+        if grade:
+            table[word] = {"maxGrade": grade, "jlpt": levels[jlpt], "meanFreq": freq, "difficulty": difficulty}
+    return table
+
+
+def build_word_difficulty(words_by_kanji: dict, records: list) -> tuple:
+    """(word-difficulty.json, learnable-words.json) の内容"""
+    tables = build_tables(records)
+    words = unique_words(words_by_kanji)
+    scores = score_words(words, tables)
+    return difficulty_table(words, scores), learnable_words(words_by_kanji, words, scores, tables)
+
+
+def run_benchmark(records: list, sizes: tuple = (10_000, 100_000, 1_000_000), seed: int = 0):
+    rng = random.Random(seed)
+    kanji = [r["kanji"] for r in records]
+    weights = [1 / (rank + 1) for rank in range(len(kanji))]
+    tables = build_tables(records)
+    for size in sizes:
+        words = ["".join(rng.choices(kanji, weights=weights, k=rng.choice((1, 2, 2, 3, 4)))) + "する"
+                 for _ in range(size)]
+        start = time.perf_counter()
+        scores = score_words(words, tables)
+        elapsed = time.perf_counter() - start
+        mean = float(scores.difficulty.mean())
+        print(f"    {size:>9,} words: {elapsed * 1000:>8.1f} ms  ({size / elapsed:>12,.0f} words/s, mean difficulty {mean:.3f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score word difficulty and select grade-learnable words")
+    parser.add_argument("--benchmark", action="store_true", help="time scoring of synthetic word lists")
+    args = parser.parse_args()
+
+    records = load_kanji_records(KANJI_JOYO_PATH, KANJI_DETAILS_DIR)
+
+    if args.benchmark:
+        print("[*] Benchmark")
+        run_benchmark(records)
+        return
+
+    with open(WORDS_BY_KANJI_PATH, "r", encoding="utf-8") as f:
+        words_by_kanji = json.load(f)
+    difficulty, learnable = build_word_difficulty(words_by_kanji, records)
+    print(f"[*] Scored {len(difficulty)} words; learnable subsets for {len(learnable)} kanji")
+
+    print(f"[*] Saving: {WORD_DIFFICULTY_PATH}")
+    with open(WORD_DIFFICULTY_PATH, "w", encoding="utf-8") as f:
+        json.dump(difficulty, f, ensure_ascii=False, indent=2)
+    print(f"[*] Saving: {LEARNABLE_WORDS_PATH}")
+    with open(LEARNABLE_WORDS_PATH, "w", encoding="utf-8") as f:
+        json.dump(learnable, f, ensure_ascii=False, indent=2)
+    print("\n[OK] Done!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+単語の取得元（ソース）を登録してまとめて読み込むモジュール
+
+各ソースは (word, reading, meaning, source, weight) のレコードを順に返す関数。
+ファイルを読むだけのソースはスレッドプールで並行に、形態素解析のように
+CPU を使うソースや例文を集めるソースは登録順に読み込む。同じ単語が複数の
+ソースにある場合は、読み・意味の項目ごとに優先度の高いソースの値を採用し、
+単語ごとにどのソースから来たかを記録する。
+"""
+
+import json
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from align_readings import katakana_to_hiragana
+
+WordRecord = namedtuple("WordRecord", "word reading meaning source weight")
+WordSource = namedtuple("WordSource", "name priority loader io_bound")
+
+# kanji_mistake.json の例: "凡例(はんれい)", "帆船(はんせん/ほせん)", "異常/以上"
+EXAMPLE_RE = re.compile(r"^([^\s(/←]+)\(([ぁ-ゖー]+)(?:/[^)]*)?\)$")
+
+
+class SourceRegistry:
+    """優先度つきの単語ソースの一覧"""
+
+    def __init__(self):
+        self.sources = []
+
+    def register(self, name: str, priority: int, loader, io_bound: bool = False):
+        """loader() はレコードを返すイテラブル。priority が大きいほど優先"""
+        self.sources.append(WordSource(name, priority, loader, io_bound))
+
+    def ordered(self) -> list:
+        """優先度の高い順（同じ優先度は登録順）"""
+        return sorted(self.sources, key=lambda s: -s.priority)
+
+    def load(self, max_workers: int = None) -> tuple:
+        """全ソースを読み込み、(ソースごとのレコード, ソースごとの秒数) を優先度順で返す"""
+
+        def run(source: WordSource):
+            start = time.perf_counter()
+            records = list(source.loader())
+            return records, time.perf_counter() - start
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {s.name: pool.submit(run, s) for s in self.sources if s.io_bound}
+            # CPU を使うソースは結果を決定的にするため登録順にこのスレッドで読む
+            for source in self.sources:
+                if not source.io_bound:
+                    results[source.name] = run(source)
+            for name, future in futures.items():
+                results[name] = future.result()
+
+        ordered = self.ordered()
+        return (
+            [(s, results[s.name][0]) for s in ordered],
+            {s.name: results[s.name][1] for s in ordered},
+        )
+
+
+def merge_records(loaded: list) -> list:
+    """優先度順の (ソース, レコード) から単語ごとに1件へまとめる
+
+    読み・意味は空でない値のうち (優先度, weight) が最も大きいものを採用し、
+    同点なら先に現れたものを残す。並びは優先度順に最初に現れた順。
+    """
+    merged = {}
+    for source, records in loaded:
+        for record in records:
+            key = (source.priority, record.weight)
+            entry = merged.get(record.word)
+            if entry is None:
+                entry = merged[record.word] = {
+                    "word": record.word,
+                    "reading": "", "meaning": "",
+                    "sources": [],
+                    "_keys": {"reading": None, "meaning": None},
+                }
+            for field in ("reading", "meaning"):
+                value = getattr(record, field)
+                best = entry["_keys"][field]
+                if value and (best is None or key > best):
+                    entry[field] = value
+                    entry["_keys"][field] = key
+            if source.name not in entry["sources"]:
+                entry["sources"].append(source.name)
+
+    for entry in merged.values():
+        del entry["_keys"]
+    return list(merged.values())
+
+
+def tuple_records(words: list, source: str, weight: float = 1.0):
+    """(単語, 読み, 意味) のリスト（SAMPLE_WORDS など）"""
+    for word, reading, meaning in words:
+        yield WordRecord(word, reading, meaning, source, weight)
+
+
+def mistake_example_records(path: Path, source: str = "mistake", weight: float = 1.0):
+    """kanji_mistake.json の examples のうち「単語(よみ)」の形のもの"""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    for entry in entries:
+        for example in entry.get("examples", []):
+            match = EXAMPLE_RE.match(example)
+            if match:
+                yield WordRecord(match.group(1), match.group(2), "", source, weight)
+
+
+def exam_kanji_records(path: Path, details_dir: Path, source: str = "exam", weight: float = 1.0):
+    """kanji_exam.json の漢字1字を単語として（読みは kanji-details の最初の音読み、なければ訓読み）"""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    for entry in entries:
+        detail_path = details_dir / f"{entry['kanji']}.json"
+        if not detail_path.exists():
+            continue
+        with open(detail_path, "r", encoding="utf-8") as f:
+            detail = json.load(f)
+        readings = detail.get("on", []) + [k.split(".")[0] for k in detail.get("kun", [])]
+        readings = [katakana_to_hiragana(r.replace("-", "")) for r in readings if r.strip("-")]
+        if readings:
+            yield WordRecord(entry["kanji"], readings[0], entry.get("meaning", ""), source, weight)
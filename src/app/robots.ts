@@ -10,6 +10,7 @@ export default function robots(): MetadataRoute.Robots {
         allow: "/",
       },
     ],
-    sitemap: `${baseUrl}/sitemap.xml`,
+    // sitemap.ts に無いページ（書き取り練習）の分割サイトマップ（scripts/sitemap_writer.py が書き出してコミットする）
+    sitemap: [`${baseUrl}/sitemap.xml`, `${baseUrl}/sitemaps/sitemap-index.xml`],
   };
 }
@@ -5,6 +5,7 @@
 
 import { supabase, isSupabaseConfigured } from "@/lib/supabaseClient";
 import fallbackRanking from "@/data/fallbackRanking.json";
+import rankingSnapshots from "@/data/rankingSnapshots.json";
 import { toUnicodeSlug } from "@/lib/slugHelpers";
 
 /**
@@ -16,6 +17,48 @@ export interface RankingPosition {
   views?: number;
 }
 
+/**
+ * 期間別ランキングのスナップショット（scripts/rollup_kanji_views.py が生成）
+ */
+interface RankingSnapshot {
+  since: string;
+  ranking: { kanji: string; views: number }[];
+  positions: Record<string, number>;
+}
+
+const snapshotPeriods = (rankingSnapshots as { periods: Record<string, RankingSnapshot> }).periods;
+
+/**
+ * フォールバックランキングの 漢字 -> インデックス（毎回 findIndex しない）
+ */
+const fallbackIndexByKanji = new Map(fallbackRanking.map((item, index) => [item.kanji, index]));
+
+/**
+ * スナップショットとフォールバックから順位を引く（どちらも O(1)）
+ */
+function lookupRankingPosition(kanji: string, period: string): RankingPosition | null {
+  const snapshot = snapshotPeriods[period];
+  const position = snapshot?.positions[kanji];
+  if (position !== undefined) {
+    return {
+      position,
+      period,
+      views: snapshot.ranking[position - 1]?.views,
+    };
+  }
+
+  const fallbackIndex = fallbackIndexByKanji.get(kanji);
+  if (fallbackIndex !== undefined) {
+    return {
+      position: fallbackIndex + 1, // 1ベースの順位
+      period,
+      views: fallbackRanking[fallbackIndex].views,
+    };
+  }
+
+  return null;
+}
+
 /**
  * 漢字のランキング位置を取得（週次をデフォルト）
  * @param kanji - 漢字文字
@@ -26,15 +69,10 @@ export async function getRankingPosition(
   kanji: string,
   period: string = "week"
 ): Promise<RankingPosition | null> {
-  // フォールバックランキングから検索
-  const fallbackIndex = fallbackRanking.findIndex((item) => item.kanji === kanji);
-  
-  if (fallbackIndex !== -1) {
-    return {
-      position: fallbackIndex + 1, // 1ベースの順位
-      period: period,
-      views: fallbackRanking[fallbackIndex].views,
-    };
+  // 期間別スナップショット、なければフォールバックランキングから検索
+  const cached = lookupRankingPosition(kanji, period);
+  if (cached) {
+    return cached;
   }
 
   // Supabaseが利用可能な場合はDBから取得
@@ -75,20 +113,10 @@ export async function getRankingPosition(
 
 /**
  * ランキング位置を同期取得（サーバーサイド用）
- * フォールバックデータのみを使用
+ * スナップショットとフォールバックデータのみを使用
  */
-export function getRankingPositionSync(kanji: string): RankingPosition | null {
-  const fallbackIndex = fallbackRanking.findIndex((item) => item.kanji === kanji);
-  
-  if (fallbackIndex !== -1) {
-    return {
-      position: fallbackIndex + 1,
-      period: "week",
-      views: fallbackRanking[fallbackIndex].views,
-    };
-  }
-
-  return null;
+export function getRankingPositionSync(kanji: string, period: string = "week"): RankingPosition | null {
+  return lookupRankingPosition(kanji, period);
 }
 
 
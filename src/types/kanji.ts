@@ -43,10 +43,22 @@ export interface KanjiDetail {
   hasStrokeData?: boolean;
 }
 
+export interface ReadingSegment {
+  text: string;
+  reading: string;
+  // 音読み・訓読み・送り仮名・熟字訓
+  type: "on" | "kun" | "kana" | "jukujikun";
+  // 連濁・促音化する前の読み（例: "がっ" → "がく"）
+  base?: string;
+}
+
 export interface WordEntry {
   word: string;
   reading: string;
   meaning: string;
+  alignment?: ReadingSegment[];
+  // 単語の取得元（sample / fugashi / corpus / mistake / exam）
+  sources?: string[];
 }
 
 export interface KanjiJoyo {